@@ -0,0 +1,53 @@
+"""
+Compares the construct layouts with the precompiled decoders of the pool and market states.
+
+    python -m benchmarks.bench_fast_decoder
+"""
+
+import os
+import time
+
+from soldexpy.layout.raydium_layout import (
+    LIQUIDITY_STATE_LAYOUT_V4,
+    LIQUIDITY_STATE_V4_DECODER,
+)
+from soldexpy.layout.serum_layout import MARKET_STATE_LAYOUT_V2, MARKET_STATE_V2_DECODER
+
+
+def measure(name: str, func, repeat: int = 5, number: int = 2000):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{name:<40} {best * 1e6:10.2f} us")
+    return best
+
+
+def main():
+    for name, layout, decoder in [
+        (
+            "LIQUIDITY_STATE_LAYOUT_V4",
+            LIQUIDITY_STATE_LAYOUT_V4,
+            LIQUIDITY_STATE_V4_DECODER,
+        ),
+        ("MARKET_STATE_LAYOUT_V2", MARKET_STATE_LAYOUT_V2, MARKET_STATE_V2_DECODER),
+    ]:
+        data = memoryview(os.urandom(layout.sizeof()))
+        print(name)
+        construct_time = measure("  construct parse", lambda: layout.parse(data))
+        parse_time = measure(
+            "  FastDecoder.parse (Container)", lambda: decoder.parse(data)
+        )
+        decode_time = measure(
+            "  FastDecoder.decode (namedtuple)", lambda: decoder.decode(data)
+        )
+        print(
+            f"  speedup: parse {construct_time / parse_time:.1f}x, "
+            f"decode {construct_time / decode_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares RaydiumPool.get_price called in a loop with the vectorized get_prices.
+
+    python -m benchmarks.bench_get_prices
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.vectorized_price import get_pools_prices, get_prices
+
+
+def measure(name: str, func, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<40} {best * 1000:10.3f} ms")
+    return best
+
+
+def main():
+    # get_price only needs the vault balances
+    pools = [
+        SimpleNamespace(
+            base_vault_balance=4757782.728947 * (1 + i / 100),
+            quote_vault_balance=41868.877422974 * (1 + i / 200),
+        )
+        for i in range(500)
+    ]
+    pool = pools[0]
+    in_amounts = np.geomspace(0.001, 1000, 1000)
+    in_amounts_list = in_amounts.tolist()
+
+    print("slippage ladder: 1 pool x 1000 amounts")
+    scalar = measure(
+        "RaydiumPool.get_price loop",
+        lambda: [
+            RaydiumPool.get_price(
+                pool, in_amount, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN
+            )
+            for in_amount in in_amounts_list
+        ],
+    )
+    vectorized = measure(
+        "get_prices",
+        lambda: get_prices(
+            pool.base_vault_balance,
+            pool.quote_vault_balance,
+            in_amounts,
+            Direction.SPEND_QUOTE_TOKEN,
+            Unit.BASE_TOKEN,
+        ),
+    )
+    print(f"speedup: {scalar / vectorized:.1f}x\n")
+
+    print("pool scan: 500 pools x 100 amounts")
+    in_amounts = in_amounts[::10]
+    in_amounts_list = in_amounts.tolist()
+    scalar = measure(
+        "RaydiumPool.get_price loop",
+        lambda: [
+            RaydiumPool.get_price(
+                pool, in_amount, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN
+            )
+            for pool in pools
+            for in_amount in in_amounts_list
+        ],
+    )
+    vectorized = measure(
+        "get_pools_prices",
+        lambda: get_pools_prices(
+            pools, in_amounts, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN
+        ),
+    )
+    print(f"speedup: {scalar / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
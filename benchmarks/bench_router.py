@@ -0,0 +1,73 @@
+"""
+Route search over thousands of pools, and the cost of a reserve update compared to
+rebuilding the graph.
+
+    python -m benchmarks.bench_router
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+from solders.pubkey import Pubkey
+
+from soldexpy.router import Router
+
+SOL = Pubkey.from_string("So11111111111111111111111111111111111111112")
+
+
+def measure(name: str, func, repeat: int = 5, number: int = 100):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{name:<40} {best * 1e6:10.1f} us")
+    return best
+
+
+def make_pool(mint: Pubkey):
+    # the router only needs the mints, the reserves and the fee of a pool
+    pool = SimpleNamespace(
+        amm_id=Pubkey.new_unique(),
+        pool_address=None,
+        base_mint_address=mint,
+        quote_mint_address=SOL,
+        base_vault_amount=random.randint(10**12, 10**15),
+        quote_vault_amount=random.randint(10**11, 10**13),
+        get_swap_fee_ratio=lambda: (25, 10000),
+    )
+    pool.get_reserves = lambda: (pool.base_vault_amount, pool.quote_vault_amount)
+    return pool
+
+
+def main():
+    random.seed(0)
+    mints = [Pubkey.new_unique() for _ in range(4000)]
+    # some tokens have several pools
+    pools = [make_pool(mint) for mint in mints] + [
+        make_pool(random.choice(mints)) for _ in range(1000)
+    ]
+    router = Router(pools)
+    print(f"{len(router)} pools, {len(mints) + 1} tokens")
+
+    token_a, token_b = mints[0], mints[1]
+    route = router.find_route(token_a, token_b, 10**9)
+    print(route)
+    measure(
+        "find_route token -> SOL -> token",
+        lambda: router.find_route(token_a, token_b, 10**9),
+    )
+    measure("find_route SOL -> token", lambda: router.find_route(SOL, token_b, 10**9))
+    measure(
+        "find_route max_hops=4",
+        lambda: router.find_route(token_a, token_b, 10**9, 4),
+        number=5,
+    )
+    measure("update_pool (one reserve change)", lambda: router.update_pool(pools[0]))
+    measure("Router(pools) (rebuild)", lambda: Router(pools), number=3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compares building and signing a swap transaction with SwapTransactionBuilder
+(instructions + MessageV0.try_compile + VersionedTransaction) and with SwapMessageTemplate
+(patch the amounts, seed and blockhash of a compiled message, then sign).
+
+    python -m benchmarks.bench_swap_message_template
+"""
+
+import secrets
+import time
+
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from solders.transaction import VersionedTransaction
+from spl.token.constants import TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
+
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_message_template import SwapMessageTemplate
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+
+POOL_ADDRESSES = [
+    "amm_id",
+    "amm_authority",
+    "amm_open_orders",
+    "amm_target_orders",
+    "pool_coin_token_account",
+    "pool_pc_token_account",
+    "market_program_id",
+    "serum_market",
+    "serum_bids",
+    "serum_asks",
+    "serum_event_queue",
+    "serum_coin_vault_account",
+    "serum_pc_vault_account",
+    "serum_vault_signer",
+    "base_mint_address",
+]
+
+
+def make_pool() -> RaydiumPool:
+    # the swap only needs the addresses of the pool, no RPC
+    pool = RaydiumPool.__new__(RaydiumPool)
+    for name in POOL_ADDRESSES:
+        setattr(pool, name, Pubkey.new_unique())
+    pool.pool_address = pool.amm_id
+    pool.quote_mint_address = WRAPPED_SOL_MINT
+    pool.token_program_id = TOKEN_PROGRAM_ID
+    pool.swap_instruction_template = None
+    return pool
+
+
+def measure(name: str, func, number: int = 2000):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    print(f"{name:<40} {best * 1e6:10.1f} us")
+    return best
+
+
+def main():
+    pool = make_pool()
+    payer = Keypair()
+    blockhash = Hash(secrets.token_bytes(32))
+    message = bytes(600)
+
+    def compile(builder):
+        # compile_versioned_transaction without the blockhash RPC
+        message = MessageV0.try_compile(
+            payer.pubkey(), builder.instructions, [], blockhash
+        )
+        return VersionedTransaction(message, [payer])
+
+    def build_buy():
+        builder = SwapTransactionBuilder(None, pool, payer)
+        builder.append_set_compute_budget(builder.unit_price, builder.unit_budget)
+        source = builder.append_create_account_with_seed(2039280 + 1000000)
+        builder.append_initialize_account(source)
+        dest = get_associated_token_address(payer.pubkey(), builder.mint)
+        builder.append_swap(1000000, source, dest, 1)
+        builder.append_close_account(source)
+        return compile(builder)
+
+    def build_sell():
+        builder = SwapTransactionBuilder(None, pool, payer)
+        builder.append_set_compute_budget(builder.unit_price, builder.unit_budget)
+        source = get_associated_token_address(payer.pubkey(), builder.mint)
+        dest = get_associated_token_address(payer.pubkey(), builder.quoteMint)
+        builder.append_create_associated_token_account(builder.quoteMint)
+        builder.append_swap(1000000, source, dest, 1)
+        builder.append_close_account(dest)
+        return compile(builder)
+
+    buy_template = SwapMessageTemplate(
+        pool, payer, Direction.SPEND_QUOTE_TOKEN, 2039280, create_token_account=False
+    )
+    sell_template = SwapMessageTemplate(pool, payer, Direction.SPEND_BASE_TOKEN)
+
+    measure("Keypair.sign_message (lower bound)", lambda: payer.sign_message(message))
+    for name, build, template in [
+        ("buy", build_buy, buy_template),
+        ("sell", build_sell, sell_template),
+    ]:
+        print(f"\n{name}: build + sign")
+        builder = measure("SwapTransactionBuilder", build)
+        measure(
+            "SwapMessageTemplate.build_raw",
+            lambda: template.build_raw(1000000, 1, blockhash),
+        )
+        fast = measure(
+            "SwapMessageTemplate.build",
+            lambda: template.build(1000000, 1, blockhash),
+        )
+        print(f"speedup: {builder / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
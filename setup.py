@@ -10,6 +10,7 @@ setuptools.setup(
         "base58",
         "solders",
         "solana==0.31.0",
+        "numpy",
     ],
 )
 """
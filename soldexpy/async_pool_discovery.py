@@ -0,0 +1,76 @@
+from typing import List, Tuple
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.pool_discovery import (
+    POOL_MINTS_DATA_SLICE,
+    PoolDiscoveryIndex,
+    make_pool_filters,
+    parse_pool_mints,
+)
+
+
+class AsyncPoolDiscoveryIndex(PoolDiscoveryIndex):
+    """
+    Same as PoolDiscoveryIndex but scans with AsyncClient. The coroutines are named *_async, the
+    inherited synchronous methods still work with a Client.
+    """
+
+    async def scan_async(
+        self,
+        client: AsyncClient,
+        base_mint: Pubkey = None,
+        quote_mint: Pubkey = None,
+        commitment: Commitment = None,
+    ) -> List[Tuple[str, str, str]]:
+        resp = await async_client_wrapper.get_program_accounts(
+            client,
+            RAYDIUM_LIQUIDITY_POOL_V4,
+            make_pool_filters(base_mint, quote_mint),
+            POOL_MINTS_DATA_SLICE,
+            commitment,
+        )
+        return parse_pool_mints(resp)
+
+    async def discover_async(
+        self,
+        client: AsyncClient,
+        mint: Pubkey,
+        commitment: Commitment = None,
+        save=True,
+    ) -> List[str]:
+        pool_mints = await self.scan_async(
+            client, base_mint=mint, commitment=commitment
+        )
+        pool_mints += await self.scan_async(
+            client, quote_mint=mint, commitment=commitment
+        )
+        self.set_mint_pools(mint, pool_mints)
+        if save:
+            self.save()
+        return self.get_pool_addresses(mint)
+
+    async def lookup_async(
+        self,
+        client: AsyncClient,
+        mint: Pubkey,
+        max_age_seconds: float = None,
+        commitment: Commitment = None,
+    ) -> List[str]:
+        if not self.is_discovered(mint, max_age_seconds):
+            return await self.discover_async(client, mint, commitment)
+        return self.get_pool_addresses(mint)
+
+    async def refresh_async(
+        self, client: AsyncClient, max_age_seconds: float, commitment: Commitment = None
+    ) -> List[str]:
+        mints = self.get_stale_mints(max_age_seconds)
+        for mint in mints:
+            await self.discover_async(client, mint, commitment, save=False)
+        if len(mints) > 0:
+            self.save()
+        return mints
@@ -0,0 +1,126 @@
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.multiple_accounts_info import (
+    async_get_multiple_accounts_info,
+)
+from soldexpy.solana_util.raydium_pool_info import async_get_pool_amounts
+
+
+class AsyncRaydiumPool(RaydiumPool):
+    """
+    RaydiumPool built on AsyncClient. Use `await AsyncRaydiumPool.create(client, pool_address)`
+    instead of the constructor.
+    The methods that do RPC are coroutines named *_async, so code that takes a RaydiumPool
+    (e.g. Router) keeps the synchronous methods; update_pool_vaults_balance raises since it
+    can't run on an AsyncClient.
+    """
+
+    def __init__(self, client: AsyncClient, pool_address: str):
+        raise Exception("use AsyncRaydiumPool.create")
+
+    @classmethod
+    async def create(
+        cls, client: AsyncClient, pool_address: str, commitment: Commitment = None
+    ) -> "AsyncRaydiumPool":
+        pools = await cls.load_many_async(client, [pool_address], commitment)
+        return pools[0]
+
+    @classmethod
+    async def load_many_async(
+        cls,
+        client: AsyncClient,
+        pool_addresses: List[str],
+        commitment: Commitment = None,
+    ) -> List["AsyncRaydiumPool"]:
+        amm_accounts = await async_get_multiple_accounts_info(
+            client, cls._get_amm_keys(pool_addresses), commitment
+        )
+        pool_infos = cls._parse_amm_accounts(pool_addresses, amm_accounts)
+        keys = cls._get_market_and_vault_keys(pool_infos)
+        accounts = cls._parse_market_and_vault_accounts(
+            keys, await async_get_multiple_accounts_info(client, keys, commitment)
+        )
+        market_infos = cls._parse_market_infos(pool_infos, accounts)
+        serum_vault_accounts = await async_get_multiple_accounts_info(
+            client, cls._get_serum_vault_keys(market_infos), commitment
+        )
+        return cls._build_many(
+            client,
+            pool_addresses,
+            pool_infos,
+            market_infos,
+            accounts,
+            serum_vault_accounts,
+        )
+
+    @classmethod
+    async def from_snapshot_async(
+        cls, client: AsyncClient, snapshot: dict, update_vault_balance: bool = True
+    ) -> "AsyncRaydiumPool":
+        pool = super(AsyncRaydiumPool, cls).from_snapshot(client, snapshot, False)
+        if update_vault_balance:
+            await pool.update_pool_vaults_balance_async()
+        return pool
+
+    @staticmethod
+    async def update_many_pool_vaults_balance_async(
+        client: AsyncClient,
+        pools: List["AsyncRaydiumPool"],
+        commitment: Commitment = None,
+    ):
+        for chunk in RaydiumPool._chunk_pools_for_vaults(pools):
+            resp = await async_client_wrapper.get_multiple_accounts(
+                client, RaydiumPool._get_vault_keys(chunk), commitment
+            )
+            RaydiumPool._set_many_pool_vaults_amount(chunk, resp)
+
+    def update_pool_vaults_balance(
+        self, commitment: str = "confirmed", min_context_slot: int = None
+    ):
+        raise Exception("use await update_pool_vaults_balance_async()")
+
+    async def update_pool_vaults_balance_async(
+        self, commitment: str = "confirmed", min_context_slot: int = None
+    ):
+        base_amount, quote_amount, need_take_pnl, slot = await async_get_pool_amounts(
+            self.client,
+            self.amm_id,
+            Pubkey(self.pool_info.base_vault),
+            Pubkey(self.pool_info.quote_vault),
+            commitment,
+            min_context_slot,
+        )
+        self.set_need_take_pnl(*need_take_pnl, slot)
+        return self.set_pool_vaults_amount(base_amount, quote_amount, slot)
+
+    async def get_price_async(
+        self,
+        in_amount: float,
+        direction: Direction,
+        return_price_unit: Unit = Unit.QUOTE_TOKEN,
+        update_vault_balance=False,
+        commitment="confirmed",
+    ):
+        if update_vault_balance:
+            await self.update_pool_vaults_balance_async(commitment)
+        return RaydiumPool.get_price(self, in_amount, direction, return_price_unit)
+
+    async def get_prices_async(
+        self,
+        in_amounts,
+        direction: Direction,
+        return_price_unit: Unit = Unit.QUOTE_TOKEN,
+        update_vault_balance=False,
+        commitment="confirmed",
+    ):
+        if update_vault_balance:
+            await self.update_pool_vaults_balance_async(commitment)
+        return RaydiumPool.get_prices(self, in_amounts, direction, return_price_unit)
@@ -0,0 +1,39 @@
+from typing import Dict, List
+
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.pubkey import Pubkey
+
+from soldexpy.common.direction import Direction
+from soldexpy.router import Route, Router
+from soldexpy.solana_tx_util.async_swap_transaction_builder import (
+    AsyncSwapTransactionBuilder,
+)
+
+
+class AsyncRouter(Router):
+    """
+    Router that appends the routes to an AsyncSwapTransactionBuilder.
+    """
+
+    @staticmethod
+    async def append_route(
+        builder: AsyncSwapTransactionBuilder,
+        route: Route,
+        slippage_allowance: float,
+        rent_lamports: int = None,
+        address_lookup_tables: Dict[Pubkey, List[AddressLookupTableAccount]] = None,
+    ):
+        address_lookup_tables = address_lookup_tables or {}
+        amount_in = route.amount_in
+        for edge, amount_out in zip(
+            route.edges, route.get_min_amounts_out(slippage_allowance)
+        ):
+            builder.set_pool(edge.pool, address_lookup_tables.get(edge.pool.amm_id))
+            if edge.direction == Direction.SPEND_QUOTE_TOKEN:
+                await builder.append_buy(
+                    amount_in, amount_out, rent_lamports=rent_lamports
+                )
+            else:
+                await builder.append_sell(amount_in, amount_out)
+            amount_in = amount_out
+        return builder
@@ -0,0 +1,326 @@
+import json
+import time
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.keypair import Keypair
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.async_wrapped_sol_account import AsyncWrappedSolAccount
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.solana_tx_util.async_compute_unit_estimator import (
+    AsyncComputeUnitEstimator,
+)
+from soldexpy.solana_tx_util.async_swap_transaction_builder import (
+    AsyncSwapTransactionBuilder,
+)
+from soldexpy.solana_tx_util.swap_message_template import (
+    SwapMessageTemplate,
+    SwapMessageTemplateCache,
+)
+from soldexpy.solana_util.async_transaction_broadcaster import (
+    AsyncTransactionBroadcaster,
+)
+from soldexpy.solana_util.priority_fee_estimator import AsyncPriorityFeeEstimator
+from soldexpy.solana_util.signature_confirmer import SignatureConfirmer
+from soldexpy.swap import Swap
+from soldexpy.token_account_registry import TokenAccountRegistry
+
+
+class AsyncSwap(Swap):
+    """
+    Swap built on AsyncClient and AsyncRaydiumPool. buy/sell and the price updater never block
+    the event loop, so one loop can drive many pools and swaps concurrently.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        pool: AsyncRaydiumPool,
+        virtual_amount: int = 1,
+        queue_size: int = 100,
+        rate_limit_seconds: float = 0.1,
+        rate_limit_sleep_seconds: float = 0.01,
+        confirm_tx_sleep_seconds: float = 1,
+        token_account_registry: TokenAccountRegistry = None,
+        message_template_cache: SwapMessageTemplateCache = None,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+        signature_confirmer: SignatureConfirmer = None,
+        transaction_broadcaster: AsyncTransactionBroadcaster = None,
+        wrapped_sol_account: AsyncWrappedSolAccount = None,
+        compute_unit_estimator: AsyncComputeUnitEstimator = None,
+        priority_fee_estimator: AsyncPriorityFeeEstimator = None,
+        fee_percentile: int = None,
+    ):
+        super().__init__(
+            client,
+            pool,
+            virtual_amount,
+            queue_size,
+            rate_limit_seconds,
+            rate_limit_sleep_seconds,
+            confirm_tx_sleep_seconds,
+            token_account_registry,
+            message_template_cache,
+            address_lookup_tables,
+            transaction_broadcaster,
+            wrapped_sol_account,
+            compute_unit_estimator,
+            priority_fee_estimator,
+            fee_percentile,
+        )
+        # the async SignatureConfirmer, watch() returns the PendingSignature itself
+        self.signature_confirmer = signature_confirmer
+
+    def update_local_price(self):
+        # the local price is calculated from the cached vault balances (no RPC)
+        new_base_price = self.pool.get_base_price(Unit.BASE_TOKEN)
+        if self.price != new_base_price:
+            self.price = new_base_price
+        self.price_update_time = time.time()
+
+    async def update_local_price_from_pool(self):
+        await self.pool.update_pool_vaults_balance_async(self.client.commitment)
+        self.update_local_price()
+
+    async def get_rent_lamports(self):
+        if self.rent_lamports is None:
+            self.rent_lamports = (
+                await async_client_wrapper.get_min_balance_rent_for_exempt_for_account(
+                    self.client
+                )
+            )
+        return self.rent_lamports
+
+    def build_from_template(self, template, amount_in: int, amount_out: int):
+        raise Exception("use await build_from_template_async()")
+
+    async def build_from_template_async(
+        self, template: SwapMessageTemplate, amount_in: int, amount_out: int
+    ):
+        recent_blockhash = await async_client_wrapper.get_latest_blockhash(self.client)
+        unit_price = self.get_unit_price()
+        key, units = self.get_template_compute_units(template)
+        if (
+            key is not None
+            and units is None
+            and self.compute_unit_estimator.should_simulate(key)
+        ):
+            units = await self.compute_unit_estimator.simulate(
+                template.build(amount_in, amount_out, recent_blockhash, unit_price)
+            )
+            self.compute_unit_estimator.set_units(key, units)
+        return template.build(
+            amount_in,
+            amount_out,
+            recent_blockhash,
+            unit_price,
+            unit_limit=self.get_template_unit_limit(units),
+        )
+
+    async def make_buy_transaction(
+        self, payer: Keypair, amount_in: int, amount_out: int
+    ):
+        if self.message_template_cache is not None:
+            template = self.get_message_template(
+                payer, Direction.SPEND_QUOTE_TOKEN, await self.get_rent_lamports()
+            )
+            return await self.build_from_template_async(template, amount_in, amount_out)
+        swap_transaction_builder = AsyncSwapTransactionBuilder(
+            self.client,
+            self.pool,
+            payer,
+            token_account_registry=self.token_account_registry,
+            address_lookup_tables=self.address_lookup_tables,
+            wrapped_sol_account=self.wrapped_sol_account,
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+        await swap_transaction_builder.append_buy(amount_in, amount_out, True)
+        return await swap_transaction_builder.compile_versioned_transaction()
+
+    async def make_sell_transaction(
+        self, payer: Keypair, amount_in: int, amount_out: int
+    ):
+        if self.message_template_cache is not None:
+            template = self.get_message_template(payer, Direction.SPEND_BASE_TOKEN)
+            return await self.build_from_template_async(template, amount_in, amount_out)
+        swap_transaction_builder = AsyncSwapTransactionBuilder(
+            self.client,
+            self.pool,
+            payer,
+            token_account_registry=self.token_account_registry,
+            address_lookup_tables=self.address_lookup_tables,
+            wrapped_sol_account=self.wrapped_sol_account,
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+        await swap_transaction_builder.append_sell(amount_in, amount_out)
+        return await swap_transaction_builder.compile_versioned_transaction()
+
+    async def send_transaction(self, transaction):
+        if self.transaction_broadcaster is not None:
+            return await self.transaction_broadcaster.send_transaction_async(
+                transaction
+            )
+        return await async_client_wrapper.send_transaction(self.client, transaction)
+
+    async def buy(
+        self,
+        amount_in: float,
+        slippage_allowance: float,
+        payer: Keypair,
+        update_vault: bool = True,
+        confirm_commitment: str = "confirmed",
+        wait_for_confirmation: bool = True,
+    ):
+        if update_vault:
+            await self.pool.update_pool_vaults_balance_async()
+        # convert to tx format
+        amount_in = self.pool.convert_quote_token_amount_to_tx_format(amount_in)
+        # get min amount out (exact integer amount the program computes)
+        expect_amount_out = self.pool.get_amount_out(
+            amount_in, Direction.SPEND_QUOTE_TOKEN
+        )
+        amount_out = int(expect_amount_out * (1 - slippage_allowance))
+        # buy
+        transaction = await self.make_buy_transaction(payer, amount_in, amount_out)
+        txn_signature = (await self.send_transaction(transaction)).value
+        if self.signature_confirmer is not None:
+            pending = self.signature_confirmer.watch(
+                txn_signature, self.pool.vault_balance_slot
+            )
+            pending.future.add_done_callback(
+                lambda future: self.on_buy_done(payer, txn_signature, future)
+            )
+            if wait_for_confirmation:
+                await pending
+            return pending
+        if not wait_for_confirmation:
+            # the outcome is never known here, so the tracked WSOL amount can't be trusted
+            self.settle_wrapped_sol_account(txn_signature, None)
+            return txn_signature
+        # wait for confirmation
+        resp = await async_client_wrapper.confirm_transaction(
+            self.client,
+            txn_signature,
+            confirm_commitment,
+            self.confirm_tx_sleep_seconds,
+        )
+        self.settle_wrapped_sol_account(txn_signature, resp.value[0])
+        self.add_destination_token_account(payer, resp)
+        return resp
+
+    async def sell(
+        self,
+        amount_in: float,
+        slippage_allowance: float,
+        payer: Keypair,
+        update_vault: bool = True,
+        confirm_commitment: str = "confirmed",
+        wait_for_confirmation: bool = True,
+    ):
+        if update_vault:
+            await self.pool.update_pool_vaults_balance_async()
+        # convert to tx format
+        amount_in = self.pool.convert_base_token_amount_to_tx_format(amount_in)
+        # get min amount out (exact integer amount the program computes)
+        expect_amount_out = self.pool.get_amount_out(
+            amount_in, Direction.SPEND_BASE_TOKEN
+        )
+        amount_out = int(expect_amount_out * (1 - slippage_allowance))
+        # sell
+        transaction = await self.make_sell_transaction(payer, amount_in, amount_out)
+        txn_signature = (await self.send_transaction(transaction)).value
+        if self.signature_confirmer is not None:
+            pending = self.signature_confirmer.watch(
+                txn_signature, self.pool.vault_balance_slot
+            )
+            pending.future.add_done_callback(
+                lambda future: self.on_sell_done(txn_signature, future)
+            )
+            if wait_for_confirmation:
+                await pending
+            return pending
+        if not wait_for_confirmation:
+            # the outcome is never known here, so the tracked WSOL amount can't be trusted
+            self.settle_wrapped_sol_account(txn_signature, None)
+            return txn_signature
+        # wait for confirmation
+        resp = await async_client_wrapper.confirm_transaction(
+            self.client,
+            txn_signature,
+            confirm_commitment,
+            self.confirm_tx_sleep_seconds,
+        )
+        self.settle_wrapped_sol_account(txn_signature, resp.value[0])
+        return resp
+
+    async def get_pool_lp_supply(self, signer: Keypair, commitment="confirmed"):
+        swap_transaction_builder = AsyncSwapTransactionBuilder(
+            self.client, self.pool, signer
+        )
+        swap_transaction_builder.append_get_pool_data()
+        tx = await swap_transaction_builder.compile_versioned_transaction()
+        simulate_result = await async_client_wrapper.simulate_transaction(
+            self.client, tx, False, commitment
+        )
+        simulate_logs = simulate_result.value.logs
+        pool_info_raw = ""
+
+        program_log_expected = "Program log: GetPoolData: "
+
+        for log in simulate_logs:
+            if log.startswith(program_log_expected):
+                pool_info_raw = log
+                break
+
+        if pool_info_raw == "":
+            raise Exception(
+                "failed to get pool info since the program log cannot be found"
+            )
+
+        pool_info_raw = pool_info_raw.replace(program_log_expected, "")
+        try:
+            pool_info = json.loads(pool_info_raw)
+        except:
+            print("failed to load pool json")
+            print(simulate_logs)
+            raise Exception("failed to load json")
+
+        lp_supply = int(pool_info["pool_lp_supply"])
+        lp_supply_unlocked = int(
+            (
+                await async_client_wrapper.get_token_supply(
+                    self.client, self.pool.lp_token_address, commitment
+                )
+            ).value.amount
+        )
+        lp_locked = lp_supply - lp_supply_unlocked
+
+        return lp_supply, lp_locked, lp_locked / lp_supply
+
+    async def get_pool_lp_locked_ratio(
+        self, signer: Keypair, max_retry_count=0, commitment="confirmed"
+    ):
+        try:
+            retry_count = -1
+            while retry_count < max_retry_count:
+                retry_count += 1
+                try:
+                    _, _, lp_locked_ratio = await self.get_pool_lp_supply(
+                        signer, commitment
+                    )
+                    return lp_locked_ratio
+                except:
+                    print("failed to get pool lp locked ratio, retrying...")
+                    continue
+            raise Exception("failed to get pool lp locked ratio")
+        except:
+            print("failed to get pool lp locked ratio")
+            return -1
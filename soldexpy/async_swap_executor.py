@@ -0,0 +1,217 @@
+import asyncio
+import time
+from typing import AsyncIterator, Dict, List
+
+from solana.rpc.async_api import AsyncClient
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.common.direction import Direction
+from soldexpy.solana_tx_util.async_compute_unit_estimator import (
+    AsyncComputeUnitEstimator,
+)
+from soldexpy.solana_tx_util.async_swap_transaction_builder import (
+    AsyncSwapTransactionBuilder,
+)
+from soldexpy.solana_util.async_transaction_broadcaster import (
+    AsyncTransactionBroadcaster,
+)
+from soldexpy.solana_util.priority_fee_estimator import AsyncPriorityFeeEstimator
+from soldexpy.solana_util.signature_confirmer import SignatureConfirmer
+from soldexpy.swap_executor import SwapExecutor, SwapOrder, SwapOrderResult
+from soldexpy.token_account_registry import TokenAccountRegistry
+
+
+class AsyncSwapExecutor(SwapExecutor):
+    """
+    SwapExecutor built on AsyncClient. The sends are asyncio tasks (one per pool, the orders of a
+    pool in sequence as in SwapExecutor) and, with a SignatureConfirmer, the whole batch is
+    confirmed on its websocket.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        payer: Keypair,
+        max_concurrency: int = 8,
+        confirm_commitment: str = "confirmed",
+        confirm_tx_sleep_seconds: float = 1,
+        token_account_registry: TokenAccountRegistry = None,
+        address_lookup_tables: Dict[Pubkey, List[AddressLookupTableAccount]] = None,
+        compute_unit_estimator: AsyncComputeUnitEstimator = None,
+        priority_fee_estimator: AsyncPriorityFeeEstimator = None,
+        fee_percentile: int = None,
+        transaction_broadcaster: AsyncTransactionBroadcaster = None,
+        signature_confirmer: SignatureConfirmer = None,
+        min_remaining_blocks: int = 20,
+    ):
+        super().__init__(
+            client,
+            payer,
+            max_concurrency,
+            confirm_commitment,
+            confirm_tx_sleep_seconds,
+            token_account_registry,
+            address_lookup_tables,
+            compute_unit_estimator,
+            priority_fee_estimator,
+            fee_percentile,
+            transaction_broadcaster,
+            signature_confirmer,
+            min_remaining_blocks,
+        )
+
+    async def update_reserves(self, orders: List[SwapOrder]):
+        await AsyncRaydiumPool.update_many_pool_vaults_balance_async(
+            self.client, self.get_unique_pools(orders)
+        )
+
+    async def get_rent_lamports(self):
+        if self.rent_lamports is None:
+            self.rent_lamports = (
+                await async_client_wrapper.get_min_balance_rent_for_exempt_for_account(
+                    self.client
+                )
+            )
+        return self.rent_lamports
+
+    def make_builder(self, pool: AsyncRaydiumPool) -> AsyncSwapTransactionBuilder:
+        return AsyncSwapTransactionBuilder(
+            self.client,
+            pool,
+            self.payer,
+            token_account_registry=self.token_account_registry,
+            use_idempotent_create=True,
+            address_lookup_tables=self.address_lookup_tables.get(pool.amm_id),
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+
+    async def make_transaction(
+        self,
+        result: SwapOrderResult,
+        recent_blockhash: Hash,
+        last_valid_block_height: int,
+    ):
+        result.set_blockhash_expiry(last_valid_block_height)
+        builder = self.make_builder(result.order.pool)
+        if result.order.direction == Direction.SPEND_QUOTE_TOKEN:
+            await builder.append_buy(
+                result.amount_in,
+                result.amount_out,
+                rent_lamports=await self.get_rent_lamports(),
+            )
+        else:
+            await builder.append_sell(result.amount_in, result.amount_out)
+        return await builder.compile_versioned_transaction(
+            recent_blockhash, last_valid_block_height
+        )
+
+    async def build(self, results: List[SwapOrderResult]):
+        (
+            recent_blockhash,
+            last_valid_block_height,
+        ) = await async_client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        transactions = []
+        for result in results:
+            try:
+                transactions.append(
+                    await self.make_transaction(
+                        result, recent_blockhash, last_valid_block_height
+                    )
+                )
+            except Exception as e:
+                result.error = e
+                transactions.append(None)
+        return transactions
+
+    async def send_transaction(self, transaction):
+        if self.transaction_broadcaster is not None:
+            return await self.transaction_broadcaster.send_transaction_async(
+                transaction
+            )
+        return await async_client_wrapper.send_transaction(self.client, transaction)
+
+    async def rebuild(self, result: SwapOrderResult):
+        (
+            recent_blockhash,
+            last_valid_block_height,
+        ) = await async_client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        return await self.make_transaction(
+            result, recent_blockhash, last_valid_block_height
+        )
+
+    async def confirm(self, result: SwapOrderResult):
+        if self.signature_confirmer is not None:
+            pending = await self.signature_confirmer.watch(
+                result.signature, result.order.pool.vault_balance_slot
+            )
+            self.set_confirmed(result, pending)
+            return
+        resp = await async_client_wrapper.confirm_transaction(
+            self.client,
+            result.signature,
+            self.confirm_commitment,
+            self.confirm_tx_sleep_seconds,
+        )
+        self.set_confirmed(result, resp.value[0])
+
+    async def send_and_confirm(
+        self, result: SwapOrderResult, transaction, semaphore: asyncio.Semaphore
+    ):
+        async with semaphore:
+            try:
+                if self.is_blockhash_expired(result):
+                    transaction = await self.rebuild(result)
+                result.send_time = time.time()
+                result.signature = (await self.send_transaction(transaction)).value
+                await self.confirm(result)
+            except Exception as e:
+                result.error = e
+        return result
+
+    async def send_and_confirm_in_order(
+        self, group: List, done: asyncio.Queue, semaphore: asyncio.Semaphore
+    ):
+        for result, transaction in group:
+            await done.put(await self.send_and_confirm(result, transaction, semaphore))
+
+    async def execute(
+        self, orders: List[SwapOrder], update_reserves: bool = True
+    ) -> AsyncIterator[SwapOrderResult]:
+        self.start_time = time.time()
+        self.end_time = None
+        if update_reserves:
+            await self.update_reserves(orders)
+        self.results = self.quote(orders)
+        transactions = await self.build(self.results)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        groups = self.group_by_pool(self.results, transactions)
+        done = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self.send_and_confirm_in_order(group, done, semaphore))
+            for group in groups
+        ]
+        try:
+            # the orders that failed to build
+            for result, transaction in zip(self.results, transactions):
+                if transaction is None:
+                    yield result
+            for _ in range(sum(len(group) for group in groups)):
+                yield await done.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.end_time = time.time()
+
+    async def execute_all(
+        self, orders: List[SwapOrder], update_reserves: bool = True
+    ) -> List[SwapOrderResult]:
+        async for _ in self.execute(orders, update_reserves):
+            pass
+        return self.results
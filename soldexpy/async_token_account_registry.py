@@ -0,0 +1,31 @@
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.types import TokenAccountOpts
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.token_account_registry import TokenAccountRegistry
+
+
+class AsyncTokenAccountRegistry(TokenAccountRegistry):
+    """
+    TokenAccountRegistry built on AsyncClient, loaded by load_async().
+    """
+
+    def __init__(
+        self, client: AsyncClient, owner: Pubkey, program_id: Pubkey = TOKEN_PROGRAM_ID
+    ):
+        super().__init__(client, owner, program_id)
+
+    def load(self, commitment: Commitment = None):
+        raise Exception("use await load_async()")
+
+    async def load_async(self, commitment: Commitment = None):
+        resp = await async_client_wrapper.get_token_accounts_by_owner(
+            self.client,
+            self.owner,
+            TokenAccountOpts(program_id=self.program_id),
+            commitment,
+        )
+        self.set_token_accounts(resp)
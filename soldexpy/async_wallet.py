@@ -0,0 +1,39 @@
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+from solders.rpc.errors import InvalidParamsMessage
+from solders.token.associated import get_associated_token_address
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.wallet import Wallet
+
+
+class AsyncWallet(Wallet):
+    """
+    Wallet built on AsyncClient. The methods that do RPC are coroutines named *_async, the
+    synchronous ones raise since they can't run on an AsyncClient.
+    """
+
+    def __init__(self, client: AsyncClient, payer: Pubkey):
+        super().__init__(client, payer)
+
+    def get_balance(self, pool: RaydiumPool, commitment: str = "confirmed"):
+        raise Exception("use await get_balance_async()")
+
+    def get_sol_balance(self):
+        raise Exception("use await get_sol_balance_async()")
+
+    async def get_balance_async(self, pool: RaydiumPool, commitment: str = "confirmed"):
+        address = get_associated_token_address(self.payer, pool.get_mint_address())
+        balance_resp = await async_client_wrapper.get_token_account_balance(
+            self.client, address, commitment
+        )
+        if type(balance_resp) == InvalidParamsMessage:
+            return 0
+        return float(balance_resp.value.amount) / 10 ** int(
+            balance_resp.value.decimals
+        ), int(balance_resp.value.amount)
+
+    async def get_sol_balance_async(self):
+        balance_resp = await async_client_wrapper.get_balance(self.client, self.payer)
+        return balance_resp.value / 10**9
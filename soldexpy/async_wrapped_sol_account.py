@@ -0,0 +1,34 @@
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+
+
+class AsyncWrappedSolAccount(WrappedSolAccount):
+    """
+    WrappedSolAccount built on AsyncClient, loaded by load_async().
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        owner: Pubkey,
+        top_up_lamports: int = 0,
+        program_id: Pubkey = TOKEN_PROGRAM_ID,
+        pending_timeout_seconds: float = 90,
+    ):
+        super().__init__(
+            client, owner, top_up_lamports, program_id, pending_timeout_seconds
+        )
+
+    def load(self, commitment: Commitment = None):
+        raise Exception("use await load_async()")
+
+    async def load_async(self, commitment: Commitment = None):
+        resp = await async_client_wrapper.get_account_info(
+            self.client, self.address, commitment
+        )
+        self.set_account_info_resp(resp)
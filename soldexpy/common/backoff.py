@@ -0,0 +1,8 @@
+import random
+
+
+def get_backoff_seconds(
+    attempt: int, base_seconds: float = 0.5, max_seconds: float = 30
+) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(max_seconds, base_seconds * 2**attempt))
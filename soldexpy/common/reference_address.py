@@ -12,3 +12,8 @@ SOL_MINT_ADDRESS = Pubkey.from_string("So111111111111111111111111111111111111111
 RAYDIUM_LIQUIDITY_POOL_V4 = Pubkey.from_string(
     "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
 )
+
+# Address lookup table program
+ADDRESS_LOOKUP_TABLE_PROGRAM_ID = Pubkey.from_string(
+    "AddressLookupTab1e1111111111111111111111111"
+)
@@ -0,0 +1,27 @@
+import json
+import os
+
+
+def load_versioned_json(path: str, version: int) -> dict:
+    """
+    Returns the data saved by save_versioned_json, None if the file is missing, broken or
+    of another version (so it's safe to bump the version whenever the format changes).
+    """
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def save_versioned_json(path: str, version: int, data: dict):
+    # write to a temporary file first so a crash never leaves a broken file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, **data}, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,31 @@
+from construct import Struct
+
+from soldexpy.layout.utils import pad, publicKey, u8, u32, u64
+
+# the addresses of a lookup table start after the (fixed size) meta
+LOOKUP_TABLE_META_SIZE = 56
+
+# at most 256 addresses in a lookup table (indexes are u8)
+LOOKUP_TABLE_MAX_ADDRESSES = 256
+
+ADDRESS_LOOKUP_TABLE_META_LAYOUT = Struct(
+    u32("typeIndex"),
+    u64("deactivationSlot"),
+    u64("lastExtendedSlot"),
+    u8("lastExtendedSlotStartIndex"),
+    u8("authorityOption"),
+    publicKey("authority"),
+    pad("padding", 2),
+)
+
+CREATE_LOOKUP_TABLE_LAYOUT = Struct(
+    u32("instruction"),
+    u64("recentSlot"),
+    u8("bumpSeed"),
+)
+
+# followed by the new addresses
+EXTEND_LOOKUP_TABLE_LAYOUT = Struct(
+    u32("instruction"),
+    u64("addressCount"),
+)
@@ -1,6 +1,7 @@
 from construct import Struct
 
-from soldexpy.layout.utils import pad, publicKey, u8, u64, u128
+from soldexpy.layout.fast_decoder import FastDecoder
+from soldexpy.layout.utils import get_offset, pad, publicKey, u8, u64, u128
 
 ROUTE_DATA_LAYOUT = Struct(u8("instruction"), u64("amountIn"), u64("amountOut"))
 
@@ -58,3 +59,14 @@ LIQUIDITY_STATE_LAYOUT_V4 = Struct(
     u64("lpReserve"),
     pad("padding", 8 * 3),
 )
+
+LIQUIDITY_STATE_V4_SIZE = LIQUIDITY_STATE_LAYOUT_V4.sizeof()
+LIQUIDITY_STATE_V4_BASE_MINT_OFFSET = get_offset(LIQUIDITY_STATE_LAYOUT_V4, "baseMint")
+LIQUIDITY_STATE_V4_QUOTE_MINT_OFFSET = get_offset(
+    LIQUIDITY_STATE_LAYOUT_V4, "quoteMint"
+)
+# base_need_take_pnl is followed by quote_need_take_pnl
+LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET = get_offset(
+    LIQUIDITY_STATE_LAYOUT_V4, "baseNeedTakePnl"
+)
+LIQUIDITY_STATE_V4_DECODER = FastDecoder(LIQUIDITY_STATE_LAYOUT_V4)
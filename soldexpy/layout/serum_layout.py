@@ -1,5 +1,6 @@
 from construct import Struct
 
+from soldexpy.layout.fast_decoder import FastDecoder
 from soldexpy.layout.utils import WideBitsBuilder, blob, preprocess_key, publicKey, u64
 
 
@@ -39,3 +40,5 @@ MARKET_STATE_LAYOUT_V2 = Struct(
     u64("referrerRebatesAccrued"),
     blob("none", 7),
 )
+
+MARKET_STATE_V2_DECODER = FastDecoder(MARKET_STATE_LAYOUT_V2)
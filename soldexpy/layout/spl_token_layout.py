@@ -0,0 +1,36 @@
+from construct import Struct
+
+from soldexpy.layout.utils import publicKey, u8, u32, u64
+
+# size of SPL token account
+SPL_ACCOUNT_SIZE = 165
+
+# offset of the amount in SPL token account (after mint and owner)
+SPL_ACCOUNT_AMOUNT_OFFSET = 64
+
+# size of SPL token mint account
+SPL_MINT_SIZE = 82
+
+SPL_ACCOUNT_LAYOUT = Struct(
+    publicKey("mint"),
+    publicKey("owner"),
+    u64("amount"),
+    u32("delegateOption"),
+    publicKey("delegate"),
+    u8("state"),
+    u32("isNativeOption"),
+    u64("isNative"),
+    u64("delegatedAmount"),
+    u32("closeAuthorityOption"),
+    publicKey("closeAuthority"),
+)
+
+SPL_MINT_LAYOUT = Struct(
+    u32("mintAuthorityOption"),
+    publicKey("mintAuthority"),
+    u64("supply"),
+    u8("decimals"),
+    u8("isInitialized"),
+    u32("freezeAuthorityOption"),
+    publicKey("freezeAuthority"),
+)
@@ -1,12 +1,15 @@
 import re
 
+import base58
 from construct import (
     Bit,
     BitsSwapped,
     BitStruct,
     Bytes,
     BytesInteger,
+    Container,
     Int8ul,
+    Int32ul,
     Int64ul,
     Padding,
 )
@@ -26,6 +29,11 @@ def u8(key: str):
     return key / Int8ul
 
 
+def u32(key: str):
+    key = preprocess_key(key)
+    return key / Int32ul
+
+
 def u64(key: str):
     key = preprocess_key(key)
     return key / Int64ul
@@ -67,3 +75,47 @@ class WideBitsBuilder:
         return self.property_name / BitsSwapped(
             BitStruct(*self.fields + [Padding(self.len - len(self.fields))])
         )
+
+
+def get_offset(layout, key: str) -> int:
+    # byte offset of a field of a fixed size layout, e.g. for memcmp filters
+    key = preprocess_key(key)
+    offset = 0
+    for subcon in layout.subcons:
+        if subcon.name == key:
+            return offset
+        offset += subcon.sizeof()
+    raise Exception(f"{key} not found in layout")
+
+
+def container_to_dict(container: Container) -> dict:
+    """
+    Converts a parsed container into a JSON serializable dict (bytes are base58 encoded).
+    """
+    result = {}
+    for key, value in container.items():
+        if key.startswith("_"):
+            continue
+        if isinstance(value, dict):
+            result[key] = container_to_dict(value)
+        elif isinstance(value, bytes):
+            result[key] = base58.b58encode(value).decode()
+        else:
+            result[key] = value
+    return result
+
+
+def dict_to_container(data: dict) -> Container:
+    """
+    Reverse of container_to_dict. The layouts don't have any string field,
+    so every string is decoded back to bytes.
+    """
+    container = Container()
+    for key, value in data.items():
+        if isinstance(value, dict):
+            container[key] = dict_to_container(value)
+        elif isinstance(value, str):
+            container[key] = base58.b58decode(value)
+        else:
+            container[key] = value
+    return container
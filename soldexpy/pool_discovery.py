@@ -0,0 +1,227 @@
+import time
+from typing import Dict, List, Set, Tuple
+
+import base58
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+from solana.rpc.types import DataSliceOpts, MemcmpOpts
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.common.versioned_json_file import (
+    load_versioned_json,
+    save_versioned_json,
+)
+from soldexpy.layout.raydium_layout import (
+    LIQUIDITY_STATE_V4_BASE_MINT_OFFSET,
+    LIQUIDITY_STATE_V4_QUOTE_MINT_OFFSET,
+    LIQUIDITY_STATE_V4_SIZE,
+)
+
+# the base and quote mints are next to each other, so one slice returns both
+POOL_MINTS_LENGTH = (
+    LIQUIDITY_STATE_V4_QUOTE_MINT_OFFSET + 32 - LIQUIDITY_STATE_V4_BASE_MINT_OFFSET
+)
+POOL_MINTS_DATA_SLICE = DataSliceOpts(
+    offset=LIQUIDITY_STATE_V4_BASE_MINT_OFFSET, length=POOL_MINTS_LENGTH
+)
+
+
+def make_pool_filters(base_mint: Pubkey = None, quote_mint: Pubkey = None):
+    # the size of the pool state and the mints of the pool
+    filters = [LIQUIDITY_STATE_V4_SIZE]
+    if base_mint is not None:
+        filters.append(
+            MemcmpOpts(offset=LIQUIDITY_STATE_V4_BASE_MINT_OFFSET, bytes=str(base_mint))
+        )
+    if quote_mint is not None:
+        filters.append(
+            MemcmpOpts(
+                offset=LIQUIDITY_STATE_V4_QUOTE_MINT_OFFSET, bytes=str(quote_mint)
+            )
+        )
+    return filters
+
+
+def parse_pool_mints(resp) -> List[Tuple[str, str, str]]:
+    # [(pool address, base mint, quote mint)] of a getProgramAccounts response
+    # sliced by POOL_MINTS_DATA_SLICE
+    base_mint_end = (
+        LIQUIDITY_STATE_V4_QUOTE_MINT_OFFSET - LIQUIDITY_STATE_V4_BASE_MINT_OFFSET
+    )
+    pool_mints = []
+    for account in resp.value:
+        data = account.account.data
+        if len(data) < POOL_MINTS_LENGTH:
+            raise Exception("invalid pool account data")
+        pool_mints.append(
+            (
+                str(account.pubkey),
+                base58.b58encode(data[:base_mint_end]).decode(),
+                base58.b58encode(data[base_mint_end : base_mint_end + 32]).decode(),
+            )
+        )
+    return pool_mints
+
+
+class PoolDiscoveryIndex:
+    """
+    On-disk index of the Raydium V4 pools by mint, so a pool address can be found locally
+    from the token mint. The pools of a mint are discovered with two getProgramAccounts
+    (the mint as base, then as quote) filtered by the size of the pool state and a memcmp on
+    the mint, and only the mints are returned, not the whole pool state.
+    The index is refreshed per mint (refresh() only rescans the mints older than max_age_seconds),
+    and discover(SOL_MINT_ADDRESS) indexes every SOL pool at once.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str = None):
+        self.path = path
+        # pool address -> (base mint, quote mint)
+        self.pools: Dict[str, Tuple[str, str]] = {}
+        # mint -> time it was last discovered
+        self.discovered_time: Dict[str, float] = {}
+        # mint -> pool addresses
+        self.mint_pools: Dict[str, Set[str]] = {}
+        # sorted (mint, mint) -> pool addresses
+        self.pair_pools: Dict[Tuple[str, str], Set[str]] = {}
+        self.load()
+
+    def load(self):
+        self.pools = {}
+        self.discovered_time = {}
+        self.mint_pools = {}
+        self.pair_pools = {}
+        data = load_versioned_json(self.path, self.VERSION)
+        if data is None:
+            return
+        for pool_address, (base_mint, quote_mint) in data.get("pools", {}).items():
+            self.put(pool_address, base_mint, quote_mint)
+        self.discovered_time = data.get("discovered_time", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        save_versioned_json(
+            self.path,
+            self.VERSION,
+            {"pools": self.pools, "discovered_time": self.discovered_time},
+        )
+
+    def __len__(self):
+        return len(self.pools)
+
+    def __contains__(self, pool_address: str):
+        return pool_address in self.pools
+
+    def put(self, pool_address: str, base_mint: str, quote_mint: str):
+        self.remove(pool_address)
+        self.pools[pool_address] = (base_mint, quote_mint)
+        self.mint_pools.setdefault(base_mint, set()).add(pool_address)
+        self.mint_pools.setdefault(quote_mint, set()).add(pool_address)
+        pair = tuple(sorted((base_mint, quote_mint)))
+        self.pair_pools.setdefault(pair, set()).add(pool_address)
+
+    def remove(self, pool_address: str):
+        mints = self.pools.pop(pool_address, None)
+        if mints is None:
+            return
+        for mint in mints:
+            self.mint_pools[mint].discard(pool_address)
+        self.pair_pools[tuple(sorted(mints))].discard(pool_address)
+
+    def get_pool_addresses(self, mint: Pubkey) -> List[str]:
+        return list(self.mint_pools.get(str(mint), []))
+
+    def get_pair_pool_addresses(self, mint_a: Pubkey, mint_b: Pubkey) -> List[str]:
+        pair = tuple(sorted((str(mint_a), str(mint_b))))
+        return list(self.pair_pools.get(pair, []))
+
+    def get_mints(self, pool_address: str) -> Tuple[str, str]:
+        # (base mint, quote mint)
+        return self.pools.get(pool_address)
+
+    def is_discovered(self, mint: Pubkey, max_age_seconds: float = None) -> bool:
+        discovered_time = self.discovered_time.get(str(mint))
+        if discovered_time is None:
+            return False
+        return max_age_seconds is None or (
+            time.time() - discovered_time <= max_age_seconds
+        )
+
+    def scan(
+        self,
+        client: Client,
+        base_mint: Pubkey = None,
+        quote_mint: Pubkey = None,
+        commitment: Commitment = None,
+    ) -> List[Tuple[str, str, str]]:
+        # without any mint, this scans every pool of the program
+        resp = client_wrapper.get_program_accounts(
+            client,
+            RAYDIUM_LIQUIDITY_POOL_V4,
+            make_pool_filters(base_mint, quote_mint),
+            POOL_MINTS_DATA_SLICE,
+            commitment,
+        )
+        return parse_pool_mints(resp)
+
+    def set_mint_pools(self, mint: Pubkey, pool_mints: List[Tuple[str, str, str]]):
+        """
+        Replaces the pools of the mint with the scanned ones: new pools are added and the pools
+        that are not returned anymore (closed) are removed.
+        """
+        mint = str(mint)
+        pool_addresses = {pool_address for pool_address, _, _ in pool_mints}
+        for pool_address in self.get_pool_addresses(mint):
+            if pool_address not in pool_addresses:
+                self.remove(pool_address)
+        for pool_address, base_mint, quote_mint in pool_mints:
+            self.put(pool_address, base_mint, quote_mint)
+        self.discovered_time[mint] = time.time()
+
+    def discover(
+        self, client: Client, mint: Pubkey, commitment: Commitment = None, save=True
+    ) -> List[str]:
+        # the pool addresses of the mint
+        pool_mints = self.scan(client, base_mint=mint, commitment=commitment)
+        pool_mints += self.scan(client, quote_mint=mint, commitment=commitment)
+        self.set_mint_pools(mint, pool_mints)
+        if save:
+            self.save()
+        return self.get_pool_addresses(mint)
+
+    def lookup(
+        self,
+        client: Client,
+        mint: Pubkey,
+        max_age_seconds: float = None,
+        commitment: Commitment = None,
+    ) -> List[str]:
+        """
+        Returns the pool addresses of the mint from the index, and only discovers them when the
+        mint was never discovered or longer than max_age_seconds ago.
+        """
+        if not self.is_discovered(mint, max_age_seconds):
+            return self.discover(client, mint, commitment)
+        return self.get_pool_addresses(mint)
+
+    def get_stale_mints(self, max_age_seconds: float) -> List[str]:
+        return [
+            mint
+            for mint in self.discovered_time
+            if not self.is_discovered(mint, max_age_seconds)
+        ]
+
+    def refresh(
+        self, client: Client, max_age_seconds: float, commitment: Commitment = None
+    ) -> List[str]:
+        # rediscovers only the stale mints, returns them
+        mints = self.get_stale_mints(max_age_seconds)
+        for mint in mints:
+            self.discover(client, mint, commitment, save=False)
+        if len(mints) > 0:
+            self.save()
+        return mints
@@ -0,0 +1,86 @@
+from typing import List
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+
+from soldexpy.common.versioned_json_file import (
+    load_versioned_json,
+    save_versioned_json,
+)
+from soldexpy.raydium_pool import RaydiumPool
+
+
+class PoolMetadataStore:
+    """
+    On-disk store of the static pool metadata (RaydiumPool.to_snapshot()) keyed by pool address.
+    The file is ignored when the version doesn't match, so it's safe to bump the version
+    whenever the snapshot format changes.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.snapshots = {}
+        self.load()
+
+    def load(self):
+        data = load_versioned_json(self.path, self.VERSION)
+        self.snapshots = data.get("pools", {}) if data is not None else {}
+
+    def save(self):
+        save_versioned_json(self.path, self.VERSION, {"pools": self.snapshots})
+
+    def __contains__(self, pool_address: str):
+        return pool_address in self.snapshots
+
+    def get(self, pool_address: str):
+        return self.snapshots.get(pool_address)
+
+    def put(self, pool: RaydiumPool):
+        self.snapshots[pool.pool_address] = pool.to_snapshot()
+
+    def remove(self, pool_address: str):
+        self.snapshots.pop(pool_address, None)
+
+    def load_pools(
+        self,
+        client: Client,
+        pool_addresses: List[str] = None,
+        commitment: Commitment = None,
+        save: bool = True,
+    ) -> List[RaydiumPool]:
+        """
+        Returns the pools in the same order as pool_addresses (all stored pools if None).
+        Stored pools are restored without any static RPC and only their vault balances and
+        pnl are refreshed. Unknown pools are loaded with RaydiumPool.load_many and added to the store.
+        """
+        if pool_addresses is None:
+            pool_addresses = list(self.snapshots.keys())
+
+        pools = {}
+        for pool_address in pool_addresses:
+            snapshot = self.get(pool_address)
+            if snapshot is not None:
+                pools[pool_address] = RaydiumPool.from_snapshot(
+                    client, snapshot, update_vault_balance=False
+                )
+        RaydiumPool.update_many_pool_vaults_balance(
+            client, list(pools.values()), commitment
+        )
+
+        missing_pool_addresses = [
+            pool_address
+            for pool_address in dict.fromkeys(pool_addresses)
+            if pool_address not in pools
+        ]
+        if len(missing_pool_addresses) > 0:
+            for pool in RaydiumPool.load_many(
+                client, missing_pool_addresses, commitment
+            ):
+                pools[pool.pool_address] = pool
+                self.put(pool)
+            if save:
+                self.save()
+
+        return [pools[pool_address] for pool_address in pool_addresses]
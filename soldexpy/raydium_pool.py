@@ -1,29 +1,96 @@
+import warnings
+from typing import List
+
 import base58
+from construct import Container
 from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
 from solders.pubkey import Pubkey
 
+import soldexpy.solana.client_wrapper as client_wrapper
 from soldexpy.common.direction import Direction
 from soldexpy.common.reference_address import RAYDIUM_AMM_AUTHORITY, SOL_MINT_ADDRESS
 from soldexpy.common.unit import Unit
+from soldexpy.layout.raydium_layout import LIQUIDITY_STATE_V4_DECODER
+from soldexpy.layout.serum_layout import MARKET_STATE_V2_DECODER
+from soldexpy.layout.spl_token_layout import SPL_ACCOUNT_LAYOUT, SPL_MINT_LAYOUT
+from soldexpy.layout.utils import container_to_dict, dict_to_container
+from soldexpy.raydium_swap_math import get_amount_in, get_amount_out
+from soldexpy.solana_tx_util.swap_instruction_template import SwapInstructionTemplate
+from soldexpy.solana_util.multiple_accounts_info import (
+    MAX_MULTIPLE_ACCOUNTS,
+    get_multiple_accounts_info,
+)
 from soldexpy.solana_util.raydium_pool_info import (
     get_lp_token_address,
     get_mint_address,
+    get_need_take_pnl,
+    get_pool_amounts,
     get_pool_info,
-    get_pool_vaults_balance,
     get_pool_vaults_decimals,
+    get_token_account_amount,
     get_token_program_id,
 )
 from soldexpy.solana_util.serum_market_info import get_market_info, get_vault_signer
+from soldexpy.swap_size_solver import (
+    get_amount_in_for_amount_out,
+    get_max_amount_in_for_price,
+    get_max_amount_in_for_price_impact,
+    get_max_raw_amount_in_for_price,
+    get_max_raw_amount_in_for_price_impact,
+)
+from soldexpy.vectorized_price import get_prices
 
 
 class RaydiumPool:
     def __init__(self, client: Client, pool_address: str):
+        pool_info = get_pool_info(client, pool_address)
+        market_info = get_market_info(client, pool_info.market_id)
+        serum_vault_signer = get_vault_signer(client, market_info.base_vault)
+        base_mint_address = get_mint_address(client, pool_info.base_vault)
+        quote_mint_address = get_mint_address(client, pool_info.quote_vault)
+        base_decimals, quote_decimals = get_pool_vaults_decimals(
+            client, Pubkey(pool_info.base_vault), Pubkey(pool_info.quote_vault)
+        )
+        # token program of the non-SOL token
+        if base_mint_address == SOL_MINT_ADDRESS:
+            token_program_id = get_token_program_id(client, quote_mint_address)
+        else:
+            token_program_id = get_token_program_id(client, base_mint_address)
+
+        self._initialize(
+            client,
+            pool_address,
+            pool_info,
+            market_info,
+            serum_vault_signer,
+            base_mint_address,
+            quote_mint_address,
+            base_decimals,
+            quote_decimals,
+            token_program_id,
+        )
+        self.update_pool_vaults_balance()
+
+    def _initialize(
+        self,
+        client: Client,
+        pool_address: str,
+        pool_info: Container,
+        market_info: Container,
+        serum_vault_signer: Pubkey,
+        base_mint_address: Pubkey,
+        quote_mint_address: Pubkey,
+        base_decimals: int,
+        quote_decimals: int,
+        token_program_id: Pubkey,
+    ):
         self.client = client
         self.subscription = None
         self.price_changes_callbacks = []
         self.pool_address = pool_address
-        self.pool_info = get_pool_info(client, pool_address)
-        self.market_info = get_market_info(client, self.pool_info.market_id)
+        self.pool_info = pool_info
+        self.market_info = market_info
         self.amm_id = Pubkey(base58.b58decode(pool_address))
         self.amm_authority = RAYDIUM_AMM_AUTHORITY
         self.amm_open_orders = Pubkey(self.pool_info.open_orders)
@@ -37,16 +104,18 @@ class RaydiumPool:
         self.serum_event_queue = Pubkey(self.market_info.event_queue)
         self.serum_coin_vault_account = Pubkey(self.market_info.base_vault)
         self.serum_pc_vault_account = Pubkey(self.market_info.quote_vault)
-        self.serum_vault_signer = get_vault_signer(client, self.market_info.base_vault)
-        self.base_mint_address = get_mint_address(client, self.pool_info.base_vault)
-        self.quote_mint_address: Pubkey = get_mint_address(
-            client, self.pool_info.quote_vault
-        )
-        self.base_decimals, self.quote_decimals = get_pool_vaults_decimals(
-            client, self.pool_coin_token_account, self.pool_pc_token_account
-        )
-        self.token_program_id = get_token_program_id(client, self.base_mint_address)
+        self.serum_vault_signer = serum_vault_signer
+        self.base_mint_address = base_mint_address
+        self.quote_mint_address: Pubkey = quote_mint_address
+        self.base_decimals, self.quote_decimals = base_decimals, quote_decimals
+        self.token_program_id = token_program_id
         self.lp_token_address = get_lp_token_address(self.pool_info.market_id)
+        self.base_vault_amount = None
+        self.quote_vault_amount = None
+        self.base_vault_slot = None
+        self.quote_vault_slot = None
+        self.need_take_pnl_slot = None
+        self.swap_instruction_template = None
 
         if self.base_mint_address == SOL_MINT_ADDRESS:
             # reverse if base token is SOL
@@ -58,7 +127,6 @@ class RaydiumPool:
                 self.quote_decimals,
                 self.base_decimals,
             )
-            self.token_program_id = get_token_program_id(client, self.base_mint_address)
             self.pool_info.base_vault, self.pool_info.quote_vault = (
                 self.pool_info.quote_vault,
                 self.pool_info.base_vault,
@@ -69,7 +137,260 @@ class RaydiumPool:
         else:
             raise Exception("Unsupported quote token")
 
-        self.update_pool_vaults_balance()
+    @classmethod
+    def load_many(
+        cls,
+        client: Client,
+        pool_addresses: List[str],
+        commitment: Commitment = None,
+    ) -> List["RaydiumPool"]:
+        """
+        Loads many pools at once by using getMultipleAccounts (up to 100 keys per request).
+        The accounts are fetched in 3 stages (AMM -> market, vaults and mints -> serum vaults)
+        and decoded locally, so the number of RPCs doesn't depend on the number of pools.
+        """
+        amm_accounts = get_multiple_accounts_info(
+            client, cls._get_amm_keys(pool_addresses), commitment
+        )
+        pool_infos = cls._parse_amm_accounts(pool_addresses, amm_accounts)
+        keys = cls._get_market_and_vault_keys(pool_infos)
+        accounts = cls._parse_market_and_vault_accounts(
+            keys, get_multiple_accounts_info(client, keys, commitment)
+        )
+        market_infos = cls._parse_market_infos(pool_infos, accounts)
+        serum_vault_accounts = get_multiple_accounts_info(
+            client, cls._get_serum_vault_keys(market_infos), commitment
+        )
+        return cls._build_many(
+            client,
+            pool_addresses,
+            pool_infos,
+            market_infos,
+            accounts,
+            serum_vault_accounts,
+        )
+
+    # 1st stage: AMM accounts
+    @staticmethod
+    def _get_amm_keys(pool_addresses: List[str]):
+        return [Pubkey(base58.b58decode(address)) for address in pool_addresses]
+
+    @staticmethod
+    def _parse_amm_accounts(pool_addresses: List[str], amm_accounts: list):
+        pool_infos = []
+        for pool_address, amm_account in zip(pool_addresses, amm_accounts):
+            if amm_account is None:
+                raise Exception(f"pool account not found: {pool_address}")
+            pool_infos.append(LIQUIDITY_STATE_V4_DECODER.parse(amm_account.data))
+        return pool_infos
+
+    # 2nd stage: market, vault and mint accounts
+    @staticmethod
+    def _get_market_and_vault_keys(pool_infos: List[Container]):
+        keys = []
+        for pool_info in pool_infos:
+            keys += [
+                Pubkey(pool_info.market_id),
+                Pubkey(pool_info.base_vault),
+                Pubkey(pool_info.quote_vault),
+                Pubkey(pool_info.base_mint),
+                Pubkey(pool_info.quote_mint),
+            ]
+        return keys
+
+    @staticmethod
+    def _parse_market_and_vault_accounts(keys: List[Pubkey], accounts: list):
+        accounts = dict(zip(keys, accounts))
+        for key, account in accounts.items():
+            if account is None:
+                raise Exception(f"account not found: {key}")
+        return accounts
+
+    @staticmethod
+    def _parse_market_infos(pool_infos: List[Container], accounts: dict):
+        return [
+            MARKET_STATE_V2_DECODER.parse(accounts[Pubkey(pool_info.market_id)].data)
+            for pool_info in pool_infos
+        ]
+
+    # 3rd stage: serum base vaults (the owner is the vault signer)
+    @staticmethod
+    def _get_serum_vault_keys(market_infos: List[Container]):
+        return [Pubkey(market_info.base_vault) for market_info in market_infos]
+
+    @classmethod
+    def _build_many(
+        cls,
+        client: Client,
+        pool_addresses: List[str],
+        pool_infos: List[Container],
+        market_infos: List[Container],
+        accounts: dict,
+        serum_vault_accounts: list,
+    ):
+        pools = []
+        for pool_address, pool_info, market_info, serum_vault_account in zip(
+            pool_addresses, pool_infos, market_infos, serum_vault_accounts
+        ):
+            if serum_vault_account is None:
+                raise Exception(f"serum vault not found: {market_info.base_vault}")
+            base_vault = SPL_ACCOUNT_LAYOUT.parse(
+                accounts[Pubkey(pool_info.base_vault)].data
+            )
+            quote_vault = SPL_ACCOUNT_LAYOUT.parse(
+                accounts[Pubkey(pool_info.quote_vault)].data
+            )
+            base_mint_address = Pubkey(base_vault.mint)
+            quote_mint_address = Pubkey(quote_vault.mint)
+            base_mint = accounts[base_mint_address]
+            quote_mint = accounts[quote_mint_address]
+            if base_mint_address == SOL_MINT_ADDRESS:
+                token_program_id = quote_mint.owner
+            else:
+                token_program_id = base_mint.owner
+
+            # vault balances are already fetched with the vault accounts
+            amounts = {
+                bytes(pool_info.base_vault): base_vault.amount,
+                bytes(pool_info.quote_vault): quote_vault.amount,
+            }
+
+            pool = cls.__new__(cls)
+            pool._initialize(
+                client,
+                pool_address,
+                pool_info,
+                market_info,
+                Pubkey(SPL_ACCOUNT_LAYOUT.parse(serum_vault_account.data).owner),
+                base_mint_address,
+                quote_mint_address,
+                SPL_MINT_LAYOUT.parse(base_mint.data).decimals,
+                SPL_MINT_LAYOUT.parse(quote_mint.data).decimals,
+                token_program_id,
+            )
+            pool.set_pool_vaults_amount(
+                amounts[bytes(pool.pool_info.base_vault)],
+                amounts[bytes(pool.pool_info.quote_vault)],
+            )
+            pools.append(pool)
+        return pools
+
+    @classmethod
+    def from_snapshot(
+        cls, client: Client, snapshot: dict, update_vault_balance: bool = True
+    ) -> "RaydiumPool":
+        """
+        Restores the pool from to_snapshot() without any RPC for the static fields.
+        Only the vault balances and the pnl are fetched if update_vault_balance is True,
+        otherwise they are unknown until update_pool_vaults_balance() is called.
+        """
+        pool = cls.__new__(cls)
+        pool._initialize(
+            client,
+            snapshot["pool_address"],
+            dict_to_container(snapshot["pool_info"]),
+            dict_to_container(snapshot["market_info"]),
+            Pubkey.from_string(snapshot["serum_vault_signer"]),
+            Pubkey.from_string(snapshot["base_mint_address"]),
+            Pubkey.from_string(snapshot["quote_mint_address"]),
+            snapshot["base_decimals"],
+            snapshot["quote_decimals"],
+            Pubkey.from_string(snapshot["token_program_id"]),
+        )
+        # the pnl changes with the swaps, so it is never restored from the snapshot
+        pool.pool_info.base_need_take_pnl = None
+        pool.pool_info.quote_need_take_pnl = None
+        if update_vault_balance:
+            pool.update_pool_vaults_balance()
+        return pool
+
+    def to_snapshot(self) -> dict:
+        """
+        Returns the static fields of the pool as a JSON serializable dict.
+        The fields are stored as they are on-chain (before reversing SOL as the quote token),
+        so from_snapshot() can build the pool exactly as the constructor does.
+        """
+        pool_info = container_to_dict(self.pool_info)
+        del pool_info["base_need_take_pnl"], pool_info["quote_need_take_pnl"]
+        base_mint_address, quote_mint_address = (
+            self.base_mint_address,
+            self.quote_mint_address,
+        )
+        base_decimals, quote_decimals = self.base_decimals, self.quote_decimals
+        if self.pool_coin_token_account != Pubkey(self.pool_info.base_vault):
+            # base token is SOL on-chain
+            pool_info["base_vault"], pool_info["quote_vault"] = (
+                pool_info["quote_vault"],
+                pool_info["base_vault"],
+            )
+            base_mint_address, quote_mint_address = (
+                quote_mint_address,
+                base_mint_address,
+            )
+            base_decimals, quote_decimals = quote_decimals, base_decimals
+        return {
+            "pool_address": self.pool_address,
+            "pool_info": pool_info,
+            "market_info": container_to_dict(self.market_info),
+            "serum_vault_signer": str(self.serum_vault_signer),
+            "base_mint_address": str(base_mint_address),
+            "quote_mint_address": str(quote_mint_address),
+            "base_decimals": base_decimals,
+            "quote_decimals": quote_decimals,
+            "token_program_id": str(self.token_program_id),
+        }
+
+    @staticmethod
+    def update_many_pool_vaults_balance(
+        client: Client, pools: List["RaydiumPool"], commitment: Commitment = None
+    ):
+        """
+        Updates the vault balances and the pnl of many pools by using getMultipleAccounts.
+        The accounts of a pool are always in the same request, so they are from the same slot.
+        """
+        for chunk in RaydiumPool._chunk_pools_for_vaults(pools):
+            resp = client_wrapper.get_multiple_accounts(
+                client, RaydiumPool._get_vault_keys(chunk), commitment
+            )
+            RaydiumPool._set_many_pool_vaults_amount(chunk, resp)
+
+    @staticmethod
+    def _chunk_pools_for_vaults(pools: List["RaydiumPool"]):
+        pools_per_request = MAX_MULTIPLE_ACCOUNTS // 3
+        return [
+            pools[i : i + pools_per_request]
+            for i in range(0, len(pools), pools_per_request)
+        ]
+
+    @staticmethod
+    def _get_vault_keys(pools: List["RaydiumPool"]):
+        vaults = []
+        for pool in pools:
+            vaults += [
+                pool.amm_id,
+                Pubkey(pool.pool_info.base_vault),
+                Pubkey(pool.pool_info.quote_vault),
+            ]
+        return vaults
+
+    @staticmethod
+    def _set_many_pool_vaults_amount(pools: List["RaydiumPool"], resp):
+        for i, pool in enumerate(pools):
+            amm_account, base_vault_account, quote_vault_account = resp.value[
+                3 * i : 3 * i + 3
+            ]
+            if amm_account is None:
+                raise Exception(f"pool account not found: {pool.pool_address}")
+            if base_vault_account is None or quote_vault_account is None:
+                raise Exception(f"vault not found: {pool.pool_address}")
+            pool.set_need_take_pnl(
+                *get_need_take_pnl(amm_account.data), resp.context.slot
+            )
+            pool.set_pool_vaults_amount(
+                get_token_account_amount(base_vault_account.data),
+                get_token_account_amount(quote_vault_account.data),
+                resp.context.slot,
+            )
 
     def to_dict(self):
         return {
@@ -101,13 +422,120 @@ class RaydiumPool:
     def get_mint_address(self):
         return self.base_mint_address
 
-    def update_pool_vaults_balance(self, commitment: str = "confirmed"):
-        self.base_vault_balance, self.quote_vault_balance = get_pool_vaults_balance(
+    @property
+    def vault_balance_slot(self):
+        # both balances are at least as new as this slot
+        if self.base_vault_slot is None or self.quote_vault_slot is None:
+            return None
+        return min(self.base_vault_slot, self.quote_vault_slot)
+
+    def set_pool_vaults_amount(
+        self, base_amount: int, quote_amount: int, slot: int = None
+    ):
+        """
+        Sets the raw vault amounts. Returns False and keeps the current amounts
+        if the slot is older than the slot of the current amounts.
+        """
+        if slot is not None and (
+            (self.base_vault_slot is not None and slot < self.base_vault_slot)
+            or (self.quote_vault_slot is not None and slot < self.quote_vault_slot)
+        ):
+            return False
+        self.set_base_vault_amount(base_amount, slot)
+        self.set_quote_vault_amount(quote_amount, slot)
+        return True
+
+    def set_base_vault_amount(self, amount: int, slot: int = None):
+        if (
+            slot is not None
+            and self.base_vault_slot is not None
+            and slot < self.base_vault_slot
+        ):
+            return False
+        self.base_vault_amount = amount
+        self.base_vault_balance = amount / 10 ** (self.base_decimals)
+        if slot is not None:
+            self.base_vault_slot = slot
+        return True
+
+    def set_quote_vault_amount(self, amount: int, slot: int = None):
+        if (
+            slot is not None
+            and self.quote_vault_slot is not None
+            and slot < self.quote_vault_slot
+        ):
+            return False
+        self.quote_vault_amount = amount
+        self.quote_vault_balance = amount / 10 ** (self.quote_decimals)
+        if slot is not None:
+            self.quote_vault_slot = slot
+        return True
+
+    def update_vault_balance_from_account_data(
+        self, vault: Pubkey, data: bytes, slot: int = None
+    ):
+        """
+        Updates one side of the pool from the raw token account data of the vault
+        (e.g. the data of an account notification). No RPC is needed.
+        """
+        amount = get_token_account_amount(data)
+        if vault == self.get_base_vault():
+            return self.set_base_vault_amount(amount, slot)
+        elif vault == self.get_quote_vault():
+            return self.set_quote_vault_amount(amount, slot)
+        else:
+            raise Exception("Unknown vault")
+
+    def set_need_take_pnl(
+        self, base_need_take_pnl: int, quote_need_take_pnl: int, slot: int = None
+    ):
+        """
+        Sets the pnl not taken yet, in the on-chain (base, quote) order of the AMM account.
+        Returns False and keeps the current pnl if the slot is older.
+        """
+        if (
+            slot is not None
+            and self.need_take_pnl_slot is not None
+            and slot < self.need_take_pnl_slot
+        ):
+            return False
+        self.pool_info.base_need_take_pnl = base_need_take_pnl
+        self.pool_info.quote_need_take_pnl = quote_need_take_pnl
+        if slot is not None:
+            self.need_take_pnl_slot = slot
+        return True
+
+    def update_need_take_pnl_from_account_data(self, data: bytes, slot: int = None):
+        """
+        Updates the pnl from the raw AMM account data (e.g. the data of an account notification).
+        """
+        return self.set_need_take_pnl(*get_need_take_pnl(data), slot)
+
+    def get_base_vault(self):
+        return Pubkey(self.pool_info.base_vault)
+
+    def get_quote_vault(self):
+        return Pubkey(self.pool_info.quote_vault)
+
+    def update_pool_vaults_balance(
+        self, commitment: str = "confirmed", min_context_slot: int = None
+    ):
+        """
+        Reads both vaults and the pnl of the AMM account with a single getMultipleAccounts
+        so they are from the same slot.
+        Pass min_context_slot (e.g. vault_balance_slot) to make a lagging node fail
+        instead of returning older balances.
+        """
+        base_amount, quote_amount, need_take_pnl, slot = get_pool_amounts(
             self.client,
+            self.amm_id,
             Pubkey(self.pool_info.base_vault),
             Pubkey(self.pool_info.quote_vault),
             commitment,
+            min_context_slot,
         )
+        self.set_need_take_pnl(*need_take_pnl, slot)
+        return self.set_pool_vaults_amount(base_amount, quote_amount, slot)
 
     def get_price(
         self,
@@ -118,19 +546,26 @@ class RaydiumPool:
         commitment="confirmed",
     ):
         """
+        Deprecated: a float estimate on the vault balances, the amounts can differ from what
+        the program computes. Use get_amount_out / get_amount_in for the exact raw amounts
+        (e.g. the min amount out) and get_base_price for the pool price.
         Returns:
             [0]: estimated price based on in_amount (you can change the unit by return_price_unit)
             [1]: estimated price based on the pool balance
-            [2]: expected amount-out. you can use this amount for the min amount out along with your slippage allowance
+            [2]: expected amount-out
             [3]: expected amount-in that deducted the swap fee and the network fee
         """
+        warnings.warn(
+            "get_price is deprecated, use get_amount_out for the exact amount out",
+            DeprecationWarning,
+            stacklevel=2,
+        )
         if update_vault_balance:
             self.update_pool_vaults_balance(commitment)
         base_vault_balance = self.base_vault_balance
         quote_vault_balance = self.quote_vault_balance
 
-        # Swap fee: 0.25%
-        swap_fee = 0.25
+        swap_fee = self.get_swap_fee_percent()
         # Network fee: don't consider network fee for now since it's pratically small (@TODO: fix me)
         network_fee = 0.00
 
@@ -181,6 +616,204 @@ class RaydiumPool:
         else:
             raise Exception("Unsupported direction")
 
+    def get_prices(
+        self,
+        in_amounts,
+        direction: Direction,
+        return_price_unit: Unit = Unit.QUOTE_TOKEN,
+        update_vault_balance=False,
+        commitment="confirmed",
+    ):
+        """
+        Same as get_price, but quotes an array of amounts at once (e.g. a slippage ladder).
+        Returns NumPy arrays in the same order as get_price.
+        """
+        if update_vault_balance:
+            self.update_pool_vaults_balance(commitment)
+        return get_prices(
+            self.base_vault_balance,
+            self.quote_vault_balance,
+            in_amounts,
+            direction,
+            return_price_unit,
+            self.get_swap_fee_percent(),
+        )
+
+    def get_swap_instruction_template(self) -> SwapInstructionTemplate:
+        # built on first use, the accounts of the pool don't change
+        if self.swap_instruction_template is None:
+            self.swap_instruction_template = SwapInstructionTemplate(self)
+        return self.swap_instruction_template
+
+    def get_swap_fee_ratio(self):
+        """
+        Returns the (numerator, denominator) of the swap fee of the pool, e.g. (25, 10000).
+        """
+        return (
+            self.pool_info.swap_fee_numerator,
+            self.pool_info.swap_fee_denominator,
+        )
+
+    def get_swap_fee_percent(self) -> float:
+        # the swap fee of the float model of get_prices and the solvers, e.g. 0.25
+        fee_numerator, fee_denominator = self.get_swap_fee_ratio()
+        return fee_numerator * 100 / fee_denominator
+
+    def get_base_price(self, return_price_unit: Unit = Unit.QUOTE_TOKEN) -> float:
+        """
+        Returns the price based on the pool balance, the same as get_price()[1].
+        """
+        base_price = self.base_vault_balance / self.quote_vault_balance
+        if return_price_unit == Unit.BASE_TOKEN:
+            return base_price
+        elif return_price_unit == Unit.QUOTE_TOKEN:
+            return 1 / base_price
+        else:
+            raise Exception("Unsupported return price unit")
+
+    def get_reserves(self):
+        """
+        Returns the raw (base, quote) reserves used by the program: the vault amounts
+        minus the pnl that is not taken yet. The pnl is refreshed together with the vaults.
+        """
+        if self.pool_info.base_need_take_pnl is None:
+            raise Exception(
+                "the pnl is unknown, call update_pool_vaults_balance() first"
+            )
+        base_need_take_pnl = self.pool_info.base_need_take_pnl
+        quote_need_take_pnl = self.pool_info.quote_need_take_pnl
+        if self.pool_coin_token_account != Pubkey(self.pool_info.base_vault):
+            # base token is SOL on-chain
+            base_need_take_pnl, quote_need_take_pnl = (
+                quote_need_take_pnl,
+                base_need_take_pnl,
+            )
+        return (
+            self.base_vault_amount - base_need_take_pnl,
+            self.quote_vault_amount - quote_need_take_pnl,
+        )
+
+    def get_amount_out(self, amount_in: int, direction: Direction) -> int:
+        """
+        Returns the exact raw amount-out the program computes for the raw amount_in.
+        """
+        base_reserve, quote_reserve = self.get_reserves()
+        fee_numerator, fee_denominator = self.get_swap_fee_ratio()
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            return get_amount_out(
+                amount_in, quote_reserve, base_reserve, fee_numerator, fee_denominator
+            )
+        elif direction == Direction.SPEND_BASE_TOKEN:
+            return get_amount_out(
+                amount_in, base_reserve, quote_reserve, fee_numerator, fee_denominator
+            )
+        else:
+            raise Exception("Unsupported direction")
+
+    def get_amount_in(self, amount_out: int, direction: Direction) -> int:
+        """
+        Returns the exact raw amount-in the program requires for the raw amount_out.
+        """
+        base_reserve, quote_reserve = self.get_reserves()
+        fee_numerator, fee_denominator = self.get_swap_fee_ratio()
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            return get_amount_in(
+                amount_out, quote_reserve, base_reserve, fee_numerator, fee_denominator
+            )
+        elif direction == Direction.SPEND_BASE_TOKEN:
+            return get_amount_in(
+                amount_out, base_reserve, quote_reserve, fee_numerator, fee_denominator
+            )
+        else:
+            raise Exception("Unsupported direction")
+
+    def get_reserves_for_direction(self, direction: Direction):
+        """
+        Returns ((balance_in, balance_out), (raw_reserve_in, raw_reserve_out), (decimals_in, decimals_out)).
+        """
+        base_reserve, quote_reserve = self.get_reserves()
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            return (
+                (self.quote_vault_balance, self.base_vault_balance),
+                (quote_reserve, base_reserve),
+                (self.quote_decimals, self.base_decimals),
+            )
+        elif direction == Direction.SPEND_BASE_TOKEN:
+            return (
+                (self.base_vault_balance, self.quote_vault_balance),
+                (base_reserve, quote_reserve),
+                (self.base_decimals, self.quote_decimals),
+            )
+        else:
+            raise Exception("Unsupported direction")
+
+    def get_amount_in_for_amount_out(self, amount_out: float, direction: Direction):
+        """
+        Returns the amount-in needed to receive amount_out (exact-out quote):
+            [0]: amount-in on the get_price model
+            [1]: exact raw amount-in of the program
+        """
+        balances, reserves, decimals = self.get_reserves_for_direction(direction)
+        amount_in = get_amount_in_for_amount_out(
+            amount_out, balances[0], balances[1], self.get_swap_fee_percent() / 100
+        )
+        raw_amount_in = self.get_amount_in(
+            int(amount_out * 10 ** decimals[1]), direction
+        )
+        return amount_in, raw_amount_in
+
+    def get_max_amount_in_for_price_impact(
+        self, max_price_impact: float, direction: Direction
+    ):
+        """
+        Returns the largest amount-in whose price impact (as get_price reports it) is
+        at most max_price_impact, e.g. 0.02 for 2%:
+            [0]: amount-in on the get_price model
+            [1]: exact raw amount-in of the program
+        """
+        balances, reserves, _ = self.get_reserves_for_direction(direction)
+        fee_numerator, fee_denominator = self.get_swap_fee_ratio()
+        amount_in = get_max_amount_in_for_price_impact(
+            max_price_impact, balances[0], self.get_swap_fee_percent() / 100
+        )
+        raw_amount_in = get_max_raw_amount_in_for_price_impact(
+            max_price_impact, reserves[0], fee_numerator, fee_denominator
+        )
+        return amount_in, raw_amount_in
+
+    def get_max_amount_in_for_price(
+        self,
+        limit_price: float,
+        direction: Direction,
+        price_unit: Unit = Unit.QUOTE_TOKEN,
+    ):
+        """
+        Returns the largest amount-in that keeps the pool price after the swap at limit_price
+        or better (in price_unit, as get_price returns it):
+            [0]: amount-in on the get_price model
+            [1]: exact raw amount-in of the program
+        """
+        balances, reserves, decimals = self.get_reserves_for_direction(direction)
+        fee_numerator, fee_denominator = self.get_swap_fee_ratio()
+        # convert the limit to token-in per token-out
+        if (direction == Direction.SPEND_QUOTE_TOKEN) == (
+            price_unit == Unit.QUOTE_TOKEN
+        ):
+            max_price = limit_price
+        else:
+            max_price = 1 / limit_price
+        amount_in = get_max_amount_in_for_price(
+            max_price, balances[0], balances[1], self.get_swap_fee_percent() / 100
+        )
+        raw_amount_in = get_max_raw_amount_in_for_price(
+            max_price * 10 ** decimals[0] / 10 ** decimals[1],
+            reserves[0],
+            reserves[1],
+            fee_numerator,
+            fee_denominator,
+        )
+        return amount_in, raw_amount_in
+
     def convert_base_token_amount_to_tx_format(self, amount: float):
         return int(amount * 10 ** (self.base_decimals))
 
@@ -0,0 +1,55 @@
+"""
+Integer swap math of the Raydium AMM v4 program. All amounts are raw u64 amounts
+(before dividing by 10 ** decimals) and the rounding follows the program, so the
+results are exactly what the program computes for the same reserves.
+"""
+
+
+def ceil_div(numerator: int, denominator: int) -> int:
+    # CheckedCeilDiv of the program: a quotient of 0 is rounded half up instead of up
+    quotient = numerator // denominator
+    if quotient == 0:
+        return 1 if numerator * 2 >= denominator else 0
+    if numerator % denominator > 0:
+        quotient += 1
+    return quotient
+
+
+def get_swap_fee(amount_in: int, fee_numerator: int, fee_denominator: int) -> int:
+    return ceil_div(amount_in * fee_numerator, fee_denominator)
+
+
+def get_amount_out(
+    amount_in: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    """
+    Amount out of swap_base_in: the fee is deducted from amount_in (rounded up),
+    then the constant product amount out is rounded down.
+    """
+    amount_in_after_fee = amount_in - get_swap_fee(
+        amount_in, fee_numerator, fee_denominator
+    )
+    return reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee)
+
+
+def get_amount_in(
+    amount_out: int,
+    reserve_in: int,
+    reserve_out: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    """
+    Amount in of swap_base_out: the constant product amount in is rounded up,
+    then the fee is added on top of it (rounded up).
+    """
+    if amount_out >= reserve_out:
+        raise Exception("Insufficient liquidity")
+    amount_in_before_fee = ceil_div(reserve_in * amount_out, reserve_out - amount_out)
+    return ceil_div(
+        amount_in_before_fee * fee_denominator, fee_denominator - fee_numerator
+    )
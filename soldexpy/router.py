@@ -0,0 +1,280 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.pubkey import Pubkey
+
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.raydium_swap_math import get_amount_out
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+
+# edges find_route may scan backward from the target token to prune its search
+MAX_BACKWARD_EDGES = 1024
+
+
+class PoolEdge:
+    """
+    One direction of a pool in the route graph. The reserves and the fee are a snapshot of the
+    pool taken by update(), so a route search doesn't recompute them for every edge it tries.
+    """
+
+    def __init__(self, pool: RaydiumPool, direction: Direction):
+        self.pool = pool
+        self.direction = direction
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            self.token_in = pool.quote_mint_address
+            self.token_out = pool.base_mint_address
+        else:
+            self.token_in = pool.base_mint_address
+            self.token_out = pool.quote_mint_address
+        self.reserve_in = 0
+        self.reserve_out = 0
+        self.fee_numerator, self.fee_denominator = pool.get_swap_fee_ratio()
+        self.update()
+
+    def update(self):
+        if self.pool.base_vault_amount is None or self.pool.quote_vault_amount is None:
+            # no balances yet, the edge can't be used
+            self.reserve_in = self.reserve_out = 0
+            return
+        base_reserve, quote_reserve = self.pool.get_reserves()
+        if self.direction == Direction.SPEND_QUOTE_TOKEN:
+            self.reserve_in, self.reserve_out = quote_reserve, base_reserve
+        else:
+            self.reserve_in, self.reserve_out = base_reserve, quote_reserve
+
+    def get_amount_out(self, amount_in: int) -> int:
+        # the exact raw amount out the program computes
+        if self.reserve_in <= 0 or self.reserve_out <= 0:
+            return 0
+        return get_amount_out(
+            amount_in,
+            self.reserve_in,
+            self.reserve_out,
+            self.fee_numerator,
+            self.fee_denominator,
+        )
+
+    def __repr__(self):
+        return (
+            f"PoolEdge({self.pool.pool_address}, {self.token_in} -> {self.token_out})"
+        )
+
+
+class Route:
+    """
+    Swaps through edges in order. amounts[i] is the raw amount into edges[i] and amounts[-1]
+    the expected raw amount out of the route.
+    """
+
+    def __init__(self, edges: List[PoolEdge], amounts: List[int]):
+        self.edges = edges
+        self.amounts = amounts
+
+    @property
+    def amount_in(self):
+        return self.amounts[0]
+
+    @property
+    def amount_out(self):
+        return self.amounts[-1]
+
+    def get_tokens(self) -> List[Pubkey]:
+        return [self.edges[0].token_in] + [edge.token_out for edge in self.edges]
+
+    def get_min_amounts_out(self, slippage_allowance: float) -> List[int]:
+        """
+        Minimum amount out of every swap. A swap spends the minimum amount out of the previous
+        one, since that is all it is guaranteed to get.
+        """
+        min_amounts_out = []
+        amount_in = self.amount_in
+        for edge in self.edges:
+            amount_out = int(edge.get_amount_out(amount_in) * (1 - slippage_allowance))
+            min_amounts_out.append(amount_out)
+            amount_in = amount_out
+        return min_amounts_out
+
+    def __len__(self):
+        return len(self.edges)
+
+    def __repr__(self):
+        return f"Route({self.get_tokens()}, {self.amount_in} -> {self.amount_out})"
+
+
+class Router:
+    """
+    Finds the best route between two tokens over many pools, by the exact amount out of every
+    swap. The graph has one edge per pool and direction, between mints.
+    A reserve change only updates the two edges of its pool (update_pool), e.g. as the callback of
+    SubscriptionManager.add_pool; the graph is never rebuilt.
+    The search relaxes the best amount per token for max_hops rounds (a route uses a pool once),
+    and a round only tries the edges that can still reach the target token in the rounds left,
+    so a route through SOL doesn't try every SOL pool.
+    """
+
+    def __init__(self, pools: List[RaydiumPool] = None, max_hops: int = 3):
+        self.max_hops = max_hops
+        # token in -> edges out of it
+        self.edges_from: Dict[Pubkey, List[PoolEdge]] = {}
+        # token out -> edges into it
+        self.edges_to: Dict[Pubkey, List[PoolEdge]] = {}
+        # (token in, token out) -> edges between them
+        self.pair_edges: Dict[Tuple[Pubkey, Pubkey], List[PoolEdge]] = {}
+        # amm id -> both edges of the pool
+        self.pool_edges: Dict[Pubkey, List[PoolEdge]] = {}
+        for pool in pools or []:
+            self.add_pool(pool)
+
+    def __len__(self):
+        return len(self.pool_edges)
+
+    def __contains__(self, pool: RaydiumPool):
+        return pool.amm_id in self.pool_edges
+
+    def add_pool(self, pool: RaydiumPool):
+        if pool.amm_id in self.pool_edges:
+            self.update_pool(pool)
+            return
+        edges = [
+            PoolEdge(pool, Direction.SPEND_QUOTE_TOKEN),
+            PoolEdge(pool, Direction.SPEND_BASE_TOKEN),
+        ]
+        self.pool_edges[pool.amm_id] = edges
+        for edge in edges:
+            self.edges_from.setdefault(edge.token_in, []).append(edge)
+            self.edges_to.setdefault(edge.token_out, []).append(edge)
+            self.pair_edges.setdefault((edge.token_in, edge.token_out), []).append(edge)
+
+    def remove_pool(self, pool: RaydiumPool):
+        edges = self.pool_edges.pop(pool.amm_id, [])
+        for edge in edges:
+            self.edges_from[edge.token_in].remove(edge)
+            self.edges_to[edge.token_out].remove(edge)
+            self.pair_edges[(edge.token_in, edge.token_out)].remove(edge)
+
+    def update_pool(self, pool: RaydiumPool):
+        # after the reserves of the pool changed
+        for edge in self.pool_edges.get(pool.amm_id, []):
+            edge.update()
+
+    def find_route(
+        self,
+        token_in: Pubkey,
+        token_out: Pubkey,
+        amount_in: int,
+        max_hops: int = None,
+    ) -> Route:
+        """
+        Returns the route with the largest raw amount out for the raw amount_in,
+        or None if the tokens are not connected within max_hops swaps.
+        """
+        if max_hops is None:
+            max_hops = self.max_hops
+        reachable = self.get_reachable(token_in, token_out, max_hops - 1)
+        # token -> (amount, edges) of the best route found to it
+        best = {token_in: (amount_in, [])}
+        frontier = {token_in}
+        best_route = None
+        for hop in range(max_hops):
+            hops_left = max_hops - hop
+            # the routes of this round, before it improves them
+            frontier_routes = [(token, best[token]) for token in frontier]
+            next_frontier = set()
+            for token, (amount, edges) in frontier_routes:
+                used_pools = {id(edge.pool) for edge in edges}
+                if hops_left == 1:
+                    candidates = self.pair_edges.get((token, token_out), [])
+                elif reachable[hops_left - 1] is not None:
+                    # only the tokens that can still reach token_out
+                    candidates = self.get_edges_into(token, reachable[hops_left - 1])
+                else:
+                    candidates = self.edges_from.get(token, [])
+                for edge in candidates:
+                    if id(edge.pool) in used_pools or edge.token_out == token_in:
+                        continue
+                    amount_out = edge.get_amount_out(amount)
+                    if amount_out <= 0:
+                        continue
+                    if edge.token_out in best and amount_out <= best[edge.token_out][0]:
+                        continue
+                    best[edge.token_out] = (amount_out, edges + [edge])
+                    if edge.token_out == token_out:
+                        best_route = best[edge.token_out]
+                    else:
+                        next_frontier.add(edge.token_out)
+            if len(next_frontier) == 0:
+                break
+            frontier = next_frontier
+        if best_route is None:
+            return None
+        return self.make_route(amount_in, best_route[1])
+
+    def get_reachable(
+        self, token_in: Pubkey, token_out: Pubkey, hops: int
+    ) -> List[Optional[Set[Pubkey]]]:
+        """
+        reachable[n] is the set of tokens that reach token_out in at most n swaps without going
+        back through token_in, or None once walking back from token_out would scan more than
+        MAX_BACKWARD_EDGES edges (e.g. into SOL); the search then tries every edge of that hop.
+        """
+        reachable = [{token_out}]
+        budget = MAX_BACKWARD_EDGES
+        for _ in range(hops):
+            tokens = reachable[-1]
+            if tokens is None:
+                reachable.append(None)
+                continue
+            edges_to = [self.edges_to.get(token, []) for token in tokens]
+            budget -= sum(len(edges) for edges in edges_to)
+            if budget < 0:
+                reachable.append(None)
+                continue
+            tokens = tokens | {edge.token_in for edges in edges_to for edge in edges}
+            tokens.discard(token_in)
+            reachable.append(tokens)
+        return reachable
+
+    def get_edges_into(self, token: Pubkey, tokens_out: Set[Pubkey]) -> List[PoolEdge]:
+        edges = self.edges_from.get(token, [])
+        if len(edges) <= len(tokens_out):
+            return [edge for edge in edges if edge.token_out in tokens_out]
+        # e.g. out of SOL: a few pairs instead of every pool
+        return [
+            edge
+            for token_out in tokens_out
+            for edge in self.pair_edges.get((token, token_out), [])
+        ]
+
+    @staticmethod
+    def make_route(amount_in: int, edges: List[PoolEdge]) -> Route:
+        amounts = [amount_in]
+        for edge in edges:
+            amounts.append(edge.get_amount_out(amounts[-1]))
+        return Route(edges, amounts)
+
+    @staticmethod
+    def append_route(
+        builder: SwapTransactionBuilder,
+        route: Route,
+        slippage_allowance: float,
+        rent_lamports: int = None,
+        address_lookup_tables: Dict[Pubkey, List[AddressLookupTableAccount]] = None,
+    ):
+        """
+        Appends every swap of the route to the builder, so the route runs in one transaction.
+        Routes of more than one swap usually need the lookup tables of the pools (by amm id)
+        to fit in a transaction.
+        """
+        address_lookup_tables = address_lookup_tables or {}
+        amount_in = route.amount_in
+        for edge, amount_out in zip(
+            route.edges, route.get_min_amounts_out(slippage_allowance)
+        ):
+            builder.set_pool(edge.pool, address_lookup_tables.get(edge.pool.amm_id))
+            if edge.direction == Direction.SPEND_QUOTE_TOKEN:
+                builder.append_buy(amount_in, amount_out, rent_lamports=rent_lamports)
+            else:
+                builder.append_sell(amount_in, amount_out)
+            amount_in = amount_out
+        return builder
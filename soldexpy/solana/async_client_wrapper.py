@@ -0,0 +1,172 @@
+from typing import List, Union
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.core import _COMMITMENT_TO_SOLDERS
+from solana.rpc.types import DataSliceOpts, MemcmpOpts, TokenAccountOpts
+from solders.account_decoder import UiAccountEncoding
+from solders.pubkey import Pubkey
+from solders.rpc.config import RpcAccountInfoConfig
+from solders.rpc.requests import GetMultipleAccounts
+from solders.rpc.responses import GetMultipleAccountsResp
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+from spl.token.async_client import AsyncToken
+
+from soldexpy.solana.client_wrapper import (
+    GetRecentPrioritizationFees,
+    parse_recent_prioritization_fees,
+)
+
+
+async def get_token_account_balance(
+    client: AsyncClient, address: Pubkey, commitment: Commitment = None
+):
+    return await client.get_token_account_balance(address, commitment)
+
+
+async def get_balance(
+    client: AsyncClient, address: Pubkey, commitment: Commitment = None
+):
+    return await client.get_balance(address, commitment)
+
+
+async def get_account_info(
+    client: AsyncClient, address: Pubkey, commitment: Commitment = None
+):
+    return await client.get_account_info(address, commitment)
+
+
+async def get_multiple_accounts(
+    client: AsyncClient,
+    addresses: List[Pubkey],
+    commitment: Commitment = None,
+    min_context_slot: int = None,
+):
+    if min_context_slot is None:
+        return await client.get_multiple_accounts(addresses, commitment)
+    # AsyncClient.get_multiple_accounts doesn't support minContextSlot
+    config = RpcAccountInfoConfig(
+        encoding=UiAccountEncoding.Base64,
+        commitment=_COMMITMENT_TO_SOLDERS[commitment or client.commitment],
+        min_context_slot=min_context_slot,
+    )
+    return await client._provider.make_request(
+        GetMultipleAccounts(addresses, config), GetMultipleAccountsResp
+    )
+
+
+async def get_account_info_json_parsed(
+    client: AsyncClient, address: Pubkey, commitment: Commitment = None
+):
+    return await client.get_account_info_json_parsed(address, commitment)
+
+
+async def get_token_accounts_by_owner(
+    client: AsyncClient,
+    address: Pubkey,
+    opts: TokenAccountOpts,
+    commitment: Commitment = None,
+):
+    return await client.get_token_accounts_by_owner(address, opts, commitment)
+
+
+async def get_program_accounts(
+    client: AsyncClient,
+    program_id: Pubkey,
+    filters: List[Union[int, MemcmpOpts]],
+    data_slice: DataSliceOpts = None,
+    commitment: Commitment = None,
+):
+    return await client.get_program_accounts(
+        program_id, commitment, "base64", data_slice, filters
+    )
+
+
+async def get_latest_blockhash(client: AsyncClient):
+    if client.blockhash_cache:
+        try:
+            recent_blockhash = client.blockhash_cache.get()
+        except:
+            recent_blockhash = (
+                await client.get_latest_blockhash(client.commitment)
+            ).value.blockhash
+    else:
+        recent_blockhash = (
+            await client.get_latest_blockhash(client.commitment)
+        ).value.blockhash
+
+    return recent_blockhash
+
+
+async def get_min_balance_rent_for_exempt_for_account(client: AsyncClient):
+    return await AsyncToken.get_min_balance_rent_for_exempt_for_account(client)
+
+
+async def get_latest_blockhash_resp(client: AsyncClient, commitment: Commitment = None):
+    # the response also has the last valid block height of the blockhash
+    return await client.get_latest_blockhash(commitment or client.commitment)
+
+
+async def get_latest_blockhash_with_expiry(client: AsyncClient):
+    """
+    Returns (blockhash, last_valid_block_height). The height is None if the blockhash cache
+    of the client doesn't track it.
+    """
+    get_with_expiry = getattr(client.blockhash_cache, "get_with_expiry", None)
+    if get_with_expiry is not None:
+        try:
+            return get_with_expiry()
+        except:
+            pass
+    elif client.blockhash_cache:
+        try:
+            return client.blockhash_cache.get(), None
+        except:
+            pass
+    value = (await get_latest_blockhash_resp(client)).value
+    return value.blockhash, value.last_valid_block_height
+
+
+async def get_signature_statuses(client: AsyncClient, signatures: List[Signature]):
+    return await client.get_signature_statuses(signatures)
+
+
+async def get_slot(client: AsyncClient, commitment: Commitment = None):
+    return await client.get_slot(commitment or client.commitment)
+
+
+async def send_transaction(client: AsyncClient, transaction: VersionedTransaction):
+    return await client.send_transaction(transaction)
+
+
+async def confirm_transaction(
+    client: AsyncClient,
+    txn_signature: Signature,
+    commitment: Commitment,
+    sleep_seconds: float,
+):
+    return await client.confirm_transaction(txn_signature, commitment, sleep_seconds)
+
+
+async def simulate_transaction(
+    client: AsyncClient,
+    transaction: VersionedTransaction,
+    sig_verify: bool,
+    commitment: Commitment,
+):
+    return await client.simulate_transaction(transaction, sig_verify, commitment)
+
+
+async def get_recent_prioritization_fees(client: AsyncClient, addresses: List[Pubkey]):
+    return parse_recent_prioritization_fees(
+        await client._provider.make_request_unparsed(
+            GetRecentPrioritizationFees(addresses)
+        )
+    )
+
+
+async def get_token_supply(
+    client: AsyncClient, address: Pubkey, commitment: Commitment
+):
+    return await client.get_token_supply(address)
@@ -1,7 +1,15 @@
+import json
+from typing import List, Union
+
 from solana.rpc.api import Client
 from solana.rpc.commitment import Commitment
-from solana.rpc.types import TokenAccountOpts
+from solana.rpc.core import _COMMITMENT_TO_SOLDERS
+from solana.rpc.types import DataSliceOpts, MemcmpOpts, TokenAccountOpts
+from solders.account_decoder import UiAccountEncoding
 from solders.pubkey import Pubkey
+from solders.rpc.config import RpcAccountInfoConfig
+from solders.rpc.requests import GetMultipleAccounts
+from solders.rpc.responses import GetMultipleAccountsResp
 from solders.signature import Signature
 from solders.transaction import Transaction, VersionedTransaction
 
@@ -20,6 +28,25 @@ def get_account_info(client: Client, address: Pubkey, commitment: Commitment = N
     return client.get_account_info(address, commitment)
 
 
+def get_multiple_accounts(
+    client: Client,
+    addresses: List[Pubkey],
+    commitment: Commitment = None,
+    min_context_slot: int = None,
+):
+    if min_context_slot is None:
+        return client.get_multiple_accounts(addresses, commitment)
+    # Client.get_multiple_accounts doesn't support minContextSlot
+    config = RpcAccountInfoConfig(
+        encoding=UiAccountEncoding.Base64,
+        commitment=_COMMITMENT_TO_SOLDERS[commitment or client.commitment],
+        min_context_slot=min_context_slot,
+    )
+    return client._provider.make_request(
+        GetMultipleAccounts(addresses, config), GetMultipleAccountsResp
+    )
+
+
 def get_account_info_json_parsed(
     client: Client, address: Pubkey, commitment: Commitment = None
 ):
@@ -35,6 +62,18 @@ def get_token_accounts_by_owner(
     return client.get_token_accounts_by_owner(address, opts, commitment)
 
 
+def get_program_accounts(
+    client: Client,
+    program_id: Pubkey,
+    filters: List[Union[int, MemcmpOpts]],
+    data_slice: DataSliceOpts = None,
+    commitment: Commitment = None,
+):
+    return client.get_program_accounts(
+        program_id, commitment, "base64", data_slice, filters
+    )
+
+
 def get_latest_blockhash(client: Client):
     if client.blockhash_cache:
         try:
@@ -51,6 +90,39 @@ def get_latest_blockhash(client: Client):
     return recent_blockhash
 
 
+def get_latest_blockhash_resp(client: Client, commitment: Commitment = None):
+    # the response also has the last valid block height of the blockhash
+    return client.get_latest_blockhash(commitment or client.commitment)
+
+
+def get_latest_blockhash_with_expiry(client: Client):
+    """
+    Returns (blockhash, last_valid_block_height). The height is None if the blockhash cache
+    of the client doesn't track it.
+    """
+    get_with_expiry = getattr(client.blockhash_cache, "get_with_expiry", None)
+    if get_with_expiry is not None:
+        try:
+            return get_with_expiry()
+        except:
+            pass
+    elif client.blockhash_cache:
+        try:
+            return client.blockhash_cache.get(), None
+        except:
+            pass
+    value = (get_latest_blockhash_resp(client)).value
+    return value.blockhash, value.last_valid_block_height
+
+
+def get_signature_statuses(client: Client, signatures: List[Signature]):
+    return client.get_signature_statuses(signatures)
+
+
+def get_slot(client: Client, commitment: Commitment = None):
+    return client.get_slot(commitment or client.commitment)
+
+
 def send_transaction(client: Client, transaction: VersionedTransaction):
     return client.send_transaction(transaction)
 
@@ -73,5 +145,38 @@ def simulate_transaction(
     return client.simulate_transaction(transaction, sig_verify, commitment)
 
 
+class GetRecentPrioritizationFees:
+    """
+    getRecentPrioritizationFees request, which solders doesn't have; sent as raw JSON.
+    """
+
+    def __init__(self, addresses: List[Pubkey]):
+        self.addresses = addresses
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "id": 0,
+                "method": "getRecentPrioritizationFees",
+                "params": [[str(address) for address in self.addresses]],
+            }
+        )
+
+
+def parse_recent_prioritization_fees(raw: str):
+    # [(slot, micro-lamports per compute unit)]
+    resp = json.loads(raw)
+    if "error" in resp:
+        raise Exception(f"getRecentPrioritizationFees failed: {resp['error']}")
+    return [(fee["slot"], fee["prioritizationFee"]) for fee in resp["result"]]
+
+
+def get_recent_prioritization_fees(client: Client, addresses: List[Pubkey]):
+    return parse_recent_prioritization_fees(
+        client._provider.make_request_unparsed(GetRecentPrioritizationFees(addresses))
+    )
+
+
 def get_token_supply(client: Client, address: Pubkey, commitment: Commitment):
     return client.get_token_supply(address)
@@ -0,0 +1,201 @@
+from typing import Dict, List, Tuple
+
+import solders.system_program as sp
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment, Finalized
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.common.reference_address import ADDRESS_LOOKUP_TABLE_PROGRAM_ID
+from soldexpy.layout.address_lookup_table_layout import (
+    ADDRESS_LOOKUP_TABLE_META_LAYOUT,
+    CREATE_LOOKUP_TABLE_LAYOUT,
+    EXTEND_LOOKUP_TABLE_LAYOUT,
+    LOOKUP_TABLE_MAX_ADDRESSES,
+    LOOKUP_TABLE_META_SIZE,
+)
+from soldexpy.raydium_pool import RaydiumPool
+
+# instruction indexes of the address lookup table program
+CREATE_LOOKUP_TABLE = 0
+EXTEND_LOOKUP_TABLE = 2
+
+# deactivation slot of a table that is not deactivated
+LOOKUP_TABLE_ACTIVE = 2**64 - 1
+
+
+def decode_address_lookup_table(
+    address: Pubkey, data: bytes
+) -> AddressLookupTableAccount:
+    if len(data) < LOOKUP_TABLE_META_SIZE:
+        raise Exception(f"Invalid address lookup table {address}")
+    meta = ADDRESS_LOOKUP_TABLE_META_LAYOUT.parse(data)
+    if meta.deactivation_slot != LOOKUP_TABLE_ACTIVE:
+        raise Exception(f"Address lookup table {address} is deactivated")
+    addresses = [
+        Pubkey.from_bytes(data[offset : offset + 32])
+        for offset in range(LOOKUP_TABLE_META_SIZE, len(data) - 31, 32)
+    ]
+    return AddressLookupTableAccount(address, addresses)
+
+
+def get_pool_lookup_table_addresses(pool: RaydiumPool) -> List[Pubkey]:
+    """
+    The accounts of a swap on the pool that can be looked up: the AMM, serum and vault accounts
+    and the mints. Invoked programs have to stay in the message, so they are left out.
+    """
+    return [
+        pool.amm_id,
+        pool.amm_authority,
+        pool.amm_open_orders,
+        pool.amm_target_orders,
+        pool.pool_coin_token_account,
+        pool.pool_pc_token_account,
+        pool.market_program_id,
+        pool.serum_market,
+        pool.serum_bids,
+        pool.serum_asks,
+        pool.serum_event_queue,
+        pool.serum_coin_vault_account,
+        pool.serum_pc_vault_account,
+        pool.serum_vault_signer,
+        pool.base_mint_address,
+        pool.quote_mint_address,
+    ]
+
+
+def get_lookup_table_address(authority: Pubkey, recent_slot: int) -> Tuple[Pubkey, int]:
+    return Pubkey.find_program_address(
+        [bytes(authority), recent_slot.to_bytes(8, "little")],
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID,
+    )
+
+
+def create_lookup_table(
+    authority: Pubkey, payer: Pubkey, recent_slot: int
+) -> Tuple[Instruction, Pubkey]:
+    """
+    recent_slot has to be a recent slot (e.g. the finalized one), it is the seed of the address.
+    """
+    lookup_table, bump_seed = get_lookup_table_address(authority, recent_slot)
+    data = CREATE_LOOKUP_TABLE_LAYOUT.build(
+        dict(
+            instruction=CREATE_LOOKUP_TABLE,
+            recent_slot=recent_slot,
+            bump_seed=bump_seed,
+        )
+    )
+    accounts = [
+        AccountMeta(lookup_table, False, True),
+        AccountMeta(authority, True, False),
+        AccountMeta(payer, True, True),
+        AccountMeta(sp.ID, False, False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM_ID, data, accounts), lookup_table
+
+
+def extend_lookup_table(
+    lookup_table: Pubkey,
+    authority: Pubkey,
+    payer: Pubkey,
+    addresses: List[Pubkey],
+) -> Instruction:
+    data = EXTEND_LOOKUP_TABLE_LAYOUT.build(
+        dict(instruction=EXTEND_LOOKUP_TABLE, address_count=len(addresses))
+    ) + b"".join(bytes(address) for address in addresses)
+    accounts = [
+        AccountMeta(lookup_table, False, True),
+        AccountMeta(authority, True, False),
+        # the payer funds the rent of the new addresses
+        AccountMeta(payer, True, True),
+        AccountMeta(sp.ID, False, False),
+    ]
+    return Instruction(ADDRESS_LOOKUP_TABLE_PROGRAM_ID, data, accounts)
+
+
+def make_pool_lookup_table_instructions(
+    pool: RaydiumPool, authority: Pubkey, payer: Pubkey, recent_slot: int
+) -> Tuple[Pubkey, List[Instruction]]:
+    """
+    Returns the address of a new lookup table and the instructions that create it
+    and add the accounts of the pool, which fit in one transaction.
+    """
+    create_instruction, lookup_table = create_lookup_table(
+        authority, payer, recent_slot
+    )
+    extend_instruction = extend_lookup_table(
+        lookup_table, authority, payer, get_pool_lookup_table_addresses(pool)
+    )
+    return lookup_table, [create_instruction, extend_instruction]
+
+
+def make_pool_lookup_table_transaction(
+    pool: RaydiumPool, payer: Keypair, recent_slot: int, recent_blockhash
+) -> Tuple[Pubkey, VersionedTransaction]:
+    lookup_table, instructions = make_pool_lookup_table_instructions(
+        pool, payer.pubkey(), payer.pubkey(), recent_slot
+    )
+    message = MessageV0.try_compile(payer.pubkey(), instructions, [], recent_blockhash)
+    return lookup_table, VersionedTransaction(message, [payer])
+
+
+def create_pool_lookup_table(client: Client, pool: RaydiumPool, payer: Keypair):
+    """
+    Sends the transaction that creates the lookup table of the pool (owned by the payer).
+    Returns (lookup table address, send response). The table can be used from the next slot.
+    """
+    recent_slot = client_wrapper.get_slot(client, Finalized).value
+    lookup_table, transaction = make_pool_lookup_table_transaction(
+        pool, payer, recent_slot, client_wrapper.get_latest_blockhash(client)
+    )
+    return lookup_table, client_wrapper.send_transaction(client, transaction)
+
+
+class AddressLookupTableCache:
+    """
+    Decoded address lookup tables by address. A table only grows (addresses are appended),
+    so a cached table stays valid for the addresses it has; refresh() it after an extend.
+    """
+
+    def __init__(self, client: Client):
+        self.client = client
+        self.tables: Dict[Pubkey, AddressLookupTableAccount] = {}
+
+    def __len__(self):
+        return len(self.tables)
+
+    def __contains__(self, address: Pubkey):
+        return address in self.tables
+
+    def set_account_data(self, address: Pubkey, data: bytes):
+        table = decode_address_lookup_table(address, data)
+        if len(table.addresses) > LOOKUP_TABLE_MAX_ADDRESSES:
+            raise Exception(f"Invalid address lookup table {address}")
+        self.tables[address] = table
+        return table
+
+    def set_account_info_resp(self, address: Pubkey, resp):
+        if resp.value is None:
+            raise Exception(f"Address lookup table {address} not found")
+        return self.set_account_data(address, resp.value.data)
+
+    def refresh(self, address: Pubkey, commitment: Commitment = None):
+        resp = client_wrapper.get_account_info(self.client, address, commitment)
+        return self.set_account_info_resp(address, resp)
+
+    def get(self, address: Pubkey) -> AddressLookupTableAccount:
+        table = self.tables.get(address)
+        if table is None:
+            table = self.refresh(address)
+        return table
+
+    def get_many(self, addresses: List[Pubkey]) -> List[AddressLookupTableAccount]:
+        return [self.get(address) for address in addresses]
+
+    def remove(self, address: Pubkey):
+        self.tables.pop(address, None)
@@ -0,0 +1,18 @@
+from solders.instruction import Instruction
+from solders.pubkey import Pubkey
+from spl.token.instructions import create_associated_token_account
+
+# instruction index of CreateIdempotent in the associated token account program
+CREATE_IDEMPOTENT_ASSOCIATED_TOKEN_ACCOUNT = 1
+
+
+def create_idempotent_associated_token_account(
+    payer: Pubkey, owner: Pubkey, mint: Pubkey
+) -> Instruction:
+    # same accounts as create_associated_token_account, but it doesn't fail if the account exists
+    instruction = create_associated_token_account(payer, owner, mint)
+    return Instruction(
+        instruction.program_id,
+        bytes([CREATE_IDEMPOTENT_ASSOCIATED_TOKEN_ACCOUNT]),
+        instruction.accounts,
+    )
@@ -0,0 +1,51 @@
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Finalized
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.address_lookup_table import (
+    AddressLookupTableCache,
+    make_pool_lookup_table_transaction,
+)
+
+
+async def create_pool_lookup_table(
+    client: AsyncClient, pool: RaydiumPool, payer: Keypair
+):
+    recent_slot = (await async_client_wrapper.get_slot(client, Finalized)).value
+    lookup_table, transaction = make_pool_lookup_table_transaction(
+        pool,
+        payer,
+        recent_slot,
+        await async_client_wrapper.get_latest_blockhash(client),
+    )
+    return lookup_table, await async_client_wrapper.send_transaction(
+        client, transaction
+    )
+
+
+class AsyncAddressLookupTableCache(AddressLookupTableCache):
+    def __init__(self, client: AsyncClient):
+        super().__init__(client)
+
+    async def refresh(self, address: Pubkey, commitment: Commitment = None):
+        resp = await async_client_wrapper.get_account_info(
+            self.client, address, commitment
+        )
+        return self.set_account_info_resp(address, resp)
+
+    async def get(self, address: Pubkey) -> AddressLookupTableAccount:
+        table = self.tables.get(address)
+        if table is None:
+            table = await self.refresh(address)
+        return table
+
+    async def get_many(
+        self, addresses: List[Pubkey]
+    ) -> List[AddressLookupTableAccount]:
+        return [await self.get(address) for address in addresses]
@@ -0,0 +1,33 @@
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.solana_tx_util.compute_unit_estimator import ComputeUnitEstimator
+
+
+class AsyncComputeUnitEstimator(ComputeUnitEstimator):
+    def __init__(
+        self,
+        client: AsyncClient,
+        margin_ratio: float = 0.1,
+        min_margin_units: int = 2000,
+        refresh_seconds: float = 600,
+        commitment: Commitment = "processed",
+        failure_retry_seconds: float = 30,
+    ):
+        super().__init__(
+            client,
+            margin_ratio,
+            min_margin_units,
+            refresh_seconds,
+            commitment,
+            failure_retry_seconds,
+        )
+
+    async def simulate(self, transaction: VersionedTransaction):
+        return self.get_units_consumed(
+            await async_client_wrapper.simulate_transaction(
+                self.client, transaction, False, self.commitment
+            )
+        )
@@ -0,0 +1,171 @@
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TokenAccountOpts
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from spl.token.instructions import create_associated_token_account
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.compute_unit_estimator import ComputeUnitEstimator
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.priority_fee_estimator import PriorityFeeEstimator
+from soldexpy.token_account_registry import TokenAccountRegistry
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+
+
+class AsyncSwapTransactionBuilder(SwapTransactionBuilder):
+    """
+    SwapTransactionBuilder built on AsyncClient. The methods that need RPC are coroutines.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        pool: RaydiumPool,
+        payer: Keypair,
+        unit_price: int = 25000,
+        unit_budget: int = 600000,
+        token_account_registry: TokenAccountRegistry = None,
+        use_idempotent_create: bool = False,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+        wrapped_sol_account: WrappedSolAccount = None,
+        compute_unit_estimator: ComputeUnitEstimator = None,
+        priority_fee_estimator: PriorityFeeEstimator = None,
+        fee_percentile: int = None,
+    ):
+        super().__init__(
+            client,
+            pool,
+            payer,
+            unit_price,
+            unit_budget,
+            token_account_registry,
+            use_idempotent_create,
+            address_lookup_tables,
+            wrapped_sol_account,
+            compute_unit_estimator,
+            priority_fee_estimator,
+            fee_percentile,
+        )
+
+    async def append_sell(self, amount_in: int, amount_out: int):
+        self.start_leg(Direction.SPEND_BASE_TOKEN)
+        if self.wrapped_sol_account is not None:
+            if not self.wrapped_sol_account.loaded:
+                await self.wrapped_sol_account.load_async()
+            self.append_sell_to_wrapped_sol_account(amount_in, amount_out)
+            return
+        # compute budget
+        self.append_set_compute_budget(self.unit_price, self.unit_budget)
+        # pay target token (TOKEN)
+        source = get_associated_token_address(self.payer.pubkey(), self.mint)
+        # get quote token (SOL)
+        dest = get_associated_token_address(self.payer.pubkey(), self.quoteMint)
+        # this would opens the destination token account
+        self.append_create_associated_token_account(self.quoteMint)
+        # swap
+        await self.append_swap(amount_in, source, dest, amount_out)
+        # close the account
+        self.append_close_account(dest)
+
+    async def append_buy(
+        self,
+        amount_in: int,
+        amount_out: int,
+        check_associated_token_account_exists=True,
+        rent_lamports: int = None,
+    ):
+        self.start_leg(Direction.SPEND_QUOTE_TOKEN)
+        if self.wrapped_sol_account is not None:
+            if not self.wrapped_sol_account.loaded:
+                await self.wrapped_sol_account.load_async()
+            self.append_set_compute_budget(self.unit_price, self.unit_budget)
+            source = self.append_wrapped_sol_top_up(amount_in)
+            if check_associated_token_account_exists:
+                await self.append_if_not_exists_create_associated_token_account(
+                    self.mint
+                )
+            dest = get_associated_token_address(self.payer.pubkey(), self.mint)
+            await self.append_swap(amount_in, source, dest, amount_out)
+            return
+        # lamports to pay for rent + transfer (rent_lamports saves the RPC)
+        pay_for_rent = rent_lamports
+        if pay_for_rent is None:
+            pay_for_rent = (
+                await async_client_wrapper.get_min_balance_rent_for_exempt_for_account(
+                    self.client
+                )
+            )
+        lamports = pay_for_rent + amount_in
+        # compute budget
+        self.append_set_compute_budget(self.unit_price, self.unit_budget)
+        # create account with seed
+        source = self.append_create_account_with_seed(lamports)
+        # initialize account
+        self.append_initialize_account(source)
+        # open destination account if not exists
+        if check_associated_token_account_exists:
+            await self.append_if_not_exists_create_associated_token_account(self.mint)
+        # swap
+        dest = get_associated_token_address(self.payer.pubkey(), self.mint)
+        await self.append_swap(amount_in, source, dest, amount_out)
+        # close the account
+        self.append_close_account(source)
+
+    async def compile_versioned_transaction(
+        self, recent_blockhash: Hash = None, last_valid_block_height: int = None
+    ):
+        if recent_blockhash is None:
+            (
+                recent_blockhash,
+                last_valid_block_height,
+            ) = await async_client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        self.last_valid_block_height = last_valid_block_height
+
+        key, units = self.get_cached_compute_units()
+        if (
+            key is not None
+            and units is None
+            and self.compute_unit_estimator.should_simulate(key)
+        ):
+            units = await self.compute_unit_estimator.simulate(
+                self.make_versioned_transaction(recent_blockhash)
+            )
+            self.set_compute_units(key, units)
+        self.set_compute_unit_limit_from_units(units)
+        return self.set_wrapped_sol_signature(
+            self.make_versioned_transaction(recent_blockhash)
+        )
+
+    async def append_swap(
+        self, amount_in: int, source: Pubkey, dest: Pubkey, amount_out: int
+    ):
+        # no RPC anymore, kept as a coroutine for compatibility
+        super().append_swap(amount_in, source, dest, amount_out)
+
+    async def append_if_not_exists_create_associated_token_account(self, mint: Pubkey):
+        if self.append_create_associated_token_account_without_rpc(mint):
+            return
+
+        arr = (
+            await async_client_wrapper.get_token_accounts_by_owner(
+                self.client, self.payer.pubkey(), TokenAccountOpts(mint)
+            )
+        ).value
+
+        if len(arr) > 0:
+            return
+
+        # this would opens the destination token account
+        # in case the user does not have a token account for the token they want to swap
+        self.instructions.append(
+            create_associated_token_account(
+                self.payer.pubkey(), self.payer.pubkey(), mint
+            )
+        )
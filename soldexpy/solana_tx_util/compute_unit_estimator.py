@@ -0,0 +1,135 @@
+import time
+from typing import Dict, List, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID
+from solders.instruction import Instruction
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.client_wrapper as client_wrapper
+
+# instruction index of SetComputeUnitLimit in the compute budget program
+SET_COMPUTE_UNIT_LIMIT = 2
+
+# instruction index of SetComputeUnitPrice
+SET_COMPUTE_UNIT_PRICE = 3
+
+# the most compute units a transaction can request
+MAX_COMPUTE_UNIT_LIMIT = 1400000
+
+
+def get_instruction_shape(instructions: List[Instruction]) -> Tuple:
+    """
+    (program, instruction index, number of accounts) of every instruction but the compute budget
+    ones, e.g. a buy that creates the destination account differs from one that doesn't.
+    """
+    return tuple(
+        (instruction.program_id, bytes(instruction.data[:1]), len(instruction.accounts))
+        for instruction in instructions
+        if instruction.program_id != COMPUTE_BUDGET_PROGRAM_ID
+    )
+
+
+def is_set_compute_unit_limit(instruction: Instruction):
+    return instruction.program_id == COMPUTE_BUDGET_PROGRAM_ID and bytes(
+        instruction.data[:1]
+    ) == bytes([SET_COMPUTE_UNIT_LIMIT])
+
+
+def is_set_compute_unit_price(instruction: Instruction):
+    return instruction.program_id == COMPUTE_BUDGET_PROGRAM_ID and bytes(
+        instruction.data[:1]
+    ) == bytes([SET_COMPUTE_UNIT_PRICE])
+
+
+class ComputeUnitEstimator:
+    """
+    Compute units consumed per (pool, direction, instruction shape), measured by one simulation
+    and reused until refresh_seconds old. The unit limit is the cached units plus margin_ratio
+    (and at least min_margin_units), instead of a fixed budget for every swap.
+    A failed simulation is cached as None for failure_retry_seconds, so the swaps meanwhile keep
+    the unit budget of the builder instead of simulating again each time.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        margin_ratio: float = 0.1,
+        min_margin_units: int = 2000,
+        refresh_seconds: float = 600,
+        commitment: Commitment = "processed",
+        failure_retry_seconds: float = 30,
+    ):
+        self.client = client
+        self.margin_ratio = margin_ratio
+        self.min_margin_units = min_margin_units
+        self.refresh_seconds = refresh_seconds
+        self.failure_retry_seconds = failure_retry_seconds
+        self.commitment = commitment
+        # key -> (units consumed or None if the simulation failed, simulation time)
+        self.units: Dict[Tuple, Tuple[int, float]] = {}
+        self.hit_count = 0
+        self.miss_count = 0
+        self.simulation_count = 0
+
+    def __len__(self):
+        return len(self.units)
+
+    def make_key(self, pool, direction, instructions: List[Instruction]) -> Tuple:
+        return self.make_legs_key([(pool.amm_id, direction)], instructions)
+
+    def make_legs_key(
+        self, legs: List[Tuple], instructions: List[Instruction]
+    ) -> Tuple:
+        # legs: (amm id, direction) of every swap of the transaction
+        return tuple(legs), get_instruction_shape(instructions)
+
+    def is_expired(self, cached: Tuple) -> bool:
+        units, simulation_time = cached
+        max_age = (
+            self.refresh_seconds if units is not None else self.failure_retry_seconds
+        )
+        return time.time() - simulation_time > max_age
+
+    def should_simulate(self, key: Tuple) -> bool:
+        cached = self.units.get(key)
+        return cached is None or self.is_expired(cached)
+
+    def get_cached_units(self, key: Tuple):
+        # None on a miss and while a failed simulation is cached
+        cached = self.units.get(key)
+        if cached is None or self.is_expired(cached):
+            self.miss_count += 1
+            return None
+        self.hit_count += 1
+        return cached[0]
+
+    def set_units(self, key: Tuple, units: int):
+        # units is None if the simulation failed
+        self.units[key] = (units, time.time())
+
+    def get_hit_rate(self):
+        count = self.hit_count + self.miss_count
+        if count == 0:
+            return 0
+        return self.hit_count / count
+
+    def get_unit_limit(self, units: int) -> int:
+        margin = max(int(units * self.margin_ratio), self.min_margin_units)
+        return min(units + margin, MAX_COMPUTE_UNIT_LIMIT)
+
+    def get_units_consumed(self, resp):
+        # None if the simulation failed, its units don't tell the cost of a successful swap
+        self.simulation_count += 1
+        if resp.value.err is not None or resp.value.units_consumed is None:
+            print(f"compute unit simulation failed: {resp.value.err}")
+            return None
+        return resp.value.units_consumed
+
+    def simulate(self, transaction: VersionedTransaction):
+        return self.get_units_consumed(
+            client_wrapper.simulate_transaction(
+                self.client, transaction, False, self.commitment
+            )
+        )
@@ -1,12 +1,10 @@
 from solana.rpc.api import Client
-from solana.transaction import AccountMeta
 from solders.instruction import Instruction
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 
-from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
-from soldexpy.layout.raydium_layout import ROUTE_DATA_LAYOUT
 from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_instruction_template import SwapInstructionTemplate
 
 
 def make_swap_instruction(
@@ -18,59 +16,13 @@ def make_swap_instruction(
     ctx: Client,
     owner: Keypair,
     amount_out: int,
+    token_program_id: Pubkey = None,
 ) -> Instruction:
-    # TODO: check if this is the correct way to get the token program id
-    accountProgramId = ctx.get_account_info_json_parsed(mint)
-    TOKEN_PROGRAM_ID = accountProgramId.value.owner
-
-    keys = [
-        # Token Program
-        AccountMeta(pubkey=TOKEN_PROGRAM_ID, is_signer=False, is_writable=False),
-        # AmmId
-        AccountMeta(pubkey=pool.amm_id, is_signer=False, is_writable=True),
-        # AmmAuthority
-        AccountMeta(pubkey=pool.amm_authority, is_signer=False, is_writable=False),
-        # AmmOpenOrders
-        AccountMeta(pubkey=pool.amm_open_orders, is_signer=False, is_writable=True),
-        # AmmTargetOrders
-        AccountMeta(pubkey=pool.amm_target_orders, is_signer=False, is_writable=True),
-        # PoolCoinTokenAccount
-        AccountMeta(
-            pubkey=pool.pool_coin_token_account, is_signer=False, is_writable=True
-        ),
-        # PoolPcTokenAccount
-        AccountMeta(
-            pubkey=pool.pool_pc_token_account, is_signer=False, is_writable=True
-        ),
-        # SerumProgramId
-        AccountMeta(pubkey=pool.market_program_id, is_signer=False, is_writable=False),
-        # SerumMakret
-        AccountMeta(pubkey=pool.serum_market, is_signer=False, is_writable=True),
-        # SerumBids
-        AccountMeta(pubkey=pool.serum_bids, is_signer=False, is_writable=True),
-        # SerumAsks
-        AccountMeta(pubkey=pool.serum_asks, is_signer=False, is_writable=True),
-        # SerumEventQueue
-        AccountMeta(pubkey=pool.serum_event_queue, is_signer=False, is_writable=True),
-        # SerumCoinVaultAccount
-        AccountMeta(
-            pubkey=pool.serum_coin_vault_account, is_signer=False, is_writable=True
-        ),
-        # SerumPcVaultAccount
-        AccountMeta(
-            pubkey=pool.serum_pc_vault_account, is_signer=False, is_writable=True
-        ),
-        # SerumVaultSigner
-        AccountMeta(pubkey=pool.serum_vault_signer, is_signer=False, is_writable=False),
-        # UserSourceTokenAccount
-        AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),
-        # UserDestTokenAccount
-        AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True),
-        # UserOwner
-        AccountMeta(pubkey=owner.pubkey(), is_signer=True, is_writable=False),
-    ]
-
-    data = ROUTE_DATA_LAYOUT.build(
-        dict(instruction=9, amount_in=int(amount_in), amount_out=int(amount_out))
+    # the token program of the pool is known, so no RPC is needed (mint and ctx are kept for compatibility)
+    if token_program_id is None or token_program_id == pool.token_program_id:
+        template = pool.get_swap_instruction_template()
+    else:
+        template = SwapInstructionTemplate(pool, token_program_id)
+    return template.build(
+        amount_in, token_account_in, token_account_out, owner.pubkey(), amount_out
     )
-    return Instruction(RAYDIUM_LIQUIDITY_POOL_V4, data, keys)
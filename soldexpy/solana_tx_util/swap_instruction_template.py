@@ -0,0 +1,91 @@
+import struct
+
+from solders.instruction import AccountMeta, Instruction
+from solders.pubkey import Pubkey
+
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+
+# same bytes as ROUTE_DATA_LAYOUT: instruction (u8), amount_in (u64), amount_out (u64)
+SWAP_INSTRUCTION_DATA = struct.Struct("<BQQ")
+SWAP_INSTRUCTION = 9
+
+
+class SwapInstructionTemplate:
+    """
+    The part of the swap instruction that only depends on the pool, built once per pool.
+    build() packs the amounts and appends the user's accounts, so it needs no RPC.
+    """
+
+    def __init__(self, pool, token_program_id: Pubkey = None):
+        if token_program_id is None:
+            token_program_id = pool.token_program_id
+        self.token_program_id = token_program_id
+        self.pool_keys = [
+            # Token Program
+            AccountMeta(pubkey=token_program_id, is_signer=False, is_writable=False),
+            # AmmId
+            AccountMeta(pubkey=pool.amm_id, is_signer=False, is_writable=True),
+            # AmmAuthority
+            AccountMeta(pubkey=pool.amm_authority, is_signer=False, is_writable=False),
+            # AmmOpenOrders
+            AccountMeta(pubkey=pool.amm_open_orders, is_signer=False, is_writable=True),
+            # AmmTargetOrders
+            AccountMeta(
+                pubkey=pool.amm_target_orders, is_signer=False, is_writable=True
+            ),
+            # PoolCoinTokenAccount
+            AccountMeta(
+                pubkey=pool.pool_coin_token_account, is_signer=False, is_writable=True
+            ),
+            # PoolPcTokenAccount
+            AccountMeta(
+                pubkey=pool.pool_pc_token_account, is_signer=False, is_writable=True
+            ),
+            # SerumProgramId
+            AccountMeta(
+                pubkey=pool.market_program_id, is_signer=False, is_writable=False
+            ),
+            # SerumMakret
+            AccountMeta(pubkey=pool.serum_market, is_signer=False, is_writable=True),
+            # SerumBids
+            AccountMeta(pubkey=pool.serum_bids, is_signer=False, is_writable=True),
+            # SerumAsks
+            AccountMeta(pubkey=pool.serum_asks, is_signer=False, is_writable=True),
+            # SerumEventQueue
+            AccountMeta(
+                pubkey=pool.serum_event_queue, is_signer=False, is_writable=True
+            ),
+            # SerumCoinVaultAccount
+            AccountMeta(
+                pubkey=pool.serum_coin_vault_account, is_signer=False, is_writable=True
+            ),
+            # SerumPcVaultAccount
+            AccountMeta(
+                pubkey=pool.serum_pc_vault_account, is_signer=False, is_writable=True
+            ),
+            # SerumVaultSigner
+            AccountMeta(
+                pubkey=pool.serum_vault_signer, is_signer=False, is_writable=False
+            ),
+        ]
+
+    def build(
+        self,
+        amount_in: int,
+        token_account_in: Pubkey,
+        token_account_out: Pubkey,
+        owner: Pubkey,
+        amount_out: int,
+    ) -> Instruction:
+        keys = self.pool_keys + [
+            # UserSourceTokenAccount
+            AccountMeta(pubkey=token_account_in, is_signer=False, is_writable=True),
+            # UserDestTokenAccount
+            AccountMeta(pubkey=token_account_out, is_signer=False, is_writable=True),
+            # UserOwner
+            AccountMeta(pubkey=owner, is_signer=True, is_writable=False),
+        ]
+        data = SWAP_INSTRUCTION_DATA.pack(
+            SWAP_INSTRUCTION, int(amount_in), int(amount_out)
+        )
+        return Instruction(RAYDIUM_LIQUIDITY_POOL_V4, data, keys)
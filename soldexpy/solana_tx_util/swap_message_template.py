@@ -0,0 +1,255 @@
+import secrets
+import struct
+from typing import Dict, List, Tuple
+
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0, to_bytes_versioned
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from solders.transaction import VersionedTransaction
+
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_transaction_builder import (
+    SwapTransactionBuilder,
+    create_idempotent_associated_token_account,
+)
+
+U64 = struct.Struct("<Q")
+# SetComputeUnitLimit takes a u32
+U32 = struct.Struct("<I")
+# length of the seed of the temporary WSOL account (str(Pubkey)[0:32] in SwapTransactionBuilder)
+SEED_LENGTH = 32
+
+
+def make_seed() -> str:
+    # 32 ascii characters, much cheaper than generating a keypair
+    return secrets.token_hex(SEED_LENGTH // 2)
+
+
+class SwapMessageTemplate:
+    """
+    A compiled swap message for one (pool, payer, direction). The account list never changes,
+    so the message is compiled once with marker values, and build() only patches the amounts,
+    the unit price and limit, the temporary WSOL account (buy) and the blockhash before signing.
+    A patched key keeps its index in the account list, which stays a valid message.
+    """
+
+    def __init__(
+        self,
+        pool: RaydiumPool,
+        payer: Keypair,
+        direction: Direction,
+        rent_lamports: int = 0,
+        unit_price: int = 25000,
+        unit_budget: int = 600000,
+        create_token_account: bool = True,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+    ):
+        self.pool = pool
+        self.payer = payer
+        self.direction = direction
+        # rent of the temporary WSOL account, added to the lamports of a buy
+        self.rent_lamports = rent_lamports
+        self.unit_price = unit_price
+        self.unit_budget = unit_budget
+        self.token_program_id = pool.token_program_id
+        self.markers = self.make_markers()
+        builder = SwapTransactionBuilder(None, pool, payer, unit_price, unit_budget)
+        # not append_set_compute_budget, it caps the limit marker at the maximum
+        builder.instructions.append(set_compute_unit_price(self.markers["unit_price"]))
+        builder.instructions.append(set_compute_unit_limit(self.markers["unit_limit"]))
+        amount_in, amount_out = self.markers["amount_in"], self.markers["amount_out"]
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            source = builder.append_create_account_with_seed(
+                self.markers["lamports"], self.markers["seed"]
+            )
+            builder.append_initialize_account(source)
+            if create_token_account:
+                builder.instructions.append(
+                    create_idempotent_associated_token_account(
+                        payer.pubkey(), payer.pubkey(), builder.mint
+                    )
+                )
+            dest = get_associated_token_address(payer.pubkey(), builder.mint)
+            builder.append_swap(amount_in, source, dest, amount_out)
+            builder.append_close_account(source)
+        elif direction == Direction.SPEND_BASE_TOKEN:
+            source = get_associated_token_address(payer.pubkey(), builder.mint)
+            dest = get_associated_token_address(payer.pubkey(), builder.quoteMint)
+            builder.append_create_associated_token_account(builder.quoteMint)
+            builder.append_swap(amount_in, source, dest, amount_out)
+            builder.append_close_account(dest)
+        else:
+            raise Exception("Unsupported direction")
+        # with the marker values, for the key of a ComputeUnitEstimator
+        self.instructions = builder.instructions
+
+        message = MessageV0.try_compile(
+            payer.pubkey(),
+            builder.instructions,
+            address_lookup_tables or [],
+            self.markers["blockhash"],
+        )
+        self.message_bytes = to_bytes_versioned(message)
+        self.offsets = self.find_offsets()
+
+    def make_markers(self):
+        seed = make_seed()
+        return {
+            "amount_in": int.from_bytes(secrets.token_bytes(8), "little"),
+            "amount_out": int.from_bytes(secrets.token_bytes(8), "little"),
+            "unit_price": int.from_bytes(secrets.token_bytes(8), "little"),
+            "unit_limit": int.from_bytes(secrets.token_bytes(4), "little"),
+            "lamports": int.from_bytes(secrets.token_bytes(8), "little"),
+            "seed": seed,
+            "seed_account": self.get_seed_account(seed),
+            "blockhash": Hash(secrets.token_bytes(32)),
+        }
+
+    def find_offsets(self) -> Dict[str, int]:
+        marker_bytes = {
+            "amount_in": U64.pack(self.markers["amount_in"]),
+            "amount_out": U64.pack(self.markers["amount_out"]),
+            "unit_price": U64.pack(self.markers["unit_price"]),
+            "unit_limit": U32.pack(self.markers["unit_limit"]),
+            "blockhash": bytes(self.markers["blockhash"]),
+        }
+        if self.direction == Direction.SPEND_QUOTE_TOKEN:
+            marker_bytes["lamports"] = U64.pack(self.markers["lamports"])
+            marker_bytes["seed"] = self.markers["seed"].encode()
+            marker_bytes["seed_account"] = bytes(self.markers["seed_account"])
+        offsets = {}
+        for name, value in marker_bytes.items():
+            offset = self.message_bytes.find(value)
+            if offset < 0 or self.message_bytes.find(value, offset + 1) >= 0:
+                raise Exception(f"failed to locate {name} in the swap message")
+            offsets[name] = offset
+        return offsets
+
+    def get_seed_account(self, seed: str) -> Pubkey:
+        return Pubkey.create_with_seed(self.payer.pubkey(), seed, self.token_program_id)
+
+    def get_compute_unit_key(self, compute_unit_estimator) -> Tuple:
+        return compute_unit_estimator.make_key(
+            self.pool, self.direction, self.instructions
+        )
+
+    def build_message_bytes(
+        self,
+        amount_in: int,
+        amount_out: int,
+        recent_blockhash: Hash,
+        unit_price: int = None,
+        seed: str = None,
+        unit_limit: int = None,
+    ) -> bytes:
+        if unit_price is None:
+            unit_price = self.unit_price
+        if unit_limit is None:
+            unit_limit = self.unit_budget
+        message = bytearray(self.message_bytes)
+        offsets = self.offsets
+        U64.pack_into(message, offsets["amount_in"], int(amount_in))
+        U64.pack_into(message, offsets["amount_out"], int(amount_out))
+        U64.pack_into(message, offsets["unit_price"], int(unit_price))
+        U32.pack_into(message, offsets["unit_limit"], int(unit_limit))
+        message[offsets["blockhash"] : offsets["blockhash"] + 32] = bytes(
+            recent_blockhash
+        )
+        if self.direction == Direction.SPEND_QUOTE_TOKEN:
+            if seed is None:
+                seed = make_seed()
+            U64.pack_into(
+                message, offsets["lamports"], self.rent_lamports + int(amount_in)
+            )
+            message[offsets["seed"] : offsets["seed"] + SEED_LENGTH] = seed.encode()
+            message[offsets["seed_account"] : offsets["seed_account"] + 32] = bytes(
+                self.get_seed_account(seed)
+            )
+        return bytes(message)
+
+    def build_raw(
+        self,
+        amount_in: int,
+        amount_out: int,
+        recent_blockhash: Hash,
+        unit_price: int = None,
+        seed: str = None,
+        unit_limit: int = None,
+    ) -> bytes:
+        """
+        Returns the signed transaction in wire format (for sendTransaction as is).
+        """
+        message = self.build_message_bytes(
+            amount_in, amount_out, recent_blockhash, unit_price, seed, unit_limit
+        )
+        # 1 signature (compact-u16), the signature, then the message
+        return b"\x01" + bytes(self.payer.sign_message(message)) + message
+
+    def build(
+        self,
+        amount_in: int,
+        amount_out: int,
+        recent_blockhash: Hash,
+        unit_price: int = None,
+        seed: str = None,
+        unit_limit: int = None,
+    ) -> VersionedTransaction:
+        return VersionedTransaction.from_bytes(
+            self.build_raw(
+                amount_in, amount_out, recent_blockhash, unit_price, seed, unit_limit
+            )
+        )
+
+
+class SwapMessageTemplateCache:
+    """
+    SwapMessageTemplate per (pool, payer, direction, unit budget, create token account,
+    lookup tables).
+    """
+
+    def __init__(self):
+        self.templates: Dict[Tuple, SwapMessageTemplate] = {}
+
+    def __len__(self):
+        return len(self.templates)
+
+    def get(
+        self,
+        pool: RaydiumPool,
+        payer: Keypair,
+        direction: Direction,
+        rent_lamports: int = 0,
+        unit_budget: int = 600000,
+        create_token_account: bool = True,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+    ) -> SwapMessageTemplate:
+        key = (
+            pool.pool_address,
+            payer.pubkey(),
+            direction,
+            rent_lamports,
+            unit_budget,
+            create_token_account,
+            tuple(
+                (table.key, len(table.addresses))
+                for table in address_lookup_tables or []
+            ),
+        )
+        template = self.templates.get(key)
+        if template is None:
+            template = SwapMessageTemplate(
+                pool,
+                payer,
+                direction,
+                rent_lamports,
+                unit_budget=unit_budget,
+                create_token_account=create_token_account,
+                address_lookup_tables=address_lookup_tables,
+            )
+            self.templates[key] = template
+        return template
@@ -1,16 +1,20 @@
+from typing import List
+
 import solders.system_program as sp
 import spl.token.instructions as spl_token
 from solana.rpc.api import Client
 from solana.rpc.types import TokenAccountOpts
+from solders.address_lookup_table_account import AddressLookupTableAccount
 from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
 from solders.instruction import AccountMeta, Instruction
 from solders.keypair import Keypair
-from solders.message import MessageV0
+from solders.message import MessageV0, to_bytes_versioned
 from solders.pubkey import Pubkey
 from solders.token.associated import get_associated_token_address
 from solders.transaction import VersionedTransaction
 from spl.token.client import Token
-from spl.token.constants import WRAPPED_SOL_MINT
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
 from spl.token.instructions import (
     CloseAccountParams,
     close_account,
@@ -18,10 +22,35 @@ from spl.token.instructions import (
 )
 
 import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.common.direction import Direction
 from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
 from soldexpy.layout.raydium_layout import LIQUIDITY_STATE_LAYOUT_V4
 from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.associated_token_account import (
+    create_idempotent_associated_token_account,
+)
+from soldexpy.solana_tx_util.compute_unit_estimator import (
+    MAX_COMPUTE_UNIT_LIMIT,
+    ComputeUnitEstimator,
+    is_set_compute_unit_limit,
+    is_set_compute_unit_price,
+)
 from soldexpy.solana_tx_util.make_swap_instruction import make_swap_instruction
+from soldexpy.solana_util.priority_fee_estimator import PriorityFeeEstimator
+from soldexpy.token_account_registry import TokenAccountRegistry
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+
+# the most bytes a serialized transaction can take (IPv6 MTU minus headers)
+PACKET_DATA_SIZE = 1232
+
+
+def get_transaction_size(message: MessageV0) -> int:
+    # signature count (short vec, 1 byte below 128), signatures, versioned message
+    return (
+        1
+        + 64 * message.header.num_required_signatures
+        + len(to_bytes_versioned(message))
+    )
 
 
 class SwapTransactionBuilder:
@@ -32,10 +61,33 @@ class SwapTransactionBuilder:
         payer: Keypair,
         unit_price: int = 25000,
         unit_budget: int = 600000,
+        token_account_registry: TokenAccountRegistry = None,
+        use_idempotent_create: bool = False,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+        wrapped_sol_account: WrappedSolAccount = None,
+        compute_unit_estimator: ComputeUnitEstimator = None,
+        priority_fee_estimator: PriorityFeeEstimator = None,
+        fee_percentile: int = None,
     ):
         self.client = client
         self.pool = pool
         self.payer = payer
+        # token accounts of the payer, to decide locally whether to create the destination account
+        self.token_account_registry = token_account_registry
+        # create the destination account with the idempotent instruction instead of checking by RPC
+        self.use_idempotent_create = use_idempotent_create
+        # lookup tables of the accounts of the pool, so the message holds 1 byte indexes instead of keys
+        self.address_lookup_tables = address_lookup_tables or []
+        # swap from/to a long-lived WSOL account instead of creating and closing one per swap
+        self.wrapped_sol_account = wrapped_sol_account
+        # sizes the compute unit limit from cached simulations instead of unit_budget
+        self.compute_unit_estimator = compute_unit_estimator
+        self.priority_fee_estimator = priority_fee_estimator
+        self.fee_percentile = fee_percentile
+        # direction of the last swap appended by append_buy / append_sell
+        self.direction = None
+        # (amm id, direction) of every swap, several swaps share one compute budget header
+        self.legs = []
         # token address
         self.mint = pool.base_mint_address
         self.TOKEN_PROGRAM_ID = pool.token_program_id
@@ -43,9 +95,19 @@ class SwapTransactionBuilder:
         self.quoteMint = pool.quote_mint_address
         # budget
         self.unit_price = unit_price
+        if priority_fee_estimator is not None:
+            # from the recent fees of the pool instead of the fixed unit_price
+            self.unit_price = priority_fee_estimator.get_unit_price(
+                pool, fee_percentile
+            )
         self.unit_budget = unit_budget
+        # limit and price of the compute budget header, shared by the swaps
+        self.compute_unit_limit = None
+        self.header_unit_price = None
         # initialize instructions
         self.instructions = []
+        # last valid block height of the blockhash of the compiled transaction (None if unknown)
+        self.last_valid_block_height = None
 
     def append_get_pool_data(self):
         data = LIQUIDITY_STATE_LAYOUT_V4.build(dict(instruction=12, simulate_type=0))
@@ -79,7 +141,39 @@ class SwapTransactionBuilder:
             )
         )
 
+    def set_pool(
+        self,
+        pool: RaydiumPool,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+    ):
+        """
+        Switches the pool of the next append_buy / append_sell, e.g. to exit one token and enter
+        another in the same transaction.
+        """
+        self.pool = pool
+        self.mint = pool.base_mint_address
+        self.TOKEN_PROGRAM_ID = pool.token_program_id
+        self.quoteMint = pool.quote_mint_address
+        if self.priority_fee_estimator is not None:
+            self.unit_price = self.priority_fee_estimator.get_unit_price(
+                pool, self.fee_percentile
+            )
+        for table in address_lookup_tables or []:
+            if table not in self.address_lookup_tables:
+                self.address_lookup_tables.append(table)
+        return self
+
+    def start_leg(self, direction: Direction):
+        self.direction = direction
+        self.legs.append((self.pool.amm_id, direction))
+
     def append_sell(self, amount_in: int, amount_out: int):
+        self.start_leg(Direction.SPEND_BASE_TOKEN)
+        if self.wrapped_sol_account is not None:
+            if not self.wrapped_sol_account.loaded:
+                self.wrapped_sol_account.load()
+            self.append_sell_to_wrapped_sol_account(amount_in, amount_out)
+            return
         # compute budget
         self.append_set_compute_budget(self.unit_price, self.unit_budget)
         # pay target token (TOKEN)
@@ -98,9 +192,25 @@ class SwapTransactionBuilder:
         amount_in: int,
         amount_out: int,
         check_associated_token_account_exists=True,
+        rent_lamports: int = None,
     ):
-        # lamports to pay for rent + transfer
-        pay_for_rent = Token.get_min_balance_rent_for_exempt_for_account(self.client)
+        self.start_leg(Direction.SPEND_QUOTE_TOKEN)
+        if self.wrapped_sol_account is not None:
+            if not self.wrapped_sol_account.loaded:
+                self.wrapped_sol_account.load()
+            self.append_set_compute_budget(self.unit_price, self.unit_budget)
+            source = self.append_wrapped_sol_top_up(amount_in)
+            if check_associated_token_account_exists:
+                self.append_if_not_exists_create_associated_token_account(self.mint)
+            dest = get_associated_token_address(self.payer.pubkey(), self.mint)
+            self.append_swap(amount_in, source, dest, amount_out)
+            return
+        # lamports to pay for rent + transfer (rent_lamports saves the RPC)
+        pay_for_rent = rent_lamports
+        if pay_for_rent is None:
+            pay_for_rent = Token.get_min_balance_rent_for_exempt_for_account(
+                self.client
+            )
         lamports = pay_for_rent + amount_in
         # compute budget
         self.append_set_compute_budget(self.unit_price, self.unit_budget)
@@ -117,21 +227,118 @@ class SwapTransactionBuilder:
         # close the account
         self.append_close_account(source)
 
-    def compile_versioned_transaction(self):
-        recent_blockhash = client_wrapper.get_latest_blockhash(self.client)
+    def append_wrapped_sol_top_up(self, amount_in: int):
+        # transfer + sync_native only if the wrapped amount doesn't cover amount_in
+        self.instructions += self.wrapped_sol_account.make_top_up_instructions(
+            self.payer.pubkey(), amount_in, self
+        )
+        return self.wrapped_sol_account.address
 
+    def append_sell_to_wrapped_sol_account(self, amount_in: int, amount_out: int):
+        self.append_set_compute_budget(self.unit_price, self.unit_budget)
+        source = get_associated_token_address(self.payer.pubkey(), self.mint)
+        self.instructions += self.wrapped_sol_account.make_create_instructions(
+            self.payer.pubkey(), self
+        )
+        dest = self.wrapped_sol_account.address
+        self.append_swap(amount_in, source, dest, amount_out)
+        self.wrapped_sol_account.receive(amount_out, self)
+
+    def compile_versioned_transaction(
+        self, recent_blockhash: Hash = None, last_valid_block_height: int = None
+    ):
+        # a batch of transactions can share one blockhash instead of fetching it per transaction
+        if recent_blockhash is None:
+            (
+                recent_blockhash,
+                last_valid_block_height,
+            ) = client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        self.last_valid_block_height = last_valid_block_height
+
+        key, units = self.get_cached_compute_units()
+        if (
+            key is not None
+            and units is None
+            and self.compute_unit_estimator.should_simulate(key)
+        ):
+            # simulated with unit_budget, once per key until the cache refreshes
+            units = self.compute_unit_estimator.simulate(
+                self.make_versioned_transaction(recent_blockhash)
+            )
+            self.set_compute_units(key, units)
+        self.set_compute_unit_limit_from_units(units)
+        return self.set_wrapped_sol_signature(
+            self.make_versioned_transaction(recent_blockhash)
+        )
+
+    def set_wrapped_sol_signature(self, transaction: VersionedTransaction):
+        # the wrapped amount changes of the transaction are applied once it is confirmed
+        if self.wrapped_sol_account is not None:
+            self.wrapped_sol_account.set_pending_signature(
+                self, transaction.signatures[0]
+            )
+        return transaction
+
+    def make_versioned_transaction(self, recent_blockhash):
         compiled_message = MessageV0.try_compile(
             self.payer.pubkey(),
             self.instructions,
-            [],  # lookup tables
+            self.address_lookup_tables,
             recent_blockhash,
         )
+        # checked before signing, an oversized transaction is dropped by the RPC node
+        size = get_transaction_size(compiled_message)
+        if size > PACKET_DATA_SIZE:
+            raise Exception(
+                f"Transaction too large: {size} bytes, the limit is {PACKET_DATA_SIZE} "
+                f"({len(self.legs)} swaps, use address lookup tables or fewer swaps)"
+            )
         return VersionedTransaction(compiled_message, [self.payer])
 
+    def get_cached_compute_units(self):
+        """
+        Returns (key, cached units consumed). The key is None without an estimator
+        (or a swap), the units are None if they need a simulation or the last one failed.
+        """
+        if self.compute_unit_estimator is None or len(self.legs) == 0:
+            return None, None
+        key = self.compute_unit_estimator.make_legs_key(self.legs, self.instructions)
+        return key, self.compute_unit_estimator.get_cached_units(key)
+
+    def set_compute_units(self, key, units: int):
+        # a failure (None) is cached too, the limit stays unit_budget until it is retried
+        self.compute_unit_estimator.set_units(key, units)
+
+    def set_compute_unit_limit_from_units(self, units: int):
+        if units is None:
+            return
+        unit_limit = self.compute_unit_estimator.get_unit_limit(units)
+        for i, instruction in enumerate(self.instructions):
+            if is_set_compute_unit_limit(instruction):
+                self.instructions[i] = set_compute_unit_limit(unit_limit)
+
     def append_set_compute_budget(self, unit_price: int, unit_limit: int):
-        # Compute Budget: Set Compute Unit Limit
-        self.instructions.append(set_compute_unit_price(unit_price))
-        self.instructions.append(set_compute_unit_limit(unit_limit))
+        """
+        Appends the compute budget header, or adds unit_limit to the header of the previous
+        swaps: the runtime rejects a transaction with duplicate compute budget instructions.
+        The price is the highest one of the swaps.
+        """
+        if self.compute_unit_limit is None:
+            # Compute Budget: Set Compute Unit Price / Limit
+            self.compute_unit_limit = min(unit_limit, MAX_COMPUTE_UNIT_LIMIT)
+            self.header_unit_price = unit_price
+            self.instructions.append(set_compute_unit_price(unit_price))
+            self.instructions.append(set_compute_unit_limit(self.compute_unit_limit))
+            return
+        self.compute_unit_limit = min(
+            self.compute_unit_limit + unit_limit, MAX_COMPUTE_UNIT_LIMIT
+        )
+        self.header_unit_price = max(self.header_unit_price, unit_price)
+        for i, instruction in enumerate(self.instructions):
+            if is_set_compute_unit_limit(instruction):
+                self.instructions[i] = set_compute_unit_limit(self.compute_unit_limit)
+            elif is_set_compute_unit_price(instruction):
+                self.instructions[i] = set_compute_unit_price(self.header_unit_price)
 
     def append_swap(
         self, amount_in: int, source: Pubkey, dest: Pubkey, amount_out: int
@@ -168,9 +375,12 @@ class SwapTransactionBuilder:
             )
         )
 
-    def append_create_account_with_seed(self, lamports: int):
+    def append_create_account_with_seed(self, lamports: int, seed: str = None):
         # create account with seed
-        seed = str(Keypair().pubkey())[0:32]  # use this as the seed for the new account
+        if seed is None:
+            seed = str(Keypair().pubkey())[
+                0:32
+            ]  # use this as the seed for the new account
         source = Pubkey.create_with_seed(
             self.payer.pubkey(), seed, self.TOKEN_PROGRAM_ID
         )
@@ -212,7 +422,46 @@ class SwapTransactionBuilder:
             )
         )
 
+    def has_create_associated_token_account(self, mint: Pubkey) -> bool:
+        account = get_associated_token_address(self.payer.pubkey(), mint)
+        return any(
+            instruction.program_id == ASSOCIATED_TOKEN_PROGRAM_ID
+            and instruction.accounts[1].pubkey == account
+            for instruction in self.instructions
+        )
+
+    def append_create_associated_token_account_without_rpc(self, mint: Pubkey):
+        """
+        Appends the create-ATA instruction if it can be decided without RPC.
+        Returns False if the payer's token accounts must be queried.
+        """
+        if self.has_create_associated_token_account(mint):
+            # created by a previous swap of the transaction
+            return True
+        registry = self.token_account_registry
+        if registry is not None and registry.loaded:
+            if registry.has_associated_token_account(mint):
+                return True
+            # the registry may be behind, so don't fail if the account exists
+            self.instructions.append(
+                create_idempotent_associated_token_account(
+                    self.payer.pubkey(), self.payer.pubkey(), mint
+                )
+            )
+            return True
+        if self.use_idempotent_create:
+            self.instructions.append(
+                create_idempotent_associated_token_account(
+                    self.payer.pubkey(), self.payer.pubkey(), mint
+                )
+            )
+            return True
+        return False
+
     def append_if_not_exists_create_associated_token_account(self, mint: Pubkey):
+        if self.append_create_associated_token_account_without_rpc(mint):
+            return
+
         arr = client_wrapper.get_token_accounts_by_owner(
             self.client, self.payer.pubkey(), TokenAccountOpts(mint)
         ).value
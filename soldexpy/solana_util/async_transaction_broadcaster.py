@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.solana_util.transaction_broadcaster import TransactionBroadcaster
+
+
+class AsyncTransactionBroadcaster(TransactionBroadcaster):
+    """
+    TransactionBroadcaster built on AsyncClient, the sends are asyncio tasks. The methods that do
+    RPC are coroutines named *_async; the synchronous sends raise since they can't run on an
+    AsyncClient.
+    """
+
+    def __init__(
+        self,
+        clients: List[AsyncClient],
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        max_latency_ratio: float = 3,
+        probe_every: int = 10,
+        latency_smoothing: float = 0.2,
+    ):
+        super().__init__(
+            clients,
+            min_samples,
+            max_error_rate,
+            max_latency_ratio,
+            probe_every,
+            latency_smoothing,
+        )
+        # sends still running after the first accepted one
+        self.background_tasks = set()
+
+    def send_to(self, index: int, transaction: VersionedTransaction):
+        raise Exception("use await send_to_async()")
+
+    def send_transaction(self, transaction: VersionedTransaction):
+        raise Exception("use await send_transaction_async()")
+
+    async def send_to_async(self, index: int, transaction: VersionedTransaction):
+        stats = self.stats[index]
+        stats.record_sent()
+        start = time.perf_counter()
+        try:
+            resp = await async_client_wrapper.send_transaction(
+                self.clients[index], transaction
+            )
+        except Exception as e:
+            stats.record_error(e)
+            raise
+        stats.record_accepted(time.perf_counter() - start)
+        return resp
+
+    async def send_transaction_async(self, transaction: VersionedTransaction):
+        tasks = {
+            asyncio.create_task(self.send_to_async(index, transaction))
+            for index in self.get_endpoint_indexes()
+        }
+        errors = []
+        while len(tasks) > 0:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for pending in tasks:
+                        self.background_tasks.add(pending)
+                        pending.add_done_callback(self.on_background_task_done)
+                    return task.result()
+                errors.append(task.exception())
+        raise Exception(f"Transaction rejected by all endpoints: {errors}")
+
+    def on_background_task_done(self, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled():
+            # already recorded in the stats
+            task.exception()
+
+    async def close_async(self):
+        # waits for the sends still running, close() only shuts the (unused) thread pool
+        super().close()
+        if len(self.background_tasks) > 0:
+            await asyncio.gather(*self.background_tasks, return_exceptions=True)
@@ -0,0 +1,204 @@
+import asyncio
+import threading
+import time
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.hash import Hash
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+import soldexpy.solana.client_wrapper as client_wrapper
+
+# a blockhash can be used until 150 blocks after the block it was fetched at
+MAX_PROCESSING_AGE = 150
+# a block every ~400 ms; skipped slots make fewer blocks, so the estimate is conservative
+SECONDS_PER_BLOCK = 0.4
+
+
+class BlockhashPrefetcher:
+    """
+    Keeps the latest blockhashes with their last valid block height, refreshed in a background
+    thread. Attach it as client.blockhash_cache so client_wrapper.get_latest_blockhash returns
+    instantly. The current block height is estimated from the block height at the last fetch
+    plus the elapsed time, and the freshest blockhash with at least min_remaining_blocks
+    left is handed out.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        refresh_seconds: float = 2,
+        min_remaining_blocks: int = 20,
+        max_blockhashes: int = 8,
+        commitment: Commitment = None,
+    ):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self.min_remaining_blocks = min_remaining_blocks
+        self.max_blockhashes = max_blockhashes
+        self.commitment = commitment
+        # [(blockhash, last_valid_block_height, fetch time)] sorted by last_valid_block_height,
+        # replaced as a whole
+        self.blockhashes = []
+        self.refresh_count = 0
+        self.thread: threading.Thread = None
+        self.stop_event = threading.Event()
+
+    def attach(self, client: Client = None):
+        (client or self.client).blockhash_cache = self
+        return self
+
+    def set_latest_blockhash(self, resp):
+        self.add_blockhash(
+            resp.value.blockhash, resp.value.last_valid_block_height, time.time()
+        )
+        self.refresh_count += 1
+
+    def add_blockhash(
+        self, blockhash: Hash, last_valid_block_height: int, fetch_time: float
+    ):
+        blockhashes = [entry for entry in self.blockhashes if entry[0] != blockhash]
+        blockhashes.append((blockhash, last_valid_block_height, fetch_time))
+        # refreshes can finish out of order
+        blockhashes.sort(key=lambda entry: entry[1])
+        block_height = self.get_block_height(blockhashes)
+        self.blockhashes = [
+            entry
+            for entry in blockhashes[-self.max_blockhashes :]
+            if entry[1] >= block_height
+        ]
+
+    def refresh(self):
+        self.set_latest_blockhash(
+            client_wrapper.get_latest_blockhash_resp(self.client, self.commitment)
+        )
+
+    def get_block_height(self, blockhashes: list = None) -> float:
+        """
+        Returns the estimated current block height, None before the first fetch.
+        """
+        if blockhashes is None:
+            blockhashes = self.blockhashes
+        if len(blockhashes) == 0:
+            return None
+        now = time.time()
+        return max(
+            last_valid_block_height
+            - MAX_PROCESSING_AGE
+            + (now - fetch_time) / SECONDS_PER_BLOCK
+            for _, last_valid_block_height, fetch_time in blockhashes
+        )
+
+    def get_with_expiry(self):
+        """
+        Returns (blockhash, last_valid_block_height) of the freshest valid blockhash without RPC.
+        Raises ValueError if there is none (the same as BlockhashCache).
+        """
+        blockhashes = self.blockhashes
+        if len(blockhashes) == 0:
+            raise ValueError("no blockhash yet")
+        # the freshest one is the last to expire
+        blockhash, last_valid_block_height, _ = blockhashes[-1]
+        if (
+            last_valid_block_height - self.get_block_height(blockhashes)
+            < self.min_remaining_blocks
+        ):
+            raise ValueError("blockhash expired")
+        return blockhash, last_valid_block_height
+
+    def is_expired(self, last_valid_block_height: int) -> bool:
+        """
+        True if a transaction with this last_valid_block_height can't land anymore,
+        e.g. to stop resending it. False if unknown.
+        """
+        block_height = self.get_block_height()
+        return block_height is not None and block_height > last_valid_block_height
+
+    def get(self) -> Hash:
+        return self.get_with_expiry()[0]
+
+    def get_last_valid_block_height(self) -> int:
+        return self.get_with_expiry()[1]
+
+    def set(self, blockhash: Hash, slot: int, used_immediately: bool = False):
+        # called by Client for legacy transactions, the prefetched blockhash is newer anyway
+        pass
+
+    def run(self):
+        while not self.stop_event.wait(self.refresh_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"failed to refresh the blockhash: {e}")
+
+    def start(self):
+        if self.thread is not None:
+            return self
+        # the first blockhash is fetched before returning so get() works right away
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"failed to refresh the blockhash: {e}")
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class AsyncBlockhashPrefetcher(BlockhashPrefetcher):
+    """
+    BlockhashPrefetcher built on AsyncClient, refreshed by an asyncio task.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        refresh_seconds: float = 2,
+        min_remaining_blocks: int = 20,
+        max_blockhashes: int = 8,
+        commitment: Commitment = None,
+    ):
+        super().__init__(
+            client, refresh_seconds, min_remaining_blocks, max_blockhashes, commitment
+        )
+        self.task: asyncio.Task = None
+
+    async def refresh(self):
+        self.set_latest_blockhash(
+            await async_client_wrapper.get_latest_blockhash_resp(
+                self.client, self.commitment
+            )
+        )
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.sleep(self.refresh_seconds)
+                await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"failed to refresh the blockhash: {e}")
+
+    async def start(self):
+        if self.task is not None:
+            return self
+        # the first blockhash is fetched before returning so get() works right away
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"failed to refresh the blockhash: {e}")
+        self.task = asyncio.create_task(self.run())
+        return self
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -0,0 +1,47 @@
+from typing import List
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+import soldexpy.solana.client_wrapper as client_wrapper
+
+# getMultipleAccounts accepts up to 100 keys per request
+MAX_MULTIPLE_ACCOUNTS = 100
+
+
+def get_multiple_accounts_info(
+    client: Client, addresses: List[Pubkey], commitment: Commitment = None
+):
+    """
+    Returns account info for all addresses in the same order (None for missing accounts).
+    Duplicated addresses are only requested once.
+    """
+    unique_addresses = list(dict.fromkeys(addresses))
+    accounts = {}
+    for i in range(0, len(unique_addresses), MAX_MULTIPLE_ACCOUNTS):
+        chunk = unique_addresses[i : i + MAX_MULTIPLE_ACCOUNTS]
+        resp = client_wrapper.get_multiple_accounts(client, chunk, commitment)
+        for address, account in zip(chunk, resp.value):
+            accounts[address] = account
+    return [accounts[address] for address in addresses]
+
+
+async def async_get_multiple_accounts_info(
+    client: AsyncClient, addresses: List[Pubkey], commitment: Commitment = None
+):
+    """
+    Async version of get_multiple_accounts_info.
+    """
+    unique_addresses = list(dict.fromkeys(addresses))
+    accounts = {}
+    for i in range(0, len(unique_addresses), MAX_MULTIPLE_ACCOUNTS):
+        chunk = unique_addresses[i : i + MAX_MULTIPLE_ACCOUNTS]
+        resp = await async_client_wrapper.get_multiple_accounts(
+            client, chunk, commitment
+        )
+        for address, account in zip(chunk, resp.value):
+            accounts[address] = account
+    return [accounts[address] for address in addresses]
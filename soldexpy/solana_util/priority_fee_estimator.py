@@ -0,0 +1,231 @@
+import asyncio
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+
+
+def get_pool_writable_accounts(pool: RaydiumPool) -> List[Pubkey]:
+    # the accounts the swap instruction write-locks, besides the token accounts of the payer
+    return [
+        pool.amm_id,
+        pool.amm_open_orders,
+        pool.amm_target_orders,
+        pool.pool_coin_token_account,
+        pool.pool_pc_token_account,
+        pool.serum_market,
+        pool.serum_bids,
+        pool.serum_asks,
+        pool.serum_event_queue,
+        pool.serum_coin_vault_account,
+        pool.serum_pc_vault_account,
+    ]
+
+
+class PriorityFeeWindow:
+    """
+    Prioritization fees of the last window_slots slots of one pool, and the fee at every
+    integer percentile, recomputed when fees are added so a lookup is one list index.
+    """
+
+    def __init__(self, accounts: List[Pubkey], window_slots: int = 450):
+        self.accounts = accounts
+        self.window_slots = window_slots
+        # slot -> micro-lamports per compute unit
+        self.fees: Dict[int, int] = {}
+        # fee at percentile 0..100, None until there are fees
+        self.percentiles: List[int] = None
+
+    def __len__(self):
+        return len(self.fees)
+
+    def add_fees(self, fees: List[Tuple[int, int]]):
+        # consecutive polls return overlapping slots
+        for slot, fee in fees:
+            self.fees[slot] = fee
+        if len(self.fees) > self.window_slots:
+            newest = sorted(self.fees)[-self.window_slots :]
+            self.fees = {slot: self.fees[slot] for slot in newest}
+        if len(self.fees) == 0:
+            return
+        window = sorted(self.fees.values())
+        last = len(window) - 1
+        self.percentiles = [
+            window[(last * percentile + 50) // 100] for percentile in range(101)
+        ]
+
+    def get_fee(self, percentile: int):
+        if self.percentiles is None:
+            return None
+        return self.percentiles[percentile]
+
+
+class PriorityFeeEstimator:
+    """
+    Compute unit price per pool from recent prioritization fees on the accounts its swaps
+    write-lock, polled in a background thread for every added pool. get_unit_price() only reads
+    memory, so it can be called on the swap path; it falls back to default_unit_price until a
+    pool has fees.
+    feed(accounts) -> [(slot, fee)] replaces getRecentPrioritizationFees, e.g. with a local feed.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        percentile: int = 75,
+        default_unit_price: int = 25000,
+        min_unit_price: int = 0,
+        max_unit_price: int = None,
+        window_slots: int = 450,
+        refresh_seconds: float = 2,
+        feed: Callable = None,
+    ):
+        self.client = client
+        self.percentile = percentile
+        self.default_unit_price = default_unit_price
+        self.min_unit_price = min_unit_price
+        self.max_unit_price = max_unit_price
+        self.window_slots = window_slots
+        self.refresh_seconds = refresh_seconds
+        self.feed = feed
+        # amm id -> fee window
+        self.windows: Dict[Pubkey, PriorityFeeWindow] = {}
+        self.refresh_count = 0
+        self.thread: threading.Thread = None
+        self.stop_event = threading.Event()
+
+    def add_pool(self, pool: RaydiumPool):
+        if pool.amm_id not in self.windows:
+            self.windows[pool.amm_id] = PriorityFeeWindow(
+                get_pool_writable_accounts(pool), self.window_slots
+            )
+        return self
+
+    def get_unit_price(self, pool: RaydiumPool, percentile: int = None) -> int:
+        window = self.windows.get(pool.amm_id)
+        if window is None:
+            return self.default_unit_price
+        fee = window.get_fee(self.percentile if percentile is None else percentile)
+        if fee is None:
+            return self.default_unit_price
+        fee = max(fee, self.min_unit_price)
+        if self.max_unit_price is not None:
+            fee = min(fee, self.max_unit_price)
+        return fee
+
+    def get_recent_fees(self, accounts: List[Pubkey]):
+        if self.feed is not None:
+            return self.feed(accounts)
+        return client_wrapper.get_recent_prioritization_fees(self.client, accounts)
+
+    def refresh(self):
+        for window in list(self.windows.values()):
+            try:
+                window.add_fees(self.get_recent_fees(window.accounts))
+            except Exception as e:
+                print(f"failed to refresh the prioritization fees: {e}")
+        self.refresh_count += 1
+
+    def run(self):
+        while not self.stop_event.wait(self.refresh_seconds):
+            self.refresh()
+
+    def start(self):
+        if self.thread is not None:
+            return self
+        # the first fees are fetched before returning so get_unit_price() is informed right away
+        self.refresh()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+class AsyncPriorityFeeEstimator(PriorityFeeEstimator):
+    """
+    PriorityFeeEstimator built on AsyncClient, refreshed by an asyncio task.
+    feed may be a coroutine function. The methods that do RPC are coroutines named *_async; the
+    synchronous ones raise since they can't run on an AsyncClient.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        percentile: int = 75,
+        default_unit_price: int = 25000,
+        min_unit_price: int = 0,
+        max_unit_price: int = None,
+        window_slots: int = 450,
+        refresh_seconds: float = 2,
+        feed: Callable = None,
+    ):
+        super().__init__(
+            client,
+            percentile,
+            default_unit_price,
+            min_unit_price,
+            max_unit_price,
+            window_slots,
+            refresh_seconds,
+            feed,
+        )
+        self.task: asyncio.Task = None
+
+    def get_recent_fees(self, accounts: List[Pubkey]):
+        raise Exception("use await get_recent_fees_async()")
+
+    def refresh(self):
+        raise Exception("use await refresh_async()")
+
+    def start(self):
+        raise Exception("use await start_async()")
+
+    async def get_recent_fees_async(self, accounts: List[Pubkey]):
+        if self.feed is not None:
+            fees = self.feed(accounts)
+            if asyncio.iscoroutine(fees):
+                fees = await fees
+            return fees
+        return await async_client_wrapper.get_recent_prioritization_fees(
+            self.client, accounts
+        )
+
+    async def refresh_async(self):
+        for window in list(self.windows.values()):
+            try:
+                window.add_fees(await self.get_recent_fees_async(window.accounts))
+            except Exception as e:
+                print(f"failed to refresh the prioritization fees: {e}")
+        self.refresh_count += 1
+
+    async def run_async(self):
+        while True:
+            try:
+                await asyncio.sleep(self.refresh_seconds)
+                await self.refresh_async()
+            except asyncio.CancelledError:
+                break
+
+    async def start_async(self):
+        if self.task is not None:
+            return self
+        await self.refresh_async()
+        self.task = asyncio.create_task(self.run_async())
+        return self
+
+    async def stop_async(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
@@ -1,16 +1,33 @@
+import struct
+from typing import Dict, List
+
 import base58
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
 import soldexpy.solana.client_wrapper as client_wrapper
 from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
-from soldexpy.layout.raydium_layout import LIQUIDITY_STATE_LAYOUT_V4
+from soldexpy.layout.raydium_layout import (
+    LIQUIDITY_STATE_V4_DECODER,
+    LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET,
+)
+from soldexpy.layout.spl_token_layout import SPL_ACCOUNT_AMOUNT_OFFSET
+
+# u64 little endian
+TOKEN_ACCOUNT_AMOUNT = struct.Struct("<Q")
+# base_need_take_pnl and quote_need_take_pnl, u64 little endian
+NEED_TAKE_PNL = struct.Struct("<QQ")
+
+# vault -> decimals of its mint, they never change
+VAULT_DECIMALS: Dict[Pubkey, int] = {}
 
 
 def get_pool_info(client: Client, pool_address: str):
     target_token_pool_pub_key = Pubkey(base58.b58decode(pool_address))
     pool_info = client_wrapper.get_account_info(client, target_token_pool_pub_key)
-    return LIQUIDITY_STATE_LAYOUT_V4.parse(pool_info.value.data)
+    return LIQUIDITY_STATE_V4_DECODER.parse(pool_info.value.data)
 
 
 def get_pool_vaults(client: Client, pool_address: str):
@@ -36,16 +53,104 @@ def get_lp_token_address(pool_info_market_id: str):
 def get_pool_vaults_balance(
     client: Client, base_vault: Pubkey, quote_vault: Pubkey, commitment="confirmed"
 ):
-    base_vault_token_account_balance = client_wrapper.get_token_account_balance(
-        client, base_vault, commitment=commitment
+    """
+    Balances (amount / 10 ** decimals) of both vaults. The amounts are read by get_pool_amounts
+    with one getMultipleAccounts, the decimals only once per vault.
+    """
+    base_amount, quote_amount, _, _ = get_pool_amounts(
+        client, None, base_vault, quote_vault, commitment
     )
-    quote_vault_token_account_balance = client_wrapper.get_token_account_balance(
-        client, quote_vault, commitment=commitment
+    if base_vault not in VAULT_DECIMALS or quote_vault not in VAULT_DECIMALS:
+        (
+            VAULT_DECIMALS[base_vault],
+            VAULT_DECIMALS[quote_vault],
+        ) = get_pool_vaults_decimals(client, base_vault, quote_vault)
+    return (
+        base_amount / 10 ** VAULT_DECIMALS[base_vault],
+        quote_amount / 10 ** VAULT_DECIMALS[quote_vault],
     )
-    return int(base_vault_token_account_balance.value.amount) / 10 ** int(
-        base_vault_token_account_balance.value.decimals
-    ), int(quote_vault_token_account_balance.value.amount) / 10 ** int(
-        quote_vault_token_account_balance.value.decimals
+
+
+def get_token_account_amount(data: bytes):
+    # read the amount directly from the token account data instead of parsing the whole layout
+    if len(data) < SPL_ACCOUNT_AMOUNT_OFFSET + TOKEN_ACCOUNT_AMOUNT.size:
+        raise Exception("invalid token account data")
+    return TOKEN_ACCOUNT_AMOUNT.unpack_from(data, SPL_ACCOUNT_AMOUNT_OFFSET)[0]
+
+
+def get_need_take_pnl(data: bytes):
+    # read only the pnl fields from the AMM account data instead of parsing the whole layout
+    if len(data) < LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET + NEED_TAKE_PNL.size:
+        raise Exception("invalid pool account data")
+    return NEED_TAKE_PNL.unpack_from(data, LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET)
+
+
+def get_pool_amounts(
+    client: Client,
+    amm_id: Pubkey,
+    base_vault: Pubkey,
+    quote_vault: Pubkey,
+    commitment="confirmed",
+    min_context_slot: int = None,
+):
+    """
+    Returns the raw amounts of both vaults, the (base, quote) pnl not taken yet from the AMM
+    account (on-chain order) and the slot they were read at.
+    The 3 accounts are read with a single getMultipleAccounts so they are from the same slot.
+    Without amm_id only the vaults are read and the pnl is None.
+    """
+    resp = client_wrapper.get_multiple_accounts(
+        client,
+        get_pool_amounts_accounts(amm_id, base_vault, quote_vault),
+        commitment,
+        min_context_slot,
+    )
+    return parse_pool_amounts(resp)
+
+
+async def async_get_pool_amounts(
+    client: AsyncClient,
+    amm_id: Pubkey,
+    base_vault: Pubkey,
+    quote_vault: Pubkey,
+    commitment="confirmed",
+    min_context_slot: int = None,
+):
+    """
+    Async version of get_pool_amounts.
+    """
+    resp = await async_client_wrapper.get_multiple_accounts(
+        client,
+        get_pool_amounts_accounts(amm_id, base_vault, quote_vault),
+        commitment,
+        min_context_slot,
+    )
+    return parse_pool_amounts(resp)
+
+
+def get_pool_amounts_accounts(
+    amm_id: Pubkey, base_vault: Pubkey, quote_vault: Pubkey
+) -> List[Pubkey]:
+    if amm_id is None:
+        return [base_vault, quote_vault]
+    return [amm_id, base_vault, quote_vault]
+
+
+def parse_pool_amounts(resp):
+    if len(resp.value) == 2:
+        amm_account = None
+        base_vault_account, quote_vault_account = resp.value
+    else:
+        amm_account, base_vault_account, quote_vault_account = resp.value
+        if amm_account is None:
+            raise Exception("pool account not found")
+    if base_vault_account is None or quote_vault_account is None:
+        raise Exception("vault account not found")
+    return (
+        get_token_account_amount(base_vault_account.data),
+        get_token_account_amount(quote_vault_account.data),
+        None if amm_account is None else get_need_take_pnl(amm_account.data),
+        resp.context.slot,
     )
 
 
@@ -3,7 +3,7 @@ from solana.rpc.api import Client
 from solders.pubkey import Pubkey
 
 import soldexpy.solana.client_wrapper as client_wrapper
-from soldexpy.layout.serum_layout import MARKET_STATE_LAYOUT_V2
+from soldexpy.layout.serum_layout import MARKET_STATE_V2_DECODER
 
 
 def get_market_info(client: Client, market_address: any):
@@ -12,7 +12,7 @@ def get_market_info(client: Client, market_address: any):
     else:
         market_pub_key = Pubkey(market_address)
     market_info = client_wrapper.get_account_info(client, market_pub_key)
-    return MARKET_STATE_LAYOUT_V2.parse(market_info.value.data)
+    return MARKET_STATE_V2_DECODER.parse(market_info.value.data)
 
 
 def get_vault_signer(client: Client, vault_address: any):
@@ -0,0 +1,275 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Callable, Dict
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.core import _COMMITMENT_TO_SOLDERS
+from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
+from solders.rpc.config import RpcSignatureSubscribeConfig
+from solders.rpc.requests import SignatureSubscribe
+from solders.signature import Signature
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.async_client_wrapper as async_client_wrapper
+from soldexpy.solana_util.subscription_manager import (
+    AccountSubscription,
+    SubscriptionConnection,
+)
+
+# getSignatureStatuses accepts up to 256 signatures
+MAX_SIGNATURES_PER_REQUEST = 256
+
+
+class SignatureSubscription(AccountSubscription):
+    """
+    signatureSubscribe on a SubscriptionConnection (pub_key holds the signature).
+    The server removes the subscription after the first notification.
+    """
+
+    def __init__(
+        self, signature: Signature, callback: Callable, commitment: Commitment
+    ):
+        super().__init__(signature, callback, commitment, None)
+
+    def make_request(self, request_id: int):
+        config = RpcSignatureSubscribeConfig(
+            commitment=_COMMITMENT_TO_SOLDERS[self.commitment]
+        )
+        return SignatureSubscribe(self.pub_key, config, request_id)
+
+    async def send_unsubscribe(self, websocket: SolanaWsClientProtocol):
+        await websocket.signature_unsubscribe(self.subscription_id)
+
+
+class PendingSignature:
+    """
+    A sent transaction waiting for its confirmation. Await it to get it back once confirmed;
+    err is the transaction error (None if it succeeded).
+    """
+
+    def __init__(self, signature: Signature, future: asyncio.Future, send_slot=None):
+        self.signature = signature
+        self.future = future
+        self.send_time = time.time()
+        # latest slot known when the transaction was sent (None if unknown)
+        self.send_slot = send_slot
+        self.confirm_time = None
+        # slot the transaction was processed in
+        self.slot = None
+        self.err = None
+
+    def __await__(self):
+        return self.future.__await__()
+
+    def done(self):
+        return self.future.done()
+
+    def set_confirmed(self, slot: int, err):
+        if self.future.done():
+            return
+        self.confirm_time = time.time()
+        self.slot = slot
+        self.err = err
+        self.future.set_result(self)
+
+    def get_latency_seconds(self):
+        if self.confirm_time is None:
+            return None
+        return self.confirm_time - self.send_time
+
+    def get_latency_slots(self):
+        if self.slot is None or self.send_slot is None:
+            return None
+        return self.slot - self.send_slot
+
+
+class SignatureConfirmer:
+    """
+    Confirms many sent transactions concurrently. Each signature is watched by signatureSubscribe
+    on one shared websocket; signatures still pending after poll_interval_seconds are also
+    checked by batched getSignatureStatuses, which covers missed notifications and a websocket
+    that is down (or no websocket_rpc_url at all).
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        websocket_rpc_url: str = None,
+        commitment: Commitment = "confirmed",
+        poll_interval_seconds: float = 1,
+        timeout_seconds: float = 90,
+        connect: Callable = connect,
+    ):
+        self.client = client
+        self.commitment = commitment
+        self.commitment_rank = int(_COMMITMENT_TO_SOLDERS[commitment])
+        self.poll_interval_seconds = poll_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.connection: SubscriptionConnection = None
+        if websocket_rpc_url is not None:
+            self.connection = SubscriptionConnection(websocket_rpc_url, connect)
+        self.pending: Dict[Signature, PendingSignature] = {}
+        self.poller: asyncio.Task = None
+        # latest slot seen in notifications and statuses
+        self.last_slot = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    async def send(
+        self, transaction: VersionedTransaction, send_slot: int = None
+    ) -> PendingSignature:
+        """
+        Sends the transaction and returns right away with the PendingSignature to await.
+        """
+        signature = (
+            await async_client_wrapper.send_transaction(self.client, transaction)
+        ).value
+        return self.watch(signature, send_slot)
+
+    def watch(self, signature: Signature, send_slot: int = None) -> PendingSignature:
+        pending = self.pending.get(signature)
+        if pending is not None:
+            return pending
+        if send_slot is None:
+            send_slot = self.last_slot
+        pending = PendingSignature(
+            signature, asyncio.get_running_loop().create_future(), send_slot
+        )
+        self.pending[signature] = pending
+        if self.connection is not None:
+            asyncio.ensure_future(self.subscribe(signature))
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.create_task(self.poll())
+        return pending
+
+    async def subscribe(self, signature: Signature):
+        subscription = SignatureSubscription(
+            signature, self.on_notification, self.commitment
+        )
+        try:
+            await self.connection.subscribe(subscription)
+        except Exception as e:
+            # the polling confirms it anyway
+            self.connection.forget(signature)
+            print(f"failed to subscribe to the signature: {e}")
+
+    def on_notification(self, signature: Signature, notification):
+        self.connection.forget(signature)
+        self.set_confirmed(
+            signature, notification.result.context.slot, notification.result.value.err
+        )
+
+    def set_confirmed(self, signature: Signature, slot: int, err):
+        if self.last_slot is None or slot > self.last_slot:
+            self.last_slot = slot
+        pending = self.pending.pop(signature, None)
+        if pending is not None:
+            pending.set_confirmed(slot, err)
+
+    def is_confirmed(self, status):
+        return (
+            status.confirmation_status is not None
+            and int(status.confirmation_status) >= self.commitment_rank
+        )
+
+    async def poll(self):
+        while len(self.pending) > 0:
+            await asyncio.sleep(self.poll_interval_seconds)
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"failed to get the signature statuses: {e}")
+            # on every tick, also while the status RPC fails
+            await self.expire_timed_out()
+
+    async def poll_once(self):
+        now = time.time()
+        signatures = [
+            signature
+            for signature, pending in self.pending.items()
+            if now - pending.send_time >= self.poll_interval_seconds
+        ]
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST):
+            batch = signatures[i : i + MAX_SIGNATURES_PER_REQUEST]
+            resp = await async_client_wrapper.get_signature_statuses(self.client, batch)
+            for signature, status in zip(batch, resp.value):
+                if status is not None and self.is_confirmed(status):
+                    self.set_confirmed(signature, status.slot, status.err)
+                    if self.connection is not None:
+                        await self.connection.unsubscribe(signature)
+
+    async def expire_timed_out(self):
+        now = time.time()
+        for signature, pending in list(self.pending.items()):
+            if now - pending.send_time <= self.timeout_seconds:
+                continue
+            self.pending.pop(signature)
+            pending.future.set_exception(
+                Exception(f"Unable to confirm transaction {signature}")
+            )
+            if self.connection is not None:
+                try:
+                    await self.connection.unsubscribe(signature)
+                except Exception as e:
+                    print(f"failed to unsubscribe from the signature: {e}")
+
+    async def close(self):
+        if self.poller is not None:
+            self.poller.cancel()
+            self.poller = None
+        if self.connection is not None:
+            await self.connection.close()
+
+
+class ThreadedSignatureConfirmer:
+    """
+    A SignatureConfirmer running on its own event loop thread, for the synchronous Swap.
+    watch() returns a concurrent.futures.Future of the PendingSignature: result() blocks until
+    it is confirmed, and the done callbacks run on the confirmer thread.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        websocket_rpc_url: str = None,
+        commitment: Commitment = "confirmed",
+        poll_interval_seconds: float = 1,
+        timeout_seconds: float = 90,
+        connect: Callable = connect,
+    ):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.confirmer = SignatureConfirmer(
+            client,
+            websocket_rpc_url,
+            commitment,
+            poll_interval_seconds,
+            timeout_seconds,
+            connect,
+        )
+
+    def __len__(self):
+        return len(self.confirmer)
+
+    def watch(
+        self, signature: Signature, send_slot: int = None
+    ) -> concurrent.futures.Future:
+        async def wait():
+            return await self.confirmer.watch(signature, send_slot)
+
+        return asyncio.run_coroutine_threadsafe(wait(), self.loop)
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.confirmer.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
@@ -1,8 +1,173 @@
 import asyncio
+import time
+from typing import Callable, Dict, List, Tuple
 
 from solana.rpc.commitment import Commitment
+from solana.rpc.core import _ACCOUNT_ENCODING_TO_SOLDERS, _COMMITMENT_TO_SOLDERS
 from solana.rpc.websocket_api import SolanaWsClientProtocol, connect
 from solders.pubkey import Pubkey
+from solders.rpc.config import RpcAccountInfoConfig
+from solders.rpc.requests import AccountSubscribe
+from solders.rpc.responses import SubscriptionError, SubscriptionResult
+
+from soldexpy.common.backoff import get_backoff_seconds
+
+# a connection up this long before it drops resets the reconnect backoff
+STABLE_CONNECTION_SECONDS = 10
+
+
+class SubscriptionStatus:
+    """
+    Shared with the caller of a subscription: when the last message arrived (to detect a
+    stale subscription, e.g. a connection that stopped delivering) and how often it reconnected.
+    """
+
+    def __init__(self):
+        self.last_update_time = None
+        self.reconnect_count = 0
+
+    def set_updated(self):
+        self.last_update_time = time.time()
+
+    def get_staleness_seconds(self):
+        if self.last_update_time is None:
+            return float("inf")
+        return time.time() - self.last_update_time
+
+    def is_stale(self, max_age_seconds: float):
+        return self.get_staleness_seconds() > max_age_seconds
+
+
+def reset_backoff_attempt(attempt: int, connected_time: float, received: bool) -> int:
+    # a connection that drops right after subscribing keeps backing off
+    if connected_time is None:
+        return attempt
+    if received or time.time() - connected_time >= STABLE_CONNECTION_SECONDS:
+        return 0
+    return attempt
+
+
+def put_dropping_oldest(queue: asyncio.Queue, item):
+    if queue.full():
+        # remove the oldest item
+        try:
+            queue.get_nowait()
+        except:
+            # there is a chance that the queue is empty
+            pass
+    queue.put_nowait(item)
+
+
+def make_account_subscribe(
+    pub_key: Pubkey, commitment: Commitment, encoding: str, request_id: int
+):
+    config = RpcAccountInfoConfig(
+        encoding=None if encoding is None else _ACCOUNT_ENCODING_TO_SOLDERS[encoding],
+        commitment=None if commitment is None else _COMMITMENT_TO_SOLDERS[commitment],
+    )
+    return AccountSubscribe(pub_key, config, request_id)
+
+
+async def subscribe_accounts(
+    websocket: SolanaWsClientProtocol,
+    pub_keys: List[Pubkey],
+    commitment: Commitment,
+    encoding: str,
+) -> Tuple[Dict[int, Pubkey], list]:
+    """
+    Sends the accountSubscribe of every account, then matches the acknowledgements to the
+    requests by id. The notifications of the first accounts can arrive before the last
+    acknowledgements, so the other messages received in between are returned too.
+    Returns ({subscription id: pub_key}, messages).
+    """
+    pub_keys_by_request_id = {}
+    for pub_key in pub_keys:
+        request_id = websocket.increment_counter_and_get_id()
+        pub_keys_by_request_id[request_id] = pub_key
+        await websocket.send_data(
+            make_account_subscribe(pub_key, commitment, encoding, request_id)
+        )
+    pub_keys_by_subscription_id = {}
+    messages = []
+    while len(pub_keys_by_request_id) > 0:
+        for message in await websocket.recv():
+            request_id = getattr(message, "id", None)
+            if request_id not in pub_keys_by_request_id:
+                messages.append(message)
+            elif isinstance(message, SubscriptionResult):
+                pub_key = pub_keys_by_request_id.pop(request_id)
+                pub_keys_by_subscription_id[message.result] = pub_key
+            elif isinstance(message, SubscriptionError):
+                raise Exception(
+                    f"accountSubscribe failed for {pub_keys_by_request_id[request_id]}: "
+                    f"{message.error}"
+                )
+    return pub_keys_by_subscription_id, messages
+
+
+async def subscribe_with_reconnect(
+    websocket_rpc_url: str,
+    subscribe: Callable,
+    handle: Callable,
+    on_reconnect: Callable = None,
+    reconnect_base_seconds: float = 0.5,
+    reconnect_max_seconds: float = 30,
+    max_reconnect_attempts: int = None,
+    status: SubscriptionStatus = None,
+):
+    """
+    Runs subscribe(websocket) -> subscription ids, then handle(response) for every message.
+    When the connection drops, reconnects with jittered backoff and calls on_reconnect() before
+    subscribing again, so the caller can tell the messages from before and after the drop and
+    resync what it may have missed. The backoff is reset once a connection has received a
+    message or stayed up for STABLE_CONNECTION_SECONDS.
+    """
+    if status is None:
+        status = SubscriptionStatus()
+    attempt = 0
+    reconnecting = False
+    while True:
+        websocket: SolanaWsClientProtocol = None
+        subscription_ids = []
+        connected_time = None
+        received = False
+        try:
+            websocket = await connect(websocket_rpc_url)
+            if reconnecting:
+                status.reconnect_count += 1
+                if on_reconnect is not None:
+                    on_reconnect()
+            subscription_ids = await subscribe(websocket)
+            connected_time = time.time()
+            while True:
+                response = await websocket.recv()
+                received = True
+                status.set_updated()
+                handle(response)
+        except asyncio.CancelledError:
+            if websocket is not None:
+                try:
+                    for subscription_id in subscription_ids:
+                        await websocket.account_unsubscribe(subscription_id)
+                    await websocket.close()
+                except:
+                    pass
+            break
+        except Exception as e:
+            print(f"websocket subscription failed: {e}")
+            if websocket is not None:
+                try:
+                    await websocket.close()
+                except:
+                    pass
+        attempt = reset_backoff_attempt(attempt, connected_time, received)
+        if max_reconnect_attempts is not None and attempt >= max_reconnect_attempts:
+            break
+        await asyncio.sleep(
+            get_backoff_seconds(attempt, reconnect_base_seconds, reconnect_max_seconds)
+        )
+        attempt += 1
+        reconnecting = True
 
 
 async def subscribe_to_account_using_queue(
@@ -10,42 +175,130 @@ async def subscribe_to_account_using_queue(
     websocket_rpc_url: str,
     pub_key: Pubkey,
     commitment: Commitment,
+    on_reconnect: Callable = None,
+    max_reconnect_attempts: int = None,
+    status: SubscriptionStatus = None,
 ):
-    websocket: SolanaWsClientProtocol
-    async with connect(websocket_rpc_url) as websocket:
-        await websocket.account_subscribe(pub_key, commitment, "jsonParsed")
-        response = await websocket.recv()
-        subscription_id = response[0].result
-        while True:
-            try:
-                response = await websocket.recv()
-                if queue.full():
-                    # remove the oldest item
-                    try:
-                        queue.get_nowait()
-                    except:
-                        # there is a chance that the queue is empty
-                        pass
-                await queue.put(response)
-            except asyncio.CancelledError:
-                break
-            except:
-                break
-        await websocket.account_unsubscribe(subscription_id)
+    async def subscribe(websocket: SolanaWsClientProtocol):
+        subscription_ids, messages = await subscribe_accounts(
+            websocket, [pub_key], commitment, "jsonParsed"
+        )
+        if len(messages) > 0:
+            put_dropping_oldest(queue, messages)
+        return list(subscription_ids)
+
+    await subscribe_with_reconnect(
+        websocket_rpc_url,
+        subscribe,
+        lambda response: put_dropping_oldest(queue, response),
+        on_reconnect,
+        max_reconnect_attempts=max_reconnect_attempts,
+        status=status,
+    )
+
+
+async def subscribe_to_accounts_using_queue(
+    queue: asyncio.Queue,
+    websocket_rpc_url: str,
+    pub_keys: List[Pubkey],
+    commitment: Commitment,
+    encoding: str = "base64",
+    on_reconnect: Callable = None,
+    max_reconnect_attempts: int = None,
+    status: SubscriptionStatus = None,
+):
+    """
+    Subscribes to all accounts on a single connection and puts (pub_key, notification) into the queue.
+    With base64 encoding the raw account data is available in notification.result.value.data.
+    """
+    pub_keys_by_subscription_id = {}
+
+    async def subscribe(websocket: SolanaWsClientProtocol):
+        subscription_ids, messages = await subscribe_accounts(
+            websocket, pub_keys, commitment, encoding
+        )
+        pub_keys_by_subscription_id.clear()
+        pub_keys_by_subscription_id.update(subscription_ids)
+        # notifications that arrived while subscribing
+        handle(messages)
+        return list(pub_keys_by_subscription_id)
+
+    def handle(response):
+        for notification in response:
+            pub_key = pub_keys_by_subscription_id.get(
+                getattr(notification, "subscription", None)
+            )
+            if pub_key is None:
+                continue
+            put_dropping_oldest(queue, (pub_key, notification))
+
+    await subscribe_with_reconnect(
+        websocket_rpc_url,
+        subscribe,
+        handle,
+        on_reconnect,
+        max_reconnect_attempts=max_reconnect_attempts,
+        status=status,
+    )
 
 
 async def subscribe_to_account_using_yield(
-    websocket_rpc_url: str, pub_key: Pubkey, commitment: Commitment
+    websocket_rpc_url: str,
+    pub_key: Pubkey,
+    commitment: Commitment,
+    max_reconnect_attempts: int = None,
+    on_reconnect: Callable = None,
+    status: SubscriptionStatus = None,
 ):
-    websocket: SolanaWsClientProtocol
-    async with connect(websocket_rpc_url) as websocket:
-        await websocket.account_subscribe(pub_key, commitment)
-        response = await websocket.recv()
-        subscription_id = response[0].result
-        while True:
-            try:
+    """
+    Yields the notifications of the account. The connection is reopened with jittered
+    backoff when it drops, so notifications may be missed in between: on_reconnect() is called
+    before subscribing again so the caller can resync, and status tells when the last
+    notification arrived.
+    """
+    if status is None:
+        status = SubscriptionStatus()
+    attempt = 0
+    reconnecting = False
+    while True:
+        websocket: SolanaWsClientProtocol = None
+        subscription_id = None
+        connected_time = None
+        received = False
+        try:
+            websocket = await connect(websocket_rpc_url)
+            if reconnecting:
+                status.reconnect_count += 1
+                if on_reconnect is not None:
+                    on_reconnect()
+            await websocket.account_subscribe(pub_key, commitment)
+            response = await websocket.recv()
+            subscription_id = response[0].result
+            connected_time = time.time()
+            while True:
                 response = await super(SolanaWsClientProtocol, websocket).recv()
+                received = True
+                status.set_updated()
                 yield response
-            except:
-                break
-        await websocket.account_unsubscribe(subscription_id)
+        except (asyncio.CancelledError, GeneratorExit):
+            if websocket is not None:
+                try:
+                    if subscription_id is not None:
+                        await websocket.account_unsubscribe(subscription_id)
+                    await websocket.close()
+                except:
+                    pass
+            raise
+        except Exception as e:
+            print(f"websocket subscription failed: {e}")
+            if websocket is not None:
+                try:
+                    await websocket.close()
+                except:
+                    pass
+        attempt = reset_backoff_attempt(attempt, connected_time, received)
+        if max_reconnect_attempts is not None and attempt >= max_reconnect_attempts:
+            break
+        await asyncio.sleep(get_backoff_seconds(attempt))
+        attempt += 1
+        reconnecting = True
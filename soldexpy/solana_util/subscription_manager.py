@@ -0,0 +1,493 @@
+import asyncio
+import inspect
+import time
+from typing import Callable, Dict, List
+
+from solana.rpc.commitment import Commitment
+from solana.rpc.websocket_api import SolanaWsClientProtocol, SubscriptionError, connect
+from solders.pubkey import Pubkey
+from solders.rpc.responses import SubscriptionResult
+
+from soldexpy.common.backoff import get_backoff_seconds
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.solana_websocket_subscription import make_account_subscribe
+
+
+def call_callback(callback: Callable, *args):
+    # callbacks can be either functions or coroutine functions
+    result = callback(*args)
+    if inspect.isawaitable(result):
+        return asyncio.ensure_future(result)
+    return result
+
+
+def get_pool_accounts(pool: RaydiumPool):
+    # the AMM account holds the pnl, the vaults hold the balances
+    return [pool.amm_id, pool.get_base_vault(), pool.get_quote_vault()]
+
+
+def fail_future(future: asyncio.Future, error: Exception):
+    if future is not None and not future.done():
+        future.set_exception(error)
+
+
+class AccountSubscription:
+    def __init__(
+        self,
+        pub_key: Pubkey,
+        callback: Callable,
+        commitment: Commitment,
+        encoding: str,
+        resync: Callable = None,
+    ):
+        self.pub_key = pub_key
+        # called with (pub_key, notification) for every notification
+        self.callback = callback
+        # called with (pub_key) when notifications may have been missed while reconnecting
+        self.resync = resync
+        self.commitment = commitment
+        self.encoding = encoding
+        self.subscription_id = None
+        self.subscribed: asyncio.Future = None
+        self.last_slot = None
+        self.last_update_time = None
+
+    def make_request(self, request_id: int):
+        return make_account_subscribe(
+            self.pub_key, self.commitment, self.encoding, request_id
+        )
+
+    async def send_unsubscribe(self, websocket: SolanaWsClientProtocol):
+        await websocket.account_unsubscribe(self.subscription_id)
+
+
+class SubscriptionConnection:
+    """
+    A single websocket connection holding many account subscriptions.
+    Notifications are routed to the subscriptions by their subscription id.
+    The connection reconnects with jittered backoff and resubscribes everything when it drops.
+    """
+
+    def __init__(
+        self,
+        websocket_rpc_url: str,
+        connect: Callable = connect,
+        reconnect_base_seconds: float = 0.5,
+        reconnect_max_seconds: float = 30,
+        max_reconnect_attempts: int = None,
+    ):
+        self.websocket_rpc_url = websocket_rpc_url
+        self.connect = connect
+        self.reconnect_base_seconds = reconnect_base_seconds
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.websocket: SolanaWsClientProtocol = None
+        self.reader = None
+        self.connected = False
+        self.reconnect_count = 0
+        self.subscriptions: Dict[Pubkey, AccountSubscription] = {}
+        self.subscriptions_by_id: Dict[int, AccountSubscription] = {}
+        self.pending_requests: Dict[int, AccountSubscription] = {}
+        # requests of removed subscriptions, unsubscribed when their acknowledgement arrives
+        self.abandoned_requests: Dict[int, AccountSubscription] = {}
+        self.open_lock = asyncio.Lock()
+        # latest slot seen in the notifications of the connection
+        self.last_slot = None
+        # last slot seen before the connection dropped, compared to the first slot after
+        self.disconnect_slot = None
+        self.check_gap = False
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    async def open(self):
+        async with self.open_lock:
+            if self.websocket is not None:
+                return
+            self.websocket = await self.connect(self.websocket_rpc_url)
+            self.connected = True
+            self.reader = asyncio.create_task(self.read())
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+            self.reader = None
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+        self.connected = False
+
+    async def subscribe(self, subscription: AccountSubscription):
+        self.subscriptions[subscription.pub_key] = subscription
+        await self.open()
+        await self.send_subscribe(subscription)
+        await subscription.subscribed
+
+    async def send_subscribe(self, subscription: AccountSubscription):
+        # the future is kept across reconnects so subscribe() resolves after resubscribing
+        if subscription.subscribed is None or subscription.subscribed.done():
+            subscription.subscribed = asyncio.get_running_loop().create_future()
+        request_id = self.websocket.increment_counter_and_get_id()
+        self.pending_requests[request_id] = subscription
+        await self.websocket.send_data(subscription.make_request(request_id))
+
+    async def unsubscribe(self, pub_key: Pubkey):
+        subscription = self.subscriptions.pop(pub_key, None)
+        if subscription is None:
+            return
+        if self.abandon_requests(subscription) or subscription.subscription_id is None:
+            # not acknowledged yet, unsubscribed in dispatch once it is
+            return
+        self.subscriptions_by_id.pop(subscription.subscription_id, None)
+        if self.websocket is not None and self.connected:
+            await subscription.send_unsubscribe(self.websocket)
+
+    def forget(self, pub_key: Pubkey):
+        # for subscriptions the server has already removed, e.g. after a signature notification
+        subscription = self.subscriptions.pop(pub_key, None)
+        if subscription is None:
+            return
+        self.abandon_requests(subscription)
+        if subscription.subscription_id is not None:
+            self.subscriptions_by_id.pop(subscription.subscription_id, None)
+
+    def abandon_requests(self, subscription: AccountSubscription):
+        """
+        Moves the pending requests of a removed subscription to abandoned_requests.
+        Returns True if there were any.
+        """
+        request_ids = [
+            request_id
+            for request_id, pending in self.pending_requests.items()
+            if pending is subscription
+        ]
+        for request_id in request_ids:
+            self.abandoned_requests[request_id] = self.pending_requests.pop(request_id)
+        fail_future(subscription.subscribed, Exception("unsubscribed"))
+        return len(request_ids) > 0
+
+    def fail_request(self, request_id: int, error: Exception):
+        # the server rejected the subscription, the other subscriptions are not affected
+        self.abandoned_requests.pop(request_id, None)
+        subscription = self.pending_requests.pop(request_id, None)
+        if subscription is None:
+            return
+        print(f"subscription failed: {error}")
+        if self.subscriptions.get(subscription.pub_key) is subscription:
+            del self.subscriptions[subscription.pub_key]
+        fail_future(subscription.subscribed, error)
+
+    def give_up(self, error: Exception):
+        # the subscriptions are dropped, a later subscribe() opens a new connection
+        for subscription in list(self.subscriptions.values()) + list(
+            self.pending_requests.values()
+        ):
+            fail_future(subscription.subscribed, error)
+        self.subscriptions = {}
+        self.subscriptions_by_id = {}
+        self.pending_requests = {}
+        self.abandoned_requests = {}
+        self.websocket = None
+        self.reader = None
+
+    async def read(self):
+        while True:
+            try:
+                messages = await self.websocket.recv()
+            except asyncio.CancelledError:
+                break
+            except SubscriptionError as e:
+                self.fail_request(e.subscription.id, e)
+                continue
+            except Exception as e:
+                print(f"subscription connection closed: {e}")
+                if not await self.reconnect():
+                    self.give_up(
+                        Exception(
+                            f"failed to reconnect after {self.max_reconnect_attempts} attempts"
+                        )
+                    )
+                    break
+                continue
+            self.dispatch(messages)
+
+    async def reconnect(self):
+        self.connected = False
+        if not self.check_gap:
+            # keep the slot of the first drop if reconnecting several times in a row
+            self.disconnect_slot = self.last_slot
+        self.check_gap = True
+        attempt = 0
+        while (
+            self.max_reconnect_attempts is None or attempt < self.max_reconnect_attempts
+        ):
+            await asyncio.sleep(
+                get_backoff_seconds(
+                    attempt, self.reconnect_base_seconds, self.reconnect_max_seconds
+                )
+            )
+            attempt += 1
+            try:
+                try:
+                    await self.websocket.close()
+                except:
+                    pass
+                self.websocket = await self.connect(self.websocket_rpc_url)
+                self.subscriptions_by_id = {}
+                self.pending_requests = {}
+                self.abandoned_requests = {}
+                for subscription in list(self.subscriptions.values()):
+                    await self.send_subscribe(subscription)
+                self.connected = True
+                self.reconnect_count += 1
+                return True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"failed to reconnect: {e}")
+        return False
+
+    def dispatch(self, messages: list):
+        for message in messages:
+            if isinstance(message, SubscriptionResult):
+                abandoned = self.abandoned_requests.pop(message.id, None)
+                if abandoned is not None:
+                    asyncio.ensure_future(
+                        self.send_late_unsubscribe(abandoned, message.result)
+                    )
+                    continue
+                subscription = self.pending_requests.pop(message.id, None)
+                if subscription is None:
+                    continue
+                subscription.subscription_id = message.result
+                self.subscriptions_by_id[message.result] = subscription
+                if not subscription.subscribed.done():
+                    subscription.subscribed.set_result(message.result)
+                continue
+            subscription = self.subscriptions_by_id.get(
+                getattr(message, "subscription", None)
+            )
+            if subscription is None:
+                continue
+            self.notify(subscription, message)
+
+    async def send_late_unsubscribe(
+        self, subscription: AccountSubscription, subscription_id: int
+    ):
+        subscription.subscription_id = subscription_id
+        try:
+            await subscription.send_unsubscribe(self.websocket)
+        except Exception as e:
+            print(f"failed to unsubscribe: {e}")
+
+    def notify(self, subscription: AccountSubscription, message):
+        slot = message.result.context.slot
+        try:
+            call_callback(subscription.callback, subscription.pub_key, message)
+        except Exception as e:
+            print(f"subscription callback failed: {e}")
+        if subscription.last_slot is None or slot > subscription.last_slot:
+            subscription.last_slot = slot
+        subscription.last_update_time = time.time()
+        if self.check_gap:
+            # the first notification after reconnecting tells if slots were missed
+            self.check_gap = False
+            if self.disconnect_slot is None or slot > self.disconnect_slot + 1:
+                self.resync()
+        if self.last_slot is None or slot > self.last_slot:
+            self.last_slot = slot
+
+    def resync(self):
+        for subscription in list(self.subscriptions.values()):
+            if subscription.resync is None:
+                continue
+            try:
+                call_callback(subscription.resync, subscription.pub_key)
+            except Exception as e:
+                print(f"subscription resync failed: {e}")
+
+
+class SubscriptionManager:
+    """
+    Shares a small number of websocket connections between many account subscriptions.
+    A new connection is opened only when all connections hold max_subscriptions_per_connection.
+    """
+
+    def __init__(
+        self,
+        websocket_rpc_url: str,
+        commitment: Commitment = "confirmed",
+        max_subscriptions_per_connection: int = 1000,
+        connect: Callable = connect,
+        reconnect_base_seconds: float = 0.5,
+        reconnect_max_seconds: float = 30,
+        max_reconnect_attempts: int = None,
+    ):
+        self.websocket_rpc_url = websocket_rpc_url
+        self.commitment = commitment
+        self.max_subscriptions_per_connection = max_subscriptions_per_connection
+        self.connect = connect
+        self.reconnect_base_seconds = reconnect_base_seconds
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.connections: List[SubscriptionConnection] = []
+        self.connections_by_pub_key: Dict[Pubkey, SubscriptionConnection] = {}
+
+    def __len__(self):
+        return len(self.connections_by_pub_key)
+
+    def __contains__(self, pub_key: Pubkey):
+        return pub_key in self.connections_by_pub_key
+
+    def get_connection(self):
+        for connection in self.connections:
+            if len(connection) < self.max_subscriptions_per_connection:
+                return connection
+        connection = SubscriptionConnection(
+            self.websocket_rpc_url,
+            self.connect,
+            self.reconnect_base_seconds,
+            self.reconnect_max_seconds,
+            self.max_reconnect_attempts,
+        )
+        self.connections.append(connection)
+        return connection
+
+    async def subscribe_account(
+        self,
+        pub_key: Pubkey,
+        callback: Callable,
+        encoding: str = "base64",
+        commitment: Commitment = None,
+        resync: Callable = None,
+    ):
+        if pub_key in self.connections_by_pub_key:
+            await self.unsubscribe_account(pub_key)
+        connection = self.get_connection()
+        self.connections_by_pub_key[pub_key] = connection
+        subscription = AccountSubscription(
+            pub_key, callback, commitment or self.commitment, encoding, resync
+        )
+        try:
+            await connection.subscribe(subscription)
+        except Exception:
+            if self.connections_by_pub_key.get(pub_key) is connection:
+                await self.unsubscribe_account(pub_key)
+            raise
+        return subscription
+
+    async def unsubscribe_account(self, pub_key: Pubkey):
+        connection = self.connections_by_pub_key.pop(pub_key, None)
+        if connection is None:
+            return
+        await connection.unsubscribe(pub_key)
+        if len(connection) == 0:
+            await connection.close()
+            self.connections.remove(connection)
+
+    def get_subscription(self, pub_key: Pubkey) -> AccountSubscription:
+        connection = self.connections_by_pub_key.get(pub_key)
+        if connection is None:
+            return None
+        return connection.subscriptions.get(pub_key)
+
+    def get_last_update_time(self, pub_key: Pubkey):
+        """
+        Returns the time of the last notification (or resync) of the account, None if never updated.
+        """
+        subscription = self.get_subscription(pub_key)
+        if subscription is None:
+            return None
+        return subscription.last_update_time
+
+    def get_staleness_seconds(self, pub_key: Pubkey):
+        last_update_time = self.get_last_update_time(pub_key)
+        if last_update_time is None:
+            return float("inf")
+        return time.time() - last_update_time
+
+    def is_stale(self, pub_key: Pubkey, max_age_seconds: float):
+        """
+        True if the connection is down or the account was not updated for max_age_seconds.
+        Note that quiet accounts don't get notifications, so pick max_age_seconds accordingly.
+        """
+        connection = self.connections_by_pub_key.get(pub_key)
+        if connection is None or not connection.connected:
+            return True
+        return self.get_staleness_seconds(pub_key) > max_age_seconds
+
+    def is_pool_stale(self, pool: RaydiumPool, max_age_seconds: float):
+        return any(
+            self.is_stale(pub_key, max_age_seconds)
+            for pub_key in get_pool_accounts(pool)
+        )
+
+    async def add_pool(self, pool: RaydiumPool, callback: Callable = None):
+        """
+        Keeps the vault balances and the pnl of the pool up to date from the notifications
+        of the vaults and the AMM account.
+        The optional callback is called with the pool after every update.
+        After a reconnect with a slot gap, the pool is resynced once by RPC.
+        """
+        resync_tasks = []
+
+        def on_vault_notification(vault: Pubkey, notification):
+            pool.update_vault_balance_from_account_data(
+                vault,
+                notification.result.value.data,
+                notification.result.context.slot,
+            )
+            if callback is not None:
+                callback(pool)
+
+        def on_amm_notification(amm_id: Pubkey, notification):
+            pool.update_need_take_pnl_from_account_data(
+                notification.result.value.data, notification.result.context.slot
+            )
+            if callback is not None:
+                callback(pool)
+
+        async def resync_vaults():
+            try:
+                update_async = getattr(pool, "update_pool_vaults_balance_async", None)
+                if update_async is not None:
+                    await update_async(self.commitment)
+                else:
+                    await asyncio.to_thread(
+                        pool.update_pool_vaults_balance, self.commitment
+                    )
+            except Exception as e:
+                print(f"failed to resync the pool: {e}")
+                return
+            for pub_key in get_pool_accounts(pool):
+                subscription = self.get_subscription(pub_key)
+                if subscription is not None:
+                    subscription.last_update_time = time.time()
+            if callback is not None:
+                callback(pool)
+
+        def on_resync(pub_key: Pubkey):
+            # every account may ask for a resync, but the pool is refreshed only once
+            if len(resync_tasks) > 0 and not resync_tasks[0].done():
+                return
+            resync_tasks[:] = [asyncio.ensure_future(resync_vaults())]
+
+        await asyncio.gather(
+            self.subscribe_account(pool.amm_id, on_amm_notification, resync=on_resync),
+            self.subscribe_account(
+                pool.get_base_vault(), on_vault_notification, resync=on_resync
+            ),
+            self.subscribe_account(
+                pool.get_quote_vault(), on_vault_notification, resync=on_resync
+            ),
+        )
+
+    async def remove_pool(self, pool: RaydiumPool):
+        await asyncio.gather(
+            *[self.unsubscribe_account(pub_key) for pub_key in get_pool_accounts(pool)]
+        )
+
+    async def close(self):
+        await asyncio.gather(*[connection.close() for connection in self.connections])
+        self.connections = []
+        self.connections_by_pub_key = {}
@@ -0,0 +1,179 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List
+
+from solana.rpc.api import Client
+from solders.transaction import VersionedTransaction
+
+import soldexpy.solana.client_wrapper as client_wrapper
+
+
+def get_endpoint_name(client: Client):
+    return getattr(client._provider, "endpoint_uri", str(client))
+
+
+class EndpointStats:
+    """
+    Accept latency (exponentially smoothed) and error rate of one RPC endpoint.
+    """
+
+    def __init__(self, name: str, latency_smoothing: float = 0.2):
+        self.name = name
+        self.latency_smoothing = latency_smoothing
+        self.sent_count = 0
+        self.accepted_count = 0
+        self.error_count = 0
+        self.latency_seconds = None
+        self.last_latency_seconds = None
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def record_sent(self):
+        with self.lock:
+            self.sent_count += 1
+
+    def record_accepted(self, latency_seconds: float):
+        with self.lock:
+            self.accepted_count += 1
+            self.last_latency_seconds = latency_seconds
+            if self.latency_seconds is None:
+                self.latency_seconds = latency_seconds
+            else:
+                self.latency_seconds += self.latency_smoothing * (
+                    latency_seconds - self.latency_seconds
+                )
+
+    def record_error(self, error: Exception):
+        with self.lock:
+            self.error_count += 1
+            self.last_error = error
+
+    def get_sample_count(self):
+        return self.accepted_count + self.error_count
+
+    def get_error_rate(self):
+        sample_count = self.get_sample_count()
+        if sample_count == 0:
+            return 0
+        return self.error_count / sample_count
+
+    def __repr__(self):
+        return (
+            f"EndpointStats({self.name}, sent={self.sent_count}, "
+            f"accepted={self.accepted_count}, errors={self.error_count}, "
+            f"latency={self.latency_seconds})"
+        )
+
+
+class TransactionBroadcaster:
+    """
+    Sends the same signed transaction to several RPC endpoints concurrently and returns the
+    response of the first endpoint that accepts it; the other sends finish in the background.
+    An endpoint is demoted (skipped) once it has min_samples results and its error rate is over
+    max_error_rate or its latency is over max_latency_ratio times the best one. Every
+    probe_every-th broadcast goes to all endpoints so a demoted endpoint can recover.
+    """
+
+    def __init__(
+        self,
+        clients: List[Client],
+        min_samples: int = 5,
+        max_error_rate: float = 0.5,
+        max_latency_ratio: float = 3,
+        probe_every: int = 10,
+        latency_smoothing: float = 0.2,
+    ):
+        if len(clients) == 0:
+            raise Exception("No endpoint to broadcast to")
+        self.clients = clients
+        self.stats = [
+            EndpointStats(get_endpoint_name(client), latency_smoothing)
+            for client in clients
+        ]
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.max_latency_ratio = max_latency_ratio
+        self.probe_every = probe_every
+        self.broadcast_count = 0
+        self.executor: ThreadPoolExecutor = None
+
+    def is_demoted(self, stats: EndpointStats, best_latency_seconds: float):
+        if stats.get_sample_count() < self.min_samples:
+            return False
+        if stats.get_error_rate() > self.max_error_rate:
+            return True
+        return (
+            stats.latency_seconds is not None
+            and best_latency_seconds is not None
+            and stats.latency_seconds > best_latency_seconds * self.max_latency_ratio
+        )
+
+    def get_endpoint_indexes(self) -> List[int]:
+        """
+        Indexes of the endpoints to send the next broadcast to.
+        """
+        self.broadcast_count += 1
+        if self.probe_every and self.broadcast_count % self.probe_every == 0:
+            return list(range(len(self.clients)))
+        latencies = [
+            stats.latency_seconds
+            for stats in self.stats
+            if stats.latency_seconds is not None
+        ]
+        best_latency_seconds = min(latencies) if len(latencies) > 0 else None
+        indexes = [
+            i
+            for i, stats in enumerate(self.stats)
+            if not self.is_demoted(stats, best_latency_seconds)
+        ]
+        # never demote everything
+        return indexes or list(range(len(self.clients)))
+
+    def get_stats(self) -> List[EndpointStats]:
+        # best first
+        return sorted(
+            self.stats,
+            key=lambda stats: (
+                stats.get_error_rate(),
+                (
+                    stats.latency_seconds
+                    if stats.latency_seconds is not None
+                    else float("inf")
+                ),
+            ),
+        )
+
+    def send_to(self, index: int, transaction: VersionedTransaction):
+        stats = self.stats[index]
+        stats.record_sent()
+        start = time.perf_counter()
+        try:
+            resp = client_wrapper.send_transaction(self.clients[index], transaction)
+        except Exception as e:
+            stats.record_error(e)
+            raise
+        stats.record_accepted(time.perf_counter() - start)
+        return resp
+
+    def send_transaction(self, transaction: VersionedTransaction):
+        if self.executor is None:
+            # room for the slow sends of previous broadcasts
+            self.executor = ThreadPoolExecutor(max_workers=4 * len(self.clients))
+        futures = {
+            self.executor.submit(self.send_to, index, transaction)
+            for index in self.get_endpoint_indexes()
+        }
+        errors = []
+        while len(futures) > 0:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                errors.append(future.exception())
+        raise Exception(f"Transaction rejected by all endpoints: {errors}")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -1,18 +1,36 @@
 import asyncio
+import concurrent.futures
 import json
 import time
+from typing import List
 
 from solana.rpc.api import Client
+from solders.address_lookup_table_account import AddressLookupTableAccount
 from solders.keypair import Keypair
+from solders.token.associated import get_associated_token_address
+from spl.token.client import Token
 
 import soldexpy.solana.client_wrapper as client_wrapper
 from soldexpy.common.direction import Direction
 from soldexpy.common.unit import Unit
 from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.compute_unit_estimator import ComputeUnitEstimator
+from soldexpy.solana_tx_util.swap_message_template import (
+    SwapMessageTemplate,
+    SwapMessageTemplateCache,
+)
 from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.priority_fee_estimator import PriorityFeeEstimator
+from soldexpy.solana_util.signature_confirmer import ThreadedSignatureConfirmer
 from soldexpy.solana_util.solana_websocket_subscription import (
+    put_dropping_oldest,
     subscribe_to_account_using_queue,
+    subscribe_to_accounts_using_queue,
 )
+from soldexpy.solana_util.subscription_manager import SubscriptionManager
+from soldexpy.solana_util.transaction_broadcaster import TransactionBroadcaster
+from soldexpy.token_account_registry import TokenAccountRegistry
+from soldexpy.wrapped_sol_account import WrappedSolAccount
 
 
 class Swap:
@@ -25,6 +43,15 @@ class Swap:
         rate_limit_seconds: float = 0.1,
         rate_limit_sleep_seconds: float = 0.01,
         confirm_tx_sleep_seconds: float = 1,
+        token_account_registry: TokenAccountRegistry = None,
+        message_template_cache: SwapMessageTemplateCache = None,
+        address_lookup_tables: List[AddressLookupTableAccount] = None,
+        transaction_broadcaster: TransactionBroadcaster = None,
+        wrapped_sol_account: WrappedSolAccount = None,
+        compute_unit_estimator: ComputeUnitEstimator = None,
+        priority_fee_estimator: PriorityFeeEstimator = None,
+        fee_percentile: int = None,
+        signature_confirmer: ThreadedSignatureConfirmer = None,
     ):
         self.client = client
         self.pool = pool
@@ -33,7 +60,34 @@ class Swap:
         self.rate_limit_seconds = rate_limit_seconds
         self.rate_limit_sleep_seconds = rate_limit_sleep_seconds
         self.confirm_tx_sleep_seconds = confirm_tx_sleep_seconds
+        # token accounts of the payer, so buy doesn't query them by RPC
+        self.token_account_registry = token_account_registry
+        # compiled swap messages, so buy/sell only patch the amounts and the blockhash
+        if message_template_cache is not None and wrapped_sol_account is not None:
+            # the templates spend a temporary WSOL account per buy
+            raise Exception(
+                "message_template_cache can't be combined with wrapped_sol_account"
+            )
+        self.message_template_cache = message_template_cache
+        self.rent_lamports = None
+        # e.g. the lookup table of the pool (see address_lookup_table)
+        self.address_lookup_tables = address_lookup_tables
+        # sends to several endpoints at once instead of the endpoint of the client
+        self.transaction_broadcaster = transaction_broadcaster
+        # long-lived WSOL account of the payer, instead of a throwaway one per swap
+        self.wrapped_sol_account = wrapped_sol_account
+        # sizes the compute unit limit of the builder from cached simulations
+        self.compute_unit_estimator = compute_unit_estimator
+        # compute unit price from the recent fees of the pool, at fee_percentile
+        self.priority_fee_estimator = priority_fee_estimator
+        self.fee_percentile = fee_percentile
+        # confirms by signatureSubscribe (and batched polling) instead of sleep-polling
+        self.signature_confirmer = signature_confirmer
+        if priority_fee_estimator is not None:
+            priority_fee_estimator.add_pool(pool)
         self.price = None
+        # time of the last local price update, used to detect a stale price
+        self.price_update_time = None
         self.default_keypair = None
         # update local price on init
         self.update_local_price()
@@ -44,17 +98,42 @@ class Swap:
         )
 
     def update_local_price(self):
-        whatever_the_amount_to_calculate = self.virtual_amount
-        _, new_base_price, _, _ = self.pool.get_price(
-            whatever_the_amount_to_calculate,
-            Direction.SPEND_QUOTE_TOKEN,
-            Unit.BASE_TOKEN,
-            False,
-        )
+        new_base_price = self.pool.get_base_price(Unit.BASE_TOKEN)
         if self.price != new_base_price:
             self.price = new_base_price
+        self.price_update_time = time.time()
+
+    def get_price_staleness_seconds(self):
+        if self.price_update_time is None:
+            return float("inf")
+        return time.time() - self.price_update_time
+
+    def is_price_stale(self, max_age_seconds: float):
+        """
+        True if the local price was not updated for max_age_seconds.
+        Note that quiet pools don't get notifications, so pick max_age_seconds accordingly.
+        """
+        return self.get_price_staleness_seconds() > max_age_seconds
+
+    async def update_local_price_from_pool(self):
+        # run the blocking RPC in a thread so the event loop (and the websocket) keeps running
+        await asyncio.to_thread(
+            self.pool.update_pool_vaults_balance, self.client.commitment
+        )
+        self.update_local_price()
 
-    async def update_local_price_on_changes(self, websocket_rpc_url: str = None):
+    async def update_local_price_on_changes(
+        self, websocket_rpc_url: str = None, use_vault_notifications: bool = False
+    ):
+        """
+        Watches the pool and updates the local price on changes.
+        With use_vault_notifications, both vaults are subscribed with base64 encoding and the
+        balances are decoded from the notifications, so no RPC is needed per change.
+        The subscription reconnects when the websocket drops. With vault notifications, the
+        vault balances are resynced by RPC once if the first notification after the reconnect
+        shows a slot gap since the last one before the drop. Without, every notification
+        refreshes the balances by RPC anyway.
+        """
         if websocket_rpc_url == None:
             # try to use the same endpoint as the client
             websocket_rpc_url = self.client._provider.endpoint_uri.replace(
@@ -69,16 +148,71 @@ class Swap:
                     await queue.get()
                     while not queue.empty():
                         queue.get_nowait()
-                    self.pool.update_pool_vaults_balance(self.client.commitment)
-                    self.update_local_price()
+                    await self.update_local_price_from_pool()
                     queue.task_done()
                     # rate limiting
                     while time.time() - last_time < self.rate_limit_seconds:
-                        time.sleep(self.rate_limit_sleep_seconds)
+                        await asyncio.sleep(self.rate_limit_sleep_seconds)
                     last_time = time.time()
                 except asyncio.CancelledError:
                     break
 
+        async def update_price_from_vault_notifications(queue: asyncio.Queue):
+            # slot of the last notification, and of the last one before the connection dropped
+            last_slot = None
+            disconnect_slot = None
+            check_gap = False
+            while True:
+                try:
+                    items = [await queue.get()]
+                    while not queue.empty():
+                        items.append(queue.get_nowait())
+                    resync = False
+                    for item in items:
+                        if item is None:
+                            # reconnected (None is put before subscribing again)
+                            if not check_gap:
+                                disconnect_slot = last_slot
+                            check_gap = True
+                            continue
+                        slot = item[1].result.context.slot
+                        if check_gap:
+                            check_gap = False
+                            resync = resync or (
+                                disconnect_slot is None or slot > disconnect_slot + 1
+                            )
+                        if last_slot is None or slot > last_slot:
+                            last_slot = slot
+                    if resync:
+                        # notifications may have been missed
+                        await self.update_local_price_from_pool()
+                    for item in items:
+                        if item is None:
+                            continue
+                        vault, notification = item
+                        self.pool.update_vault_balance_from_account_data(
+                            vault,
+                            notification.result.value.data,
+                            notification.result.context.slot,
+                        )
+                    self.update_local_price()
+                    queue.task_done()
+                except asyncio.CancelledError:
+                    break
+
+        if use_vault_notifications:
+            await asyncio.gather(
+                subscribe_to_accounts_using_queue(
+                    queue,
+                    websocket_rpc_url,
+                    [self.pool.get_base_vault(), self.pool.get_quote_vault()],
+                    self.client.commitment,
+                    on_reconnect=lambda: put_dropping_oldest(queue, None),
+                ),
+                update_price_from_vault_notifications(queue),
+            )
+            return
+
         await asyncio.gather(
             subscribe_to_account_using_queue(
                 queue,
@@ -89,6 +223,189 @@ class Swap:
             update_price(queue),
         )
 
+    async def subscribe_local_price_on_changes(
+        self, subscription_manager: SubscriptionManager
+    ):
+        """
+        Same as update_local_price_on_changes with vault notifications, but shares
+        the websocket connection of the subscription manager with other pools.
+        """
+        await subscription_manager.add_pool(
+            self.pool, lambda pool: self.update_local_price()
+        )
+
+    def add_destination_token_account(self, payer: Keypair, resp):
+        self.add_destination_token_account_from_status(payer, resp.value[0])
+
+    def add_destination_token_account_from_status(self, payer: Keypair, status):
+        # a confirmed buy has created the destination account if it was missing
+        if self.token_account_registry is None:
+            return
+        if status is None or status.err is not None:
+            return
+        mint = self.pool.base_mint_address
+        account = get_associated_token_address(payer.pubkey(), mint)
+        if account not in self.token_account_registry:
+            self.token_account_registry.add_token_account(account, mint)
+
+    def settle_wrapped_sol_account(self, signature, status):
+        # the WSOL amount changes of the swap are applied only once it is confirmed
+        if self.wrapped_sol_account is None:
+            return
+        if status is not None and status.err is None:
+            self.wrapped_sol_account.confirm(signature, status.slot)
+            return
+        if status is not None:
+            # failed, the account may not have been created either
+            self.wrapped_sol_account.discard(signature)
+        # an unknown outcome keeps its spend reserved until it times out
+        self.wrapped_sol_account.invalidate()
+
+    def get_confirmed_status(self, future):
+        # the PendingSignature, None if it timed out
+        if future.cancelled() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def on_buy_done(self, payer: Keypair, txn_signature, future):
+        status = self.get_confirmed_status(future)
+        self.settle_wrapped_sol_account(txn_signature, status)
+        self.add_destination_token_account_from_status(payer, status)
+
+    def on_sell_done(self, txn_signature, future):
+        self.settle_wrapped_sol_account(
+            txn_signature, self.get_confirmed_status(future)
+        )
+
+    def watch_signature(self, txn_signature, wait_for_confirmation: bool, on_done):
+        # the handle (a future of the PendingSignature) right away, or the PendingSignature
+        future = self.signature_confirmer.watch(
+            txn_signature, self.pool.vault_balance_slot
+        )
+        if not wait_for_confirmation:
+            future.add_done_callback(on_done)
+            return future
+        # done here rather than in a callback, so it is done when buy/sell returns
+        concurrent.futures.wait([future])
+        on_done(future)
+        return future.result()
+
+    def get_rent_lamports(self):
+        # rent of the temporary WSOL account, fetched once
+        if self.rent_lamports is None:
+            self.rent_lamports = Token.get_min_balance_rent_for_exempt_for_account(
+                self.client
+            )
+        return self.rent_lamports
+
+    def get_message_template(
+        self, payer: Keypair, direction: Direction, rent_lamports: int = 0
+    ) -> SwapMessageTemplate:
+        # the destination account is created (idempotent) unless the registry knows it
+        create_token_account = not (
+            self.token_account_registry is not None
+            and self.token_account_registry.loaded
+            and self.token_account_registry.has_associated_token_account(
+                self.pool.base_mint_address
+            )
+        )
+        return self.message_template_cache.get(
+            self.pool,
+            payer,
+            direction,
+            rent_lamports,
+            create_token_account=create_token_account,
+            address_lookup_tables=self.address_lookup_tables,
+        )
+
+    def get_unit_price(self):
+        # None keeps the unit price of the template
+        if self.priority_fee_estimator is None:
+            return None
+        return self.priority_fee_estimator.get_unit_price(
+            self.pool, self.fee_percentile
+        )
+
+    def get_template_compute_units(self, template: SwapMessageTemplate):
+        # (key, cached units) as in SwapTransactionBuilder, (None, None) without an estimator
+        if self.compute_unit_estimator is None:
+            return None, None
+        key = template.get_compute_unit_key(self.compute_unit_estimator)
+        return key, self.compute_unit_estimator.get_cached_units(key)
+
+    def get_template_unit_limit(self, units: int):
+        # None keeps the unit budget of the template
+        if units is None:
+            return None
+        return self.compute_unit_estimator.get_unit_limit(units)
+
+    def build_from_template(
+        self, template: SwapMessageTemplate, amount_in: int, amount_out: int
+    ):
+        recent_blockhash = client_wrapper.get_latest_blockhash(self.client)
+        unit_price = self.get_unit_price()
+        key, units = self.get_template_compute_units(template)
+        if (
+            key is not None
+            and units is None
+            and self.compute_unit_estimator.should_simulate(key)
+        ):
+            # simulated with the unit budget of the template
+            units = self.compute_unit_estimator.simulate(
+                template.build(amount_in, amount_out, recent_blockhash, unit_price)
+            )
+            self.compute_unit_estimator.set_units(key, units)
+        return template.build(
+            amount_in,
+            amount_out,
+            recent_blockhash,
+            unit_price,
+            unit_limit=self.get_template_unit_limit(units),
+        )
+
+    def make_buy_transaction(self, payer: Keypair, amount_in: int, amount_out: int):
+        if self.message_template_cache is not None:
+            template = self.get_message_template(
+                payer, Direction.SPEND_QUOTE_TOKEN, self.get_rent_lamports()
+            )
+            return self.build_from_template(template, amount_in, amount_out)
+        swap_transaction_builder = SwapTransactionBuilder(
+            self.client,
+            self.pool,
+            payer,
+            token_account_registry=self.token_account_registry,
+            address_lookup_tables=self.address_lookup_tables,
+            wrapped_sol_account=self.wrapped_sol_account,
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+        swap_transaction_builder.append_buy(amount_in, amount_out, True)
+        return swap_transaction_builder.compile_versioned_transaction()
+
+    def make_sell_transaction(self, payer: Keypair, amount_in: int, amount_out: int):
+        if self.message_template_cache is not None:
+            template = self.get_message_template(payer, Direction.SPEND_BASE_TOKEN)
+            return self.build_from_template(template, amount_in, amount_out)
+        swap_transaction_builder = SwapTransactionBuilder(
+            self.client,
+            self.pool,
+            payer,
+            token_account_registry=self.token_account_registry,
+            address_lookup_tables=self.address_lookup_tables,
+            wrapped_sol_account=self.wrapped_sol_account,
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+        swap_transaction_builder.append_sell(amount_in, amount_out)
+        return swap_transaction_builder.compile_versioned_transaction()
+
+    def send_transaction(self, transaction):
+        if self.transaction_broadcaster is not None:
+            return self.transaction_broadcaster.send_transaction(transaction)
+        return client_wrapper.send_transaction(self.client, transaction)
+
     def buy(
         self,
         amount_in: float,
@@ -96,20 +413,30 @@ class Swap:
         payer: Keypair,
         update_vault: bool = True,
         confirm_commitment: str = "confirmed",
+        wait_for_confirmation: bool = True,
     ):
-        # get min amount out
-        _, _, expect_amount_out, _ = self.pool.get_price(
-            amount_in, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN, update_vault
-        )
-        amount_out = expect_amount_out * (1 - slippage_allowance)
+        if update_vault:
+            self.pool.update_pool_vaults_balance()
         # convert to tx format
         amount_in = self.pool.convert_quote_token_amount_to_tx_format(amount_in)
-        amount_out = self.pool.convert_base_token_amount_to_tx_format(amount_out)
+        # get min amount out (exact integer amount the program computes)
+        expect_amount_out = self.pool.get_amount_out(
+            amount_in, Direction.SPEND_QUOTE_TOKEN
+        )
+        amount_out = int(expect_amount_out * (1 - slippage_allowance))
         # buy
-        swap_transaction_builder = SwapTransactionBuilder(self.client, self.pool, payer)
-        swap_transaction_builder.append_buy(amount_in, amount_out, True)
-        transaction = swap_transaction_builder.compile_versioned_transaction()
-        txn_signature = client_wrapper.send_transaction(self.client, transaction).value
+        transaction = self.make_buy_transaction(payer, amount_in, amount_out)
+        txn_signature = self.send_transaction(transaction).value
+        if self.signature_confirmer is not None:
+            return self.watch_signature(
+                txn_signature,
+                wait_for_confirmation,
+                lambda future: self.on_buy_done(payer, txn_signature, future),
+            )
+        if not wait_for_confirmation:
+            # the outcome is never known here, so the tracked WSOL amount can't be trusted
+            self.settle_wrapped_sol_account(txn_signature, None)
+            return txn_signature
         # wait for confirmation
         resp = client_wrapper.confirm_transaction(
             self.client,
@@ -117,6 +444,8 @@ class Swap:
             confirm_commitment,
             self.confirm_tx_sleep_seconds,
         )
+        self.settle_wrapped_sol_account(txn_signature, resp.value[0])
+        self.add_destination_token_account(payer, resp)
         return resp
 
     def sell(
@@ -126,20 +455,30 @@ class Swap:
         payer: Keypair,
         update_vault: bool = True,
         confirm_commitment: str = "confirmed",
+        wait_for_confirmation: bool = True,
     ):
-        # get min amount out
-        _, _, expect_amount_out, _ = self.pool.get_price(
-            amount_in, Direction.SPEND_BASE_TOKEN, Unit.BASE_TOKEN, update_vault
-        )
-        amount_out = expect_amount_out * (1 - slippage_allowance)
+        if update_vault:
+            self.pool.update_pool_vaults_balance()
         # convert to tx format
         amount_in = self.pool.convert_base_token_amount_to_tx_format(amount_in)
-        amount_out = self.pool.convert_quote_token_amount_to_tx_format(amount_out)
+        # get min amount out (exact integer amount the program computes)
+        expect_amount_out = self.pool.get_amount_out(
+            amount_in, Direction.SPEND_BASE_TOKEN
+        )
+        amount_out = int(expect_amount_out * (1 - slippage_allowance))
         # sell
-        swap_transaction_builder = SwapTransactionBuilder(self.client, self.pool, payer)
-        swap_transaction_builder.append_sell(amount_in, amount_out)
-        transaction = swap_transaction_builder.compile_versioned_transaction()
-        txn_signature = client_wrapper.send_transaction(self.client, transaction).value
+        transaction = self.make_sell_transaction(payer, amount_in, amount_out)
+        txn_signature = self.send_transaction(transaction).value
+        if self.signature_confirmer is not None:
+            return self.watch_signature(
+                txn_signature,
+                wait_for_confirmation,
+                lambda future: self.on_sell_done(txn_signature, future),
+            )
+        if not wait_for_confirmation:
+            # the outcome is never known here, so the tracked WSOL amount can't be trusted
+            self.settle_wrapped_sol_account(txn_signature, None)
+            return txn_signature
         # wait for confirmation
         resp = client_wrapper.confirm_transaction(
             self.client,
@@ -147,6 +486,7 @@ class Swap:
             confirm_commitment,
             self.confirm_tx_sleep_seconds,
         )
+        self.settle_wrapped_sol_account(txn_signature, resp.value[0])
         return resp
 
     def get_pool_lp_supply(self, signer: Keypair, commitment="confirmed"):
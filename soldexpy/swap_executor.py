@@ -0,0 +1,424 @@
+import math
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+from solana.rpc.api import Client
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from spl.token.client import Token
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.raydium_swap_math import get_amount_out
+from soldexpy.solana_tx_util.compute_unit_estimator import ComputeUnitEstimator
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.blockhash_prefetcher import (
+    MAX_PROCESSING_AGE,
+    SECONDS_PER_BLOCK,
+)
+from soldexpy.solana_util.priority_fee_estimator import PriorityFeeEstimator
+from soldexpy.solana_util.signature_confirmer import ThreadedSignatureConfirmer
+from soldexpy.solana_util.transaction_broadcaster import TransactionBroadcaster
+from soldexpy.token_account_registry import TokenAccountRegistry
+
+
+class SwapOrder:
+    """
+    amount is spent in direction: quote token (e.g. SOL) for a buy, base token for a sell,
+    as a balance (not the raw amount) like Swap.buy / Swap.sell.
+    """
+
+    def __init__(
+        self,
+        pool: RaydiumPool,
+        direction: Direction,
+        amount: float,
+        slippage_allowance: float,
+    ):
+        self.pool = pool
+        self.direction = direction
+        self.amount = amount
+        self.slippage_allowance = slippage_allowance
+
+    def __repr__(self):
+        return (
+            f"SwapOrder({self.pool.pool_address}, {self.direction}, "
+            f"{self.amount}, {self.slippage_allowance})"
+        )
+
+
+class SwapOrderResult:
+    """
+    What happened to one order of a batch. error is the exception that stopped it before
+    confirmation (build, send or confirmation timeout), err the error of the confirmed transaction.
+    """
+
+    def __init__(self, order: SwapOrder, index: int, amount_in: int, amount_out: int):
+        self.order = order
+        # position of the order in the batch
+        self.index = index
+        # raw amount in and minimum amount out
+        self.amount_in = amount_in
+        self.amount_out = amount_out
+        self.signature = None
+        self.status = None
+        self.err = None
+        self.error: Exception = None
+        self.send_time = None
+        self.confirm_time = None
+        # of the blockhash of the transaction, to rebuild it once it is about to expire
+        self.last_valid_block_height = None
+        self.blockhash_time = None
+
+    @property
+    def succeeded(self):
+        return self.confirm_time is not None and self.error is None and self.err is None
+
+    def set_blockhash_expiry(self, last_valid_block_height: int):
+        # the transaction is built right after the blockhash is fetched
+        self.last_valid_block_height = last_valid_block_height
+        self.blockhash_time = time.time()
+
+    def get_latency_seconds(self):
+        # from send to confirmation
+        if self.send_time is None or self.confirm_time is None:
+            return None
+        return self.confirm_time - self.send_time
+
+    def __repr__(self):
+        return (
+            f"SwapOrderResult({self.index}, {self.signature}, "
+            f"succeeded={self.succeeded}, error={self.error or self.err})"
+        )
+
+
+def get_percentile(values: List[float], percentile: float):
+    # nearest rank
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(len(values) * percentile / 100), 1)
+    return values[rank - 1]
+
+
+class SwapExecutor:
+    """
+    Executes a batch of orders across many pools: the reserves of all pools are refreshed by
+    getMultipleAccounts once, the orders are quoted in order (an order sees the reserves left by
+    the previous orders on the same pool), built and signed with one blockhash, then sent and
+    confirmed by at most max_concurrency at a time. execute() yields the results as they confirm.
+    The orders on the same pool are sent in sequence, each once the previous one is confirmed (or
+    failed), so they land in the order they were quoted in; the pools run concurrently. A failed
+    order doesn't stop the next ones of its pool, which were quoted as if it had landed.
+    A transaction whose blockhash has less than min_remaining_blocks left by the time it is sent
+    is rebuilt with a fresh blockhash.
+    The destination accounts are created with the idempotent instruction, so several buys of the
+    same token in one batch don't fail on each other.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        payer: Keypair,
+        max_concurrency: int = 8,
+        confirm_commitment: str = "confirmed",
+        confirm_tx_sleep_seconds: float = 1,
+        token_account_registry: TokenAccountRegistry = None,
+        address_lookup_tables: Dict[Pubkey, List[AddressLookupTableAccount]] = None,
+        compute_unit_estimator: ComputeUnitEstimator = None,
+        priority_fee_estimator: PriorityFeeEstimator = None,
+        fee_percentile: int = None,
+        transaction_broadcaster: TransactionBroadcaster = None,
+        signature_confirmer: ThreadedSignatureConfirmer = None,
+        min_remaining_blocks: int = 20,
+    ):
+        self.client = client
+        self.payer = payer
+        self.max_concurrency = max_concurrency
+        self.confirm_commitment = confirm_commitment
+        self.confirm_tx_sleep_seconds = confirm_tx_sleep_seconds
+        self.token_account_registry = token_account_registry
+        # amm id -> lookup tables of the pool
+        self.address_lookup_tables = address_lookup_tables or {}
+        self.compute_unit_estimator = compute_unit_estimator
+        self.priority_fee_estimator = priority_fee_estimator
+        self.fee_percentile = fee_percentile
+        self.transaction_broadcaster = transaction_broadcaster
+        # confirms by signatureSubscribe (and batched polling) instead of sleep-polling
+        self.signature_confirmer = signature_confirmer
+        self.min_remaining_blocks = min_remaining_blocks
+        # rent of the temporary WSOL account of the buys, fetched once
+        self.rent_lamports = None
+        # results of the last batch, in order
+        self.results: List[SwapOrderResult] = []
+        self.start_time = None
+        self.end_time = None
+
+    @staticmethod
+    def get_unique_pools(orders: List[SwapOrder]) -> List[RaydiumPool]:
+        return list({id(order.pool): order.pool for order in orders}.values())
+
+    def update_reserves(self, orders: List[SwapOrder]):
+        RaydiumPool.update_many_pool_vaults_balance(
+            self.client, self.get_unique_pools(orders)
+        )
+
+    def quote(self, orders: List[SwapOrder]) -> List[SwapOrderResult]:
+        """
+        Raw amount in and minimum amount out of every order from the current reserves.
+        """
+        # id(pool) -> (base reserve, quote reserve) after the previous orders
+        reserves = {}
+        results = []
+        for index, order in enumerate(orders):
+            pool = order.pool
+            base_reserve, quote_reserve = reserves.get(id(pool)) or pool.get_reserves()
+            fee_numerator, fee_denominator = pool.get_swap_fee_ratio()
+            if order.direction == Direction.SPEND_QUOTE_TOKEN:
+                amount_in = pool.convert_quote_token_amount_to_tx_format(order.amount)
+                expect_amount_out = get_amount_out(
+                    amount_in,
+                    quote_reserve,
+                    base_reserve,
+                    fee_numerator,
+                    fee_denominator,
+                )
+                reserves[id(pool)] = (
+                    base_reserve - expect_amount_out,
+                    quote_reserve + amount_in,
+                )
+            elif order.direction == Direction.SPEND_BASE_TOKEN:
+                amount_in = pool.convert_base_token_amount_to_tx_format(order.amount)
+                expect_amount_out = get_amount_out(
+                    amount_in,
+                    base_reserve,
+                    quote_reserve,
+                    fee_numerator,
+                    fee_denominator,
+                )
+                reserves[id(pool)] = (
+                    base_reserve + amount_in,
+                    quote_reserve - expect_amount_out,
+                )
+            else:
+                raise Exception("Unsupported direction")
+            amount_out = int(expect_amount_out * (1 - order.slippage_allowance))
+            results.append(SwapOrderResult(order, index, amount_in, amount_out))
+        return results
+
+    def get_rent_lamports(self):
+        if self.rent_lamports is None:
+            self.rent_lamports = Token.get_min_balance_rent_for_exempt_for_account(
+                self.client
+            )
+        return self.rent_lamports
+
+    def make_builder(self, pool: RaydiumPool) -> SwapTransactionBuilder:
+        return SwapTransactionBuilder(
+            self.client,
+            pool,
+            self.payer,
+            token_account_registry=self.token_account_registry,
+            use_idempotent_create=True,
+            address_lookup_tables=self.address_lookup_tables.get(pool.amm_id),
+            compute_unit_estimator=self.compute_unit_estimator,
+            priority_fee_estimator=self.priority_fee_estimator,
+            fee_percentile=self.fee_percentile,
+        )
+
+    def make_transaction(
+        self,
+        result: SwapOrderResult,
+        recent_blockhash: Hash,
+        last_valid_block_height: int,
+    ):
+        result.set_blockhash_expiry(last_valid_block_height)
+        builder = self.make_builder(result.order.pool)
+        if result.order.direction == Direction.SPEND_QUOTE_TOKEN:
+            builder.append_buy(
+                result.amount_in,
+                result.amount_out,
+                rent_lamports=self.get_rent_lamports(),
+            )
+        else:
+            builder.append_sell(result.amount_in, result.amount_out)
+        return builder.compile_versioned_transaction(
+            recent_blockhash, last_valid_block_height
+        )
+
+    def build(self, results: List[SwapOrderResult]):
+        """
+        Signed transactions of the results, all with the same blockhash (None if the build failed).
+        """
+        (
+            recent_blockhash,
+            last_valid_block_height,
+        ) = client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        transactions = []
+        for result in results:
+            try:
+                transactions.append(
+                    self.make_transaction(
+                        result, recent_blockhash, last_valid_block_height
+                    )
+                )
+            except Exception as e:
+                result.error = e
+                transactions.append(None)
+        return transactions
+
+    def send_transaction(self, transaction):
+        if self.transaction_broadcaster is not None:
+            return self.transaction_broadcaster.send_transaction(transaction)
+        return client_wrapper.send_transaction(self.client, transaction)
+
+    def set_confirmed(self, result: SwapOrderResult, status):
+        result.confirm_time = time.time()
+        result.status = status
+        result.err = status.err if status is not None else None
+        if result.err is None:
+            self.add_destination_token_account(result)
+
+    def add_destination_token_account(self, result: SwapOrderResult):
+        # a confirmed buy has created the destination account if it was missing
+        if (
+            self.token_account_registry is None
+            or result.order.direction != Direction.SPEND_QUOTE_TOKEN
+        ):
+            return
+        mint = result.order.pool.base_mint_address
+        account = get_associated_token_address(self.payer.pubkey(), mint)
+        if account not in self.token_account_registry:
+            self.token_account_registry.add_token_account(account, mint)
+
+    def is_blockhash_expired(self, result: SwapOrderResult) -> bool:
+        """
+        True if the blockhash of the transaction has less than min_remaining_blocks left, e.g.
+        after the previous orders of its pool took long to confirm.
+        """
+        is_expired = getattr(self.client.blockhash_cache, "is_expired", None)
+        if is_expired is not None and result.last_valid_block_height is not None:
+            # BlockhashPrefetcher estimates the current block height
+            return is_expired(
+                result.last_valid_block_height - self.min_remaining_blocks
+            )
+        # otherwise the blockhash was fetched from the RPC node at build time
+        age_blocks = (time.time() - result.blockhash_time) / SECONDS_PER_BLOCK
+        return age_blocks > MAX_PROCESSING_AGE - self.min_remaining_blocks
+
+    def rebuild(self, result: SwapOrderResult):
+        (
+            recent_blockhash,
+            last_valid_block_height,
+        ) = client_wrapper.get_latest_blockhash_with_expiry(self.client)
+        return self.make_transaction(result, recent_blockhash, last_valid_block_height)
+
+    def confirm(self, result: SwapOrderResult):
+        if self.signature_confirmer is not None:
+            pending = self.signature_confirmer.watch(
+                result.signature, result.order.pool.vault_balance_slot
+            ).result()
+            self.set_confirmed(result, pending)
+            return
+        resp = client_wrapper.confirm_transaction(
+            self.client,
+            result.signature,
+            self.confirm_commitment,
+            self.confirm_tx_sleep_seconds,
+        )
+        self.set_confirmed(result, resp.value[0])
+
+    def send_and_confirm(self, result: SwapOrderResult, transaction):
+        try:
+            if self.is_blockhash_expired(result):
+                transaction = self.rebuild(result)
+            result.send_time = time.time()
+            result.signature = self.send_transaction(transaction).value
+            self.confirm(result)
+        except Exception as e:
+            result.error = e
+        return result
+
+    @staticmethod
+    def group_by_pool(results: List[SwapOrderResult], transactions: List) -> List[List]:
+        """
+        (result, transaction) of the built orders per pool, in the order they were quoted in.
+        """
+        groups = {}
+        for result, transaction in zip(results, transactions):
+            if transaction is not None:
+                groups.setdefault(id(result.order.pool), []).append(
+                    (result, transaction)
+                )
+        return list(groups.values())
+
+    def send_and_confirm_in_order(self, group: List, done: queue.Queue):
+        for result, transaction in group:
+            done.put(self.send_and_confirm(result, transaction))
+
+    def execute(
+        self, orders: List[SwapOrder], update_reserves: bool = True
+    ) -> Iterator[SwapOrderResult]:
+        """
+        Yields the result of every order as it confirms (or fails).
+        """
+        self.start_time = time.time()
+        self.end_time = None
+        if update_reserves:
+            self.update_reserves(orders)
+        self.results = self.quote(orders)
+        transactions = self.build(self.results)
+        groups = self.group_by_pool(self.results, transactions)
+        done = queue.Queue()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [
+                executor.submit(self.send_and_confirm_in_order, group, done)
+                for group in groups
+            ]
+            # the orders that failed to build
+            for result, transaction in zip(self.results, transactions):
+                if transaction is None:
+                    yield result
+            for _ in range(sum(len(group) for group in groups)):
+                yield done.get()
+            for future in futures:
+                future.result()
+        self.end_time = time.time()
+
+    def execute_all(
+        self, orders: List[SwapOrder], update_reserves: bool = True
+    ) -> List[SwapOrderResult]:
+        # in the order of the orders
+        for _ in self.execute(orders, update_reserves):
+            pass
+        return self.results
+
+    def get_report(self) -> dict:
+        """
+        Throughput (confirmed orders per second) and send-to-confirmation latency of the last batch.
+        """
+        end_time = self.end_time or time.time()
+        elapsed_seconds = end_time - self.start_time if self.start_time else 0
+        succeeded = [result for result in self.results if result.succeeded]
+        latencies = [
+            result.get_latency_seconds()
+            for result in self.results
+            if result.get_latency_seconds() is not None
+        ]
+        return {
+            "order_count": len(self.results),
+            "succeeded_count": len(succeeded),
+            "failed_count": len(self.results) - len(succeeded),
+            "elapsed_seconds": elapsed_seconds,
+            "throughput": (
+                len(succeeded) / elapsed_seconds if elapsed_seconds > 0 else 0
+            ),
+            "p50_latency_seconds": get_percentile(latencies, 50),
+            "p99_latency_seconds": get_percentile(latencies, 99),
+        }
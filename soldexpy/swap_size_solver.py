@@ -0,0 +1,115 @@
+"""
+Closed-form solvers on the constant product curve, the inverse of the quotes:
+the amount-in for an exact amount-out and the largest amount-in under a price impact or price bound.
+The float solvers follow the model of RaydiumPool.get_price (fee as a fraction, e.g. 0.0025).
+The raw solvers follow the integer arithmetic of the program
+(see raydium_swap_math) and return the exact largest raw amount.
+"""
+
+import math
+
+from soldexpy.raydium_swap_math import get_amount_out, get_swap_fee
+
+
+def get_amount_in_for_amount_out(amount_out, reserve_in, reserve_out, fee: float):
+    # amount_out = reserve_out * e / (reserve_in + e), e = amount_in * (1 - fee)
+    return reserve_in * amount_out / ((reserve_out - amount_out) * (1 - fee))
+
+
+def get_max_amount_in_for_price_impact(max_price_impact, reserve_in, fee: float):
+    """
+    The price impact is 1 - (execution price / pool price) without the fee, as get_price
+    reports it, which is e / (reserve_in + e) for the amount-in after the fee e.
+    """
+    return max_price_impact * reserve_in / (1 - max_price_impact) / (1 - fee)
+
+
+def get_max_amount_in_for_price(max_price, reserve_in, reserve_out, fee: float):
+    """
+    The largest amount-in that keeps the pool price after the swap, in token-in per token-out,
+    under max_price. Returns 0 if the pool price is already over it.
+    """
+    # (reserve_in + e) / (reserve_out - out) = (reserve_in + e) ** 2 / k <= max_price
+    amount_in = ((max_price * reserve_in * reserve_out) ** 0.5 - reserve_in) / (1 - fee)
+    return max(amount_in, 0)
+
+
+def get_amount_in_after_fee(amount_in: int, fee_numerator: int, fee_denominator: int):
+    return amount_in - get_swap_fee(amount_in, fee_numerator, fee_denominator)
+
+
+def get_max_raw_amount_in(
+    amount_in_after_fee: int, fee_numerator: int, fee_denominator: int
+) -> int:
+    """
+    The largest raw amount-in whose amount after the (rounded up) fee is at most amount_in_after_fee.
+    """
+    if amount_in_after_fee <= 0:
+        return 0
+    amount_in = (
+        amount_in_after_fee * fee_denominator // (fee_denominator - fee_numerator)
+    )
+    # the estimate is off by the rounding of the fee only, step to the exact boundary
+    while (
+        get_amount_in_after_fee(amount_in + 1, fee_numerator, fee_denominator)
+        <= amount_in_after_fee
+    ):
+        amount_in += 1
+    while (
+        amount_in > 0
+        and get_amount_in_after_fee(amount_in, fee_numerator, fee_denominator)
+        > amount_in_after_fee
+    ):
+        amount_in -= 1
+    return amount_in
+
+
+def get_max_raw_amount_in_for_price_impact(
+    max_price_impact: float,
+    reserve_in: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    amount_in_after_fee = math.floor(
+        max_price_impact * reserve_in / (1 - max_price_impact)
+    )
+    return get_max_raw_amount_in(amount_in_after_fee, fee_numerator, fee_denominator)
+
+
+def get_max_raw_amount_in_for_price(
+    max_price: float,
+    reserve_in: int,
+    reserve_out: int,
+    fee_numerator: int,
+    fee_denominator: int,
+) -> int:
+    """
+    Same as get_max_amount_in_for_price on raw reserves (max_price in raw token-in per raw token-out).
+    The pool price after the swap is checked with the exact amount-out of the program.
+    """
+
+    def is_within_price(amount_in: int):
+        amount_out = get_amount_out(
+            amount_in, reserve_in, reserve_out, fee_numerator, fee_denominator
+        )
+        amount_in_after_fee = get_amount_in_after_fee(
+            amount_in, fee_numerator, fee_denominator
+        )
+        return (reserve_in + amount_in_after_fee) <= max_price * (
+            reserve_out - amount_out
+        )
+
+    if not is_within_price(0):
+        return 0
+    amount_in_after_fee = math.floor(
+        math.sqrt(max_price * reserve_in * reserve_out) - reserve_in
+    )
+    amount_in = get_max_raw_amount_in(
+        amount_in_after_fee, fee_numerator, fee_denominator
+    )
+    # the float estimate is close, step to the exact boundary
+    while is_within_price(amount_in + 1):
+        amount_in += 1
+    while amount_in > 0 and not is_within_price(amount_in):
+        amount_in -= 1
+    return amount_in
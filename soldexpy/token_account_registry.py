@@ -0,0 +1,135 @@
+import asyncio
+from typing import Dict, List
+
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+from solana.rpc.types import TokenAccountOpts
+from solders.pubkey import Pubkey
+from solders.rpc.responses import GetTokenAccountsByOwnerResp
+from solders.token.associated import get_associated_token_address
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.layout.spl_token_layout import SPL_ACCOUNT_SIZE
+from soldexpy.solana_util.raydium_pool_info import get_token_account_amount
+
+
+class TokenAccountRegistry:
+    """
+    The token accounts of one owner, loaded once with a single getTokenAccountsByOwner and
+    then kept up to date from our own confirmed transactions and the account subscriptions.
+    It only knows about the accounts it has seen, e.g. accounts created by another program
+    after load() are unknown until load() is called again.
+    """
+
+    def __init__(
+        self, client: Client, owner: Pubkey, program_id: Pubkey = TOKEN_PROGRAM_ID
+    ):
+        self.client = client
+        self.owner = owner
+        self.program_id = program_id
+        self.mints_by_account: Dict[Pubkey, Pubkey] = {}
+        self.amounts_by_account: Dict[Pubkey, int] = {}
+        self.loaded = False
+        # set by subscribe(), the accounts added later are subscribed too
+        self.subscription_manager = None
+        self.loop: asyncio.AbstractEventLoop = None
+
+    def __len__(self):
+        return len(self.mints_by_account)
+
+    def __contains__(self, account: Pubkey):
+        return account in self.mints_by_account
+
+    def load(self, commitment: Commitment = None):
+        resp = client_wrapper.get_token_accounts_by_owner(
+            self.client,
+            self.owner,
+            TokenAccountOpts(program_id=self.program_id),
+            commitment,
+        )
+        self.set_token_accounts(resp)
+
+    def set_token_accounts(self, resp: GetTokenAccountsByOwnerResp):
+        # updated in place, so the subscriptions of the accounts still there are kept
+        accounts = set()
+        for keyed_account in resp.value:
+            accounts.add(keyed_account.pubkey)
+            self.update_from_account_data(
+                keyed_account.pubkey, keyed_account.account.data
+            )
+        for account in list(self.mints_by_account):
+            if account not in accounts:
+                self.remove_token_account(account)
+        self.loaded = True
+
+    def get_associated_token_address(self, mint: Pubkey) -> Pubkey:
+        return get_associated_token_address(self.owner, mint)
+
+    def has_associated_token_account(self, mint: Pubkey) -> bool:
+        return self.get_associated_token_address(mint) in self.mints_by_account
+
+    def get_token_accounts(self, mint: Pubkey) -> List[Pubkey]:
+        return [
+            account
+            for account, account_mint in self.mints_by_account.items()
+            if account_mint == mint
+        ]
+
+    def get_amount(self, account: Pubkey) -> int:
+        return self.amounts_by_account.get(account)
+
+    def add_token_account(self, account: Pubkey, mint: Pubkey, amount: int = None):
+        # amount is None if unknown, e.g. for an account created by our own transaction
+        is_new = account not in self.mints_by_account
+        self.mints_by_account[account] = mint
+        self.amounts_by_account[account] = amount
+        if is_new and self.subscription_manager is not None:
+            self.run_in_loop(self.subscribe_account(account))
+
+    def remove_token_account(self, account: Pubkey):
+        if self.mints_by_account.pop(account, None) is None:
+            return
+        self.amounts_by_account.pop(account, None)
+        if self.subscription_manager is not None:
+            self.run_in_loop(self.subscription_manager.unsubscribe_account(account))
+
+    def update_from_account_data(self, account: Pubkey, data: bytes):
+        if len(data) < SPL_ACCOUNT_SIZE:
+            # the account was closed
+            self.remove_token_account(account)
+            return
+        self.add_token_account(
+            account, Pubkey(data[0:32]), get_token_account_amount(data)
+        )
+
+    async def subscribe(self, subscription_manager):
+        """
+        Keeps the accounts up to date (amounts and closes) by the SubscriptionManager.
+        The accounts added later, e.g. by our own confirmed buys, are subscribed when added.
+        """
+        self.subscription_manager = subscription_manager
+        self.loop = asyncio.get_running_loop()
+        for account in list(self.mints_by_account):
+            await self.subscribe_account(account)
+
+    async def subscribe_account(self, account: Pubkey):
+        try:
+            await self.subscription_manager.subscribe_account(
+                account, self.on_notification
+            )
+        except Exception as e:
+            print(f"failed to subscribe to the token account: {e}")
+
+    def on_notification(self, account: Pubkey, notification):
+        self.update_from_account_data(account, notification.result.value.data)
+
+    def run_in_loop(self, coroutine):
+        # accounts can be added from another thread, e.g. by the synchronous Swap
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            return asyncio.ensure_future(coroutine)
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
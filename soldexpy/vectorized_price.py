@@ -0,0 +1,113 @@
+from typing import List
+
+import numpy as np
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+
+# Swap fee in percent, the default for balances without a pool (the pools pass their own)
+SWAP_FEE = 0.25
+# Network fee: not considered, same as RaydiumPool.get_price
+NETWORK_FEE = 0.00
+
+
+def get_prices(
+    base_vault_balances,
+    quote_vault_balances,
+    in_amounts,
+    direction: Direction,
+    return_price_unit: Unit = Unit.QUOTE_TOKEN,
+    swap_fee=SWAP_FEE,
+):
+    """
+    Vectorized RaydiumPool.get_price. swap_fee is in percent (a scalar or an array broadcast like
+    the balances). The balances and amounts are broadcast against each other,
+    e.g. balances of shape (pools, 1) and amounts of shape (amounts,) give (pools, amounts) arrays.
+    The operations are done in the same order as the scalar path, so the results match exactly.
+    Returns:
+        [0]: estimated prices based on in_amounts
+        [1]: estimated prices based on the pool balances
+        [2]: expected amounts-out
+        [3]: expected amounts-in that deducted the swap fee and the network fee
+    """
+    base_vault_balance = np.asarray(base_vault_balances, dtype=np.float64)
+    quote_vault_balance = np.asarray(quote_vault_balances, dtype=np.float64)
+    in_amount = np.asarray(in_amounts, dtype=np.float64)
+    swap_fee = np.asarray(swap_fee, dtype=np.float64)
+
+    # the scalar path raises ZeroDivisionError, arrays get inf/nan instead
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pool_k = base_vault_balance * quote_vault_balance
+
+        if direction == Direction.SPEND_QUOTE_TOKEN:
+            delta_quote_vault = in_amount - in_amount * (swap_fee / 100)
+            delta_quote_vault = delta_quote_vault - NETWORK_FEE
+            delta_base_vault = base_vault_balance - pool_k / (
+                quote_vault_balance + delta_quote_vault
+            )
+        elif direction == Direction.SPEND_BASE_TOKEN:
+            delta_base_vault = in_amount - in_amount * (swap_fee / 100)
+            delta_base_vault = delta_base_vault - NETWORK_FEE
+            delta_quote_vault = quote_vault_balance - pool_k / (
+                base_vault_balance + delta_base_vault
+            )
+        else:
+            raise Exception("Unsupported direction")
+
+        base_price = base_vault_balance / quote_vault_balance
+        price = delta_base_vault / delta_quote_vault
+
+        if return_price_unit == Unit.BASE_TOKEN:
+            return_price = price
+            return_base_price = base_price
+        elif return_price_unit == Unit.QUOTE_TOKEN:
+            return_price = 1 / price
+            return_base_price = 1 / base_price
+        else:
+            raise Exception("Unsupported return price unit")
+
+    # the base price depends on the pools only and the amount-in on the amounts only,
+    # broadcast them so every result has the same shape
+    shape = return_price.shape
+    return_base_price = np.broadcast_to(return_base_price, shape)
+    delta_base_vault = np.broadcast_to(delta_base_vault, shape)
+    delta_quote_vault = np.broadcast_to(delta_quote_vault, shape)
+    if direction == Direction.SPEND_QUOTE_TOKEN:
+        return return_price, return_base_price, delta_base_vault, delta_quote_vault
+    return return_price, return_base_price, delta_quote_vault, delta_base_vault
+
+
+def get_pools_vaults_balances(pools: List):
+    """
+    Returns the base and quote vault balances of the pools as (pools, 1) arrays,
+    ready to be broadcast against an array of amounts.
+    """
+    base_vault_balances = np.array(
+        [pool.base_vault_balance for pool in pools], dtype=np.float64
+    )
+    quote_vault_balances = np.array(
+        [pool.quote_vault_balance for pool in pools], dtype=np.float64
+    )
+    return base_vault_balances[:, np.newaxis], quote_vault_balances[:, np.newaxis]
+
+
+def get_pools_prices(
+    pools: List,
+    in_amounts,
+    direction: Direction,
+    return_price_unit: Unit = Unit.QUOTE_TOKEN,
+):
+    """
+    Quotes every amount on every pool from the cached vault balances (no RPC).
+    Returns (pools, amounts) arrays in the same order as get_prices.
+    """
+    base_vault_balances, quote_vault_balances = get_pools_vaults_balances(pools)
+    swap_fees = np.array([pool.get_swap_fee_percent() for pool in pools])
+    return get_prices(
+        base_vault_balances,
+        quote_vault_balances,
+        np.asarray(in_amounts, dtype=np.float64),
+        direction,
+        return_price_unit,
+        swap_fees[:, np.newaxis],
+    )
@@ -0,0 +1,199 @@
+import time
+from typing import Dict, List
+
+import solders.system_program as sp
+import spl.token.instructions as spl_token
+from solana.rpc.api import Client
+from solana.rpc.commitment import Commitment
+from solders.instruction import Instruction
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+from solders.token.associated import get_associated_token_address
+from spl.token.constants import TOKEN_PROGRAM_ID, WRAPPED_SOL_MINT
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.layout.spl_token_layout import SPL_ACCOUNT_SIZE
+from soldexpy.solana_tx_util.associated_token_account import (
+    create_idempotent_associated_token_account,
+)
+from soldexpy.solana_util.raydium_pool_info import get_token_account_amount
+
+
+class WrappedSolAccount:
+    """
+    The long-lived WSOL associated token account of one owner, reused by every swap instead of
+    a throwaway account per buy and a WSOL ATA opened and closed per sell.
+    amount is the wrapped amount of the confirmed transactions. The change of a transaction (the
+    spent amount in of a buy, the minimum amount out of a sell, a top up, the create or the close
+    of the account) is pending until its confirm() or discard(): meanwhile its spend is already
+    reserved for the next builds, but what it adds is not counted. A buy is topped up (transfer + sync_native) only when it needs more.
+    Call load() (or invalidate() before the next build) to resync it, e.g. after a failed swap.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        owner: Pubkey,
+        top_up_lamports: int = 0,
+        program_id: Pubkey = TOKEN_PROGRAM_ID,
+        pending_timeout_seconds: float = 90,
+    ):
+        self.client = client
+        self.owner = owner
+        # a top up wraps at least this much so the next buys don't need one
+        self.top_up_lamports = top_up_lamports
+        self.program_id = program_id
+        self.address = get_associated_token_address(owner, WRAPPED_SOL_MINT)
+        self.exists = False
+        self.amount = None
+        # slot of the account data amount was read from (None if unknown)
+        self.amount_slot = None
+        # builder or transaction signature -> [amount change, build time, exists afterwards
+        # (None if unchanged)]
+        self.pending: Dict[object, list] = {}
+        # a pending change neither confirmed nor discarded by then is dropped, e.g. never sent
+        self.pending_timeout_seconds = pending_timeout_seconds
+
+    @property
+    def loaded(self):
+        return self.amount is not None
+
+    def load(self, commitment: Commitment = None):
+        resp = client_wrapper.get_account_info(self.client, self.address, commitment)
+        self.set_account_info_resp(resp)
+
+    def set_account_info_resp(self, resp):
+        self.update_from_account_data(
+            resp.value.data if resp.value else b"", resp.context.slot
+        )
+
+    def update_from_account_data(self, data: bytes, slot: int = None):
+        self.amount_slot = slot
+        if len(data) < SPL_ACCOUNT_SIZE:
+            # not created yet (or closed)
+            self.exists = False
+            self.amount = 0
+            return
+        self.exists = True
+        self.amount = get_token_account_amount(data)
+
+    def invalidate(self):
+        # the pending changes are kept, the transactions may still land
+        self.amount = None
+
+    def add_pending(self, key, delta: int, exists: bool = None):
+        pending = self.pending.setdefault(key, [0, time.time(), None])
+        pending[0] += delta
+        if exists is not None:
+            pending[2] = exists
+
+    def set_pending_signature(self, key, signature: Signature):
+        # the changes added while building are settled by the signature of the transaction
+        pending = self.pending.pop(key, None)
+        if pending is not None:
+            self.pending[signature] = pending
+
+    def confirm(self, signature: Signature, slot: int = None):
+        pending = self.pending.pop(signature, None)
+        if pending is None or self.amount is None:
+            return
+        # account data read at or after slot already has it
+        if slot is None or self.amount_slot is None or slot > self.amount_slot:
+            delta, _, exists = pending
+            if exists is False:
+                # closed, the wrapped SOL went back to the owner
+                self.exists = False
+                self.amount = 0
+                return
+            if exists:
+                self.exists = True
+            self.amount += delta
+
+    def discard(self, signature: Signature):
+        self.pending.pop(signature, None)
+
+    def get_available_amount(self) -> int:
+        now = time.time()
+        for key, pending in list(self.pending.items()):
+            if now - pending[1] > self.pending_timeout_seconds:
+                self.pending.pop(key, None)
+        # the spends of the pending transactions are reserved, what they add is not counted yet
+        return self.amount + sum(
+            min(pending[0], 0) for pending in list(self.pending.values())
+        )
+
+    def get_top_up_amount(self, amount_in: int) -> int:
+        shortfall = amount_in - self.get_available_amount()
+        if shortfall <= 0:
+            return 0
+        return max(shortfall, self.top_up_lamports)
+
+    def make_create_instructions(self, payer: Pubkey, key) -> List[Instruction]:
+        # idempotent, so it is repeated until the create pending under key is confirmed
+        if self.exists:
+            return []
+        # the associated token account program takes the rent from the payer
+        self.add_pending(key, 0, True)
+        return [
+            create_idempotent_associated_token_account(
+                payer, self.owner, WRAPPED_SOL_MINT
+            )
+        ]
+
+    def make_top_up_instructions(
+        self, payer: Pubkey, amount_in: int, key
+    ) -> List[Instruction]:
+        """
+        Instructions that make amount_in available (none if it already is).
+        The spent amount_in (less the top up) is pending under key.
+        """
+        instructions = []
+        lamports = self.get_top_up_amount(amount_in)
+        if lamports > 0:
+            instructions += self.make_create_instructions(payer, key)
+            instructions.append(
+                sp.transfer(
+                    sp.TransferParams(
+                        from_pubkey=payer, to_pubkey=self.address, lamports=lamports
+                    )
+                )
+            )
+            instructions.append(
+                spl_token.sync_native(
+                    spl_token.SyncNativeParams(
+                        program_id=self.program_id, account=self.address
+                    )
+                )
+            )
+        self.add_pending(key, lamports - amount_in)
+        return instructions
+
+    def receive(self, amount_out: int, key):
+        # the minimum amount out of a sell, the actual amount can be more
+        self.add_pending(key, amount_out)
+
+    def make_unwrap_instructions(self, key) -> List[Instruction]:
+        # closing the account returns the wrapped SOL and the rent to the owner, pending under key
+        self.add_pending(key, 0, False)
+        return [
+            spl_token.close_account(
+                spl_token.CloseAccountParams(
+                    account=self.address,
+                    dest=self.owner,
+                    owner=self.owner,
+                    program_id=self.program_id,
+                )
+            )
+        ]
+
+    async def subscribe(self, subscription_manager):
+        """
+        Keeps the amount exact from the account notifications of the SubscriptionManager.
+        """
+
+        def on_notification(account: Pubkey, notification):
+            self.update_from_account_data(
+                notification.result.value.data, notification.result.context.slot
+            )
+
+        await subscription_manager.subscribe_account(self.address, on_notification)
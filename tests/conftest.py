@@ -1,16 +1,28 @@
+import asyncio
 import json
 from unittest.mock import MagicMock, patch
 
 from pytest import fixture
 from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair
+from solders.pubkey import Pubkey
 
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.async_wallet import AsyncWallet
+from soldexpy.layout.spl_token_layout import SPL_ACCOUNT_SIZE
 from soldexpy.raydium_pool import RaydiumPool
 from soldexpy.wallet import Wallet
+from tests.solana.mock_async_client_wrapper import MockAsyncClientWrapper
 from tests.solana.mock_client_cache import MockClientCache
 from tests.solana.mock_client_wrapper import MockClientWrapper
 
 
+def make_token_account_data(mint: Pubkey, owner: Pubkey, amount: int):
+    data = bytes(mint) + bytes(owner) + amount.to_bytes(8, "little")
+    return data + bytes(SPL_ACCOUNT_SIZE - len(data))
+
+
 @fixture
 def mock_client_cache():
     with open("tests/expected_response.json", "r") as f:
@@ -30,9 +42,11 @@ def patch_client_wrapper(mock_client_wrapper: MockClientWrapper):
         get_token_account_balance=mock_client_wrapper.get_token_account_balance,
         get_balance=mock_client_wrapper.get_balance,
         get_account_info=mock_client_wrapper.get_account_info,
+        get_multiple_accounts=mock_client_wrapper.get_multiple_accounts,
         get_account_info_json_parsed=mock_client_wrapper.get_account_info_json_parsed,
         get_token_accounts_by_owner=mock_client_wrapper.get_token_accounts_by_owner,
         get_latest_blockhash=mock_client_wrapper.get_latest_blockhash,
+        get_latest_blockhash_resp=mock_client_wrapper.get_latest_blockhash_resp,
     ) as mocks:
         yield mocks
 
@@ -52,3 +66,44 @@ def wallet(client) -> Wallet:
     payer = Keypair().pubkey()
     wallet = Wallet(client, payer)
     return wallet
+
+
+@fixture
+def mock_async_client_wrapper(mock_client_wrapper: MockClientWrapper):
+    return MockAsyncClientWrapper(mock_client_wrapper)
+
+
+@fixture
+def patch_async_client_wrapper(mock_async_client_wrapper: MockAsyncClientWrapper):
+    with patch.multiple(
+        "soldexpy.solana.async_client_wrapper",
+        get_token_account_balance=mock_async_client_wrapper.get_token_account_balance,
+        get_balance=mock_async_client_wrapper.get_balance,
+        get_account_info=mock_async_client_wrapper.get_account_info,
+        get_multiple_accounts=mock_async_client_wrapper.get_multiple_accounts,
+        get_account_info_json_parsed=mock_async_client_wrapper.get_account_info_json_parsed,
+        get_token_accounts_by_owner=mock_async_client_wrapper.get_token_accounts_by_owner,
+        get_latest_blockhash=mock_async_client_wrapper.get_latest_blockhash,
+        get_latest_blockhash_resp=mock_async_client_wrapper.get_latest_blockhash_resp,
+    ) as mocks:
+        yield mocks
+
+
+@fixture
+def async_client(patch_async_client_wrapper) -> AsyncClient:
+    return AsyncClient(None)
+
+
+@fixture
+def async_pool(async_client: AsyncClient, mock_client_cache: MockClientCache):
+    return asyncio.run(
+        AsyncRaydiumPool.create(
+            async_client, mock_client_cache.get_pool_address_for_tests()
+        )
+    )
+
+
+@fixture
+def async_wallet(async_client: AsyncClient) -> AsyncWallet:
+    payer = Keypair().pubkey()
+    return AsyncWallet(async_client, payer)
@@ -0,0 +1,68 @@
+from typing import List
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.types import TokenAccountOpts
+from solders.pubkey import Pubkey
+
+from tests.solana.mock_client_wrapper import MockClientWrapper
+
+
+# async version of the mock client wrapper (uses the same mock client cache)
+class MockAsyncClientWrapper:
+    def __init__(self, mock_client_wrapper: MockClientWrapper):
+        self.mock_client_wrapper = mock_client_wrapper
+
+    async def get_token_account_balance(
+        self, client: AsyncClient, address: Pubkey, commitment: Commitment = None
+    ):
+        return self.mock_client_wrapper.get_token_account_balance(
+            client, address, commitment
+        )
+
+    async def get_balance(
+        self, client: AsyncClient, address: Pubkey, commitment: Commitment = None
+    ):
+        return self.mock_client_wrapper.get_balance(client, address, commitment)
+
+    async def get_account_info(
+        self, client: AsyncClient, address: Pubkey, commitment: Commitment = None
+    ):
+        return self.mock_client_wrapper.get_account_info(client, address, commitment)
+
+    async def get_multiple_accounts(
+        self,
+        client: AsyncClient,
+        addresses: List[Pubkey],
+        commitment: Commitment = None,
+        min_context_slot: int = None,
+    ):
+        return self.mock_client_wrapper.get_multiple_accounts(
+            client, addresses, commitment, min_context_slot
+        )
+
+    async def get_account_info_json_parsed(
+        self, client: AsyncClient, address: Pubkey, commitment: Commitment = None
+    ):
+        return self.mock_client_wrapper.get_account_info_json_parsed(
+            client, address, commitment
+        )
+
+    async def get_token_accounts_by_owner(
+        self,
+        client: AsyncClient,
+        address: Pubkey,
+        opts: TokenAccountOpts,
+        commitment: Commitment = None,
+    ):
+        return self.mock_client_wrapper.get_token_accounts_by_owner(
+            client, address, opts, commitment
+        )
+
+    async def get_latest_blockhash_resp(
+        self, client: AsyncClient, commitment: Commitment = None
+    ):
+        return self.mock_client_wrapper.get_latest_blockhash_resp(client, commitment)
+
+    async def get_latest_blockhash(self, client: AsyncClient):
+        return self.mock_client_wrapper.get_latest_blockhash(client)
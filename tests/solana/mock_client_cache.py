@@ -1,3 +1,7 @@
+import base64
+import json
+
+
 # holding the mock client cache class for testing and having the ability to amend the cache for testing purposes
 class MockClientCache:
     def __init__(self, cache):
@@ -31,3 +35,22 @@ class MockClientCache:
 
     def __setitem__(self, key, value):
         self.cache[key] = value
+
+    def amend_cache_for_account_info(self, address, data: bytes, owner, slot=0):
+        self.cache["get_account_info"][str(address)] = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": {
+                    "context": {"slot": slot, "apiVersion": "0"},
+                    "value": {
+                        "lamports": 1000000,
+                        "data": [base64.b64encode(data).decode(), "base64"],
+                        "owner": str(owner),
+                        "executable": False,
+                        "rentEpoch": 0,
+                        "space": len(data),
+                    },
+                },
+                "id": 0,
+            }
+        )
@@ -1,12 +1,21 @@
+import json
+from typing import List
+
 from solana.rpc.api import Client
 from solana.rpc.commitment import Commitment
+from solana.rpc.core import RPCException
 from solana.rpc.types import TokenAccountOpts
 from solders.pubkey import Pubkey
+from solders.rpc.errors import (
+    MinContextSlotNotReached,
+    MinContextSlotNotReachedMessage,
+)
 from solders.rpc.responses import (
     GetAccountInfoJsonParsedResp,
     GetAccountInfoResp,
     GetBalanceResp,
     GetLatestBlockhashResp,
+    GetMultipleAccountsResp,
     GetTokenAccountBalanceResp,
     GetTokenAccountsByOwnerResp,
 )
@@ -37,6 +46,40 @@ class MockClientWrapper:
         resp_json = self.cache["get_account_info"][str(address)]
         return GetAccountInfoResp.from_json(resp_json)
 
+    def get_multiple_accounts(
+        self,
+        client: Client,
+        addresses: List[Pubkey],
+        commitment: Commitment = None,
+        min_context_slot: int = None,
+    ):
+        # assemble the response from the cached get_account_info responses
+        slot = 0
+        value = []
+        for address in addresses:
+            resp_json = self.cache["get_account_info"].get(str(address))
+            if resp_json is None:
+                value.append(None)
+                continue
+            result = json.loads(resp_json)["result"]
+            slot = max(slot, result["context"]["slot"])
+            value.append(result["value"])
+        if min_context_slot is not None and min_context_slot > slot:
+            raise RPCException(
+                MinContextSlotNotReachedMessage(
+                    "Minimum context slot has not been reached",
+                    MinContextSlotNotReached(slot),
+                )
+            )
+        resp_json = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": {"context": {"slot": slot}, "value": value},
+                "id": 0,
+            }
+        )
+        return GetMultipleAccountsResp.from_json(resp_json)
+
     def get_account_info_json_parsed(
         self, client: Client, address: Pubkey, commitment: Commitment = None
     ):
@@ -53,6 +96,9 @@ class MockClientWrapper:
         resp_json = self.cache["get_token_accounts_by_owner"][str(address)]
         return GetTokenAccountsByOwnerResp.from_json(resp_json)
 
-    def get_latest_blockhash(self, client: Client):
+    def get_latest_blockhash_resp(self, client: Client, commitment: Commitment = None):
         resp_json = self.cache["get_latest_blockhash"]
         return GetLatestBlockhashResp.from_json(resp_json)
+
+    def get_latest_blockhash(self, client: Client):
+        return self.get_latest_blockhash_resp(client).value.blockhash
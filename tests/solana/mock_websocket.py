@@ -0,0 +1,140 @@
+import asyncio
+import base64
+import itertools
+import json
+
+from solana.rpc.websocket_api import SubscriptionError
+from solders.rpc.responses import SubscriptionError as SoldersSubscriptionError
+from solders.rpc.responses import parse_websocket_message
+
+
+# in-memory replacement of SolanaWsClientProtocol for the subscription tests
+class MockWebsocket:
+    subscription_counter = itertools.count(100)
+
+    def __init__(self, before_ack=None, respond=None):
+        # called with (websocket, request) before the acknowledgement is pushed
+        self.before_ack = before_ack
+        # called with (websocket, request) instead of pushing the acknowledgement
+        self.respond = respond
+        self.request_counter = itertools.count()
+        self.messages = asyncio.Queue()
+        self.sent = []
+        self.subscription_ids = {}
+        self.unsubscribed = []
+        self.closed = False
+
+    def increment_counter_and_get_id(self):
+        return next(self.request_counter) + 1
+
+    async def send_data(self, request):
+        self.sent.append(request)
+        subscription_id = next(self.subscription_counter)
+        key = getattr(request, "account", None) or request.signature
+        self.subscription_ids[str(key)] = subscription_id
+        if self.before_ack is not None:
+            self.before_ack(self, request)
+        if self.respond is not None:
+            self.respond(self, request)
+        else:
+            self.ack(request)
+
+    def ack(self, request):
+        subscription_id = self.subscription_ids[
+            str(getattr(request, "account", None) or request.signature)
+        ]
+        self.push({"jsonrpc": "2.0", "result": subscription_id, "id": request.id})
+
+    def reject(self, request, message: str = "Invalid param"):
+        self.push(
+            {
+                "jsonrpc": "2.0",
+                "error": {"code": -32602, "message": message},
+                "id": request.id,
+            }
+        )
+
+    async def account_subscribe(self, pub_key, commitment=None, encoding=None):
+        request_id = self.increment_counter_and_get_id()
+        subscription_id = next(self.subscription_counter)
+        self.subscription_ids[str(pub_key)] = subscription_id
+        self.push({"jsonrpc": "2.0", "result": subscription_id, "id": request_id})
+
+    async def account_unsubscribe(self, subscription_id: int):
+        self.unsubscribed.append(subscription_id)
+
+    async def signature_unsubscribe(self, subscription_id: int):
+        self.unsubscribed.append(subscription_id)
+
+    async def recv(self):
+        message = await self.messages.get()
+        if isinstance(message, Exception):
+            raise message
+        messages = parse_websocket_message(message)
+        # like SolanaWsClientProtocol, a rejected subscription is raised
+        for item in messages:
+            if isinstance(item, SoldersSubscriptionError):
+                request = next(
+                    request for request in self.sent if request.id == item.id
+                )
+                raise SubscriptionError(item, request)
+        return messages
+
+    async def close(self):
+        self.closed = True
+
+    def push(self, message: dict):
+        self.messages.put_nowait(json.dumps(message))
+
+    def push_error(self, error: Exception):
+        self.messages.put_nowait(error)
+
+    def push_account_notification(self, account: str, data: bytes, slot: int):
+        self.push(
+            {
+                "jsonrpc": "2.0",
+                "method": "accountNotification",
+                "params": {
+                    "result": {
+                        "context": {"slot": slot},
+                        "value": {
+                            "data": [base64.b64encode(data).decode(), "base64"],
+                            "executable": False,
+                            "lamports": 2039280,
+                            "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                            "rentEpoch": 0,
+                            "space": len(data),
+                        },
+                    },
+                    "subscription": self.subscription_ids[account],
+                },
+            }
+        )
+
+    def push_signature_notification(self, signature: str, slot: int, err=None):
+        self.push(
+            {
+                "jsonrpc": "2.0",
+                "method": "signatureNotification",
+                "params": {
+                    "result": {"context": {"slot": slot}, "value": {"err": err}},
+                    "subscription": self.subscription_ids[signature],
+                },
+            }
+        )
+
+
+class MockConnect:
+    def __init__(self, before_ack=None, respond=None):
+        self.before_ack = before_ack
+        self.respond = respond
+        self.websockets = []
+        # raised by the next connections when set
+        self.error = None
+
+    async def __call__(self, websocket_rpc_url: str):
+        if self.error is not None:
+            raise self.error
+        websocket = MockWebsocket(self.before_ack, self.respond)
+        self.websockets.append(websocket)
+        return websocket
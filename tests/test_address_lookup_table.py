@@ -0,0 +1,106 @@
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.reference_address import ADDRESS_LOOKUP_TABLE_PROGRAM_ID
+from soldexpy.layout.address_lookup_table_layout import (
+    ADDRESS_LOOKUP_TABLE_META_LAYOUT,
+)
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.address_lookup_table import (
+    LOOKUP_TABLE_ACTIVE,
+    AddressLookupTableCache,
+    get_pool_lookup_table_addresses,
+    make_pool_lookup_table_instructions,
+)
+from soldexpy.solana_tx_util.swap_message_template import SwapMessageTemplate
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from tests.solana.mock_client_cache import MockClientCache
+
+
+def make_lookup_table_data(authority: Pubkey, addresses):
+    meta = ADDRESS_LOOKUP_TABLE_META_LAYOUT.build(
+        dict(
+            type_index=1,
+            deactivation_slot=LOOKUP_TABLE_ACTIVE,
+            last_extended_slot=249946825,
+            last_extended_slot_start_index=0,
+            authority_option=1,
+            authority=bytes(authority),
+            padding=None,
+        )
+    )
+    return meta + b"".join(bytes(address) for address in addresses)
+
+
+def test_make_pool_lookup_table_instructions(pool: RaydiumPool):
+    authority = Pubkey.new_unique()
+    lookup_table, (create, extend) = make_pool_lookup_table_instructions(
+        pool, authority, authority, 249946825
+    )
+    expected, bump_seed = Pubkey.find_program_address(
+        [bytes(authority), (249946825).to_bytes(8, "little")],
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID,
+    )
+    assert lookup_table == expected
+    assert create.program_id == ADDRESS_LOOKUP_TABLE_PROGRAM_ID
+    assert bytes(create.data) == (
+        (0).to_bytes(4, "little")
+        + (249946825).to_bytes(8, "little")
+        + bytes([bump_seed])
+    )
+    addresses = get_pool_lookup_table_addresses(pool)
+    assert bytes(extend.data) == (
+        (2).to_bytes(4, "little")
+        + len(addresses).to_bytes(8, "little")
+        + b"".join(bytes(address) for address in addresses)
+    )
+    assert extend.accounts[0].pubkey == lookup_table
+
+
+def test_lookup_table_cache_and_smaller_transaction(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    lookup_table = Pubkey.new_unique()
+    addresses = get_pool_lookup_table_addresses(pool)
+    mock_client_cache.amend_cache_for_account_info(
+        lookup_table,
+        make_lookup_table_data(Pubkey.new_unique(), addresses),
+        ADDRESS_LOOKUP_TABLE_PROGRAM_ID,
+    )
+    cache = AddressLookupTableCache(client)
+    table = cache.get(lookup_table)
+    assert table.key == lookup_table
+    assert table.addresses == addresses
+    # decoded once
+    del mock_client_cache["get_account_info"][str(lookup_table)]
+    assert cache.get(lookup_table) is table
+
+    payer = Keypair()
+    sizes = []
+    for address_lookup_tables in [None, [table]]:
+        builder = SwapTransactionBuilder(
+            client, pool, payer, address_lookup_tables=address_lookup_tables
+        )
+        builder.append_sell(1000000, 1000)
+        transaction = builder.compile_versioned_transaction()
+        sizes.append(len(bytes(transaction)))
+    lookups = transaction.message.address_table_lookups
+    assert len(lookups) == 1 and lookups[0].account_key == lookup_table
+    # 1 byte index instead of 32 bytes for each looked up account, plus the table key
+    looked_up = len(lookups[0].writable_indexes) + len(lookups[0].readonly_indexes)
+    assert looked_up >= 14
+    assert sizes[0] - sizes[1] == looked_up * 31 - 34
+
+    # the template patches the same message
+    template = SwapMessageTemplate(
+        pool, payer, Direction.SPEND_BASE_TOKEN, address_lookup_tables=[table]
+    )
+    blockhash = transaction.message.recent_blockhash
+    patched = template.build(1000000, 1000, blockhash)
+    assert bytes(patched.message) == bytes(transaction.message)
+    assert VersionedTransaction.from_bytes(bytes(patched)).verify_with_results() == [
+        True
+    ]
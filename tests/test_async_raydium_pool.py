@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from pytest import raises
+from solana.rpc.async_api import AsyncClient
+
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.raydium_pool import RaydiumPool
+
+# get_price is deprecated, it is still the reference of the float model
+pytestmark = pytest.mark.filterwarnings("ignore:get_price is deprecated")
+
+
+def test_create(async_pool: AsyncRaydiumPool, pool: RaydiumPool):
+    async_pool_dict = async_pool.to_dict()
+    for key, value in pool.to_dict().items():
+        assert async_pool_dict[key] == value, key
+    assert async_pool.base_vault_balance == pool.base_vault_balance
+    assert async_pool.quote_vault_balance == pool.quote_vault_balance
+
+
+def test_update_pool_vaults_balance(async_pool: AsyncRaydiumPool):
+    async_pool.set_pool_vaults_amount(0, 0)
+    asyncio.run(async_pool.update_pool_vaults_balance_async())
+    assert async_pool.base_vault_balance == 4757782.728947
+    assert async_pool.quote_vault_balance == 41868.877422974
+    assert async_pool.vault_balance_slot == 249946825
+
+
+def test_get_price(async_pool: AsyncRaydiumPool, pool: RaydiumPool):
+    assert asyncio.run(
+        async_pool.get_price_async(
+            1, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN, True
+        )
+    ) == pool.get_price(1, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN)
+
+
+def test_from_snapshot(async_client: AsyncClient, async_pool: AsyncRaydiumPool):
+    restored = asyncio.run(
+        AsyncRaydiumPool.from_snapshot_async(async_client, async_pool.to_snapshot())
+    )
+    assert isinstance(restored, AsyncRaydiumPool)
+    assert restored.to_snapshot() == async_pool.to_snapshot()
+    assert restored.base_vault_balance == async_pool.base_vault_balance
+
+
+def test_sync_methods(async_pool: AsyncRaydiumPool, pool: RaydiumPool):
+    # code that takes a RaydiumPool gets the synchronous methods, not coroutines
+    assert async_pool.get_price(
+        1, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN
+    ) == pool.get_price(1, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN)
+    with raises(Exception):
+        async_pool.update_pool_vaults_balance()
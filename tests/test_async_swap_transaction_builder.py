@@ -0,0 +1,23 @@
+import asyncio
+
+from solana.rpc.async_api import AsyncClient
+from solders.keypair import Keypair
+
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.solana_tx_util.async_swap_transaction_builder import (
+    AsyncSwapTransactionBuilder,
+)
+
+
+def test_append_sell(async_client: AsyncClient, async_pool: AsyncRaydiumPool):
+    payer = Keypair()
+    builder = AsyncSwapTransactionBuilder(async_client, async_pool, payer)
+    asyncio.run(builder.append_sell(1000000, 8000000))
+    # compute budget x2, create ATA, swap, close
+    assert len(builder.instructions) == 5
+    swap_instruction = builder.instructions[3]
+    assert swap_instruction.program_id == RAYDIUM_LIQUIDITY_POOL_V4
+    assert swap_instruction.accounts[0].pubkey == async_pool.token_program_id
+    assert swap_instruction.accounts[1].pubkey == async_pool.amm_id
+    assert swap_instruction.accounts[-1].pubkey == payer.pubkey()
@@ -0,0 +1,37 @@
+import asyncio
+
+from solders.token.associated import get_associated_token_address
+
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.async_wallet import AsyncWallet
+from tests.solana.mock_client_cache import MockClientCache
+
+
+def test_get_balance(
+    async_pool: AsyncRaydiumPool,
+    async_wallet: AsyncWallet,
+    mock_client_cache: MockClientCache,
+):
+    """
+    Test get_balance method of AsyncWallet
+    """
+    associated_addr = get_associated_token_address(
+        async_wallet.payer, async_pool.get_mint_address()
+    )
+    mock_client_cache.amend_cache_for_balance(
+        associated_addr, 4757782.728947, 6, 4757782728947
+    )
+    balance_decimal, balance_full = asyncio.run(
+        async_wallet.get_balance_async(async_pool)
+    )
+    assert balance_decimal == 4757782.728947
+    assert balance_full == 4757782728947
+
+
+def test_get_sol_balance(async_wallet: AsyncWallet, mock_client_cache: MockClientCache):
+    """
+    Test get_sol_balance_async method of AsyncWallet
+    """
+    mock_client_cache.amend_cache_for_sol_balance(async_wallet.payer, 1050000000)
+    balance = asyncio.run(async_wallet.get_sol_balance_async())
+    assert balance == 1.05
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.hash import Hash
+from solders.keypair import Keypair
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.blockhash_prefetcher import (
+    SECONDS_PER_BLOCK,
+    AsyncBlockhashPrefetcher,
+    BlockhashPrefetcher,
+)
+
+BLOCKHASH = Hash.from_string("4TLzN2RAACFnd5TYpHcUi76pC3V1qkggRF29HWk2VLeT")
+
+
+def test_blockhash_prefetcher(client: Client, pool: RaydiumPool):
+    prefetcher = BlockhashPrefetcher(client, refresh_seconds=0.01).attach().start()
+    try:
+        assert prefetcher.get_with_expiry() == (BLOCKHASH, 228303010)
+        time.sleep(0.05)
+        assert prefetcher.refresh_count > 1
+        assert client_wrapper.get_latest_blockhash(client) == BLOCKHASH
+
+        builder = SwapTransactionBuilder(client, pool, Keypair())
+        builder.append_set_compute_budget(1, 1)
+        transaction = builder.compile_versioned_transaction()
+        assert transaction.message.recent_blockhash == BLOCKHASH
+        assert builder.last_valid_block_height == 228303010
+    finally:
+        prefetcher.stop()
+
+
+def test_validity_by_block_height(client: Client):
+    prefetcher = BlockhashPrefetcher(client, min_remaining_blocks=20).attach()
+    with pytest.raises(ValueError):
+        prefetcher.get()
+    now = time.time()
+    older, newer = Hash.new_unique(), Hash.new_unique()
+    # fetched at block heights 1000 and 1050, the current block height is ~1060
+    prefetcher.add_blockhash(newer, 1200, now - 10 * SECONDS_PER_BLOCK)
+    prefetcher.add_blockhash(older, 1150, now - 60 * SECONDS_PER_BLOCK)
+    # expired, it is not kept
+    prefetcher.add_blockhash(Hash.new_unique(), 1050, now - 100 * SECONDS_PER_BLOCK)
+    assert [entry[0] for entry in prefetcher.blockhashes] == [older, newer]
+    assert prefetcher.get_block_height() == pytest.approx(1060, abs=1)
+    # the freshest one is handed out even if it was not the last fetched
+    assert prefetcher.get_with_expiry() == (newer, 1200)
+    assert not prefetcher.is_expired(1150)
+    assert prefetcher.is_expired(1000)
+
+
+def test_expired_blockhash_is_not_handed_out(client: Client):
+    prefetcher = BlockhashPrefetcher(client, min_remaining_blocks=20).attach()
+    # fetched 140 blocks ago, only 10 blocks are left
+    prefetcher.add_blockhash(
+        Hash.new_unique(), 1150, time.time() - 140 * SECONDS_PER_BLOCK
+    )
+    with pytest.raises(ValueError):
+        prefetcher.get()
+    # falls back to RPC
+    assert client_wrapper.get_latest_blockhash_with_expiry(client) == (
+        BLOCKHASH,
+        228303010,
+    )
+
+
+def test_async_blockhash_prefetcher(async_client: AsyncClient):
+    async def run():
+        prefetcher = await AsyncBlockhashPrefetcher(
+            async_client, refresh_seconds=0.01
+        ).start()
+        assert prefetcher.get() == BLOCKHASH
+        await asyncio.sleep(0.05)
+        assert prefetcher.refresh_count > 1
+        await prefetcher.stop()
+
+    asyncio.run(run())
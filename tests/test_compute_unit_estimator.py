@@ -0,0 +1,113 @@
+import json
+from unittest.mock import patch
+
+from solana.rpc.api import Client
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID
+from solders.keypair import Keypair
+from solders.rpc.responses import SimulateTransactionResp
+
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.compute_unit_estimator import (
+    SET_COMPUTE_UNIT_LIMIT,
+    ComputeUnitEstimator,
+)
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+
+
+def make_simulate_transaction_resp(units_consumed: int, err=None):
+    return SimulateTransactionResp.from_json(
+        json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": {
+                    "context": {"slot": 0},
+                    "value": {
+                        "err": err,
+                        "logs": [],
+                        "accounts": None,
+                        "unitsConsumed": units_consumed,
+                        "returnData": None,
+                    },
+                },
+                "id": 0,
+            }
+        )
+    )
+
+
+def get_unit_limit(transaction):
+    message = transaction.message
+    for instruction in message.instructions:
+        program_id = message.account_keys[instruction.program_id_index]
+        data = bytes(instruction.data)
+        if (
+            program_id == COMPUTE_BUDGET_PROGRAM_ID
+            and data[0] == SET_COMPUTE_UNIT_LIMIT
+        ):
+            return int.from_bytes(data[1:5], "little")
+
+
+def test_size_unit_limit_from_cached_simulation(client: Client, pool: RaydiumPool):
+    estimator = ComputeUnitEstimator(client, margin_ratio=0.1, min_margin_units=2000)
+    payer = Keypair()
+    simulated = []
+
+    def simulate_transaction(client, transaction, sig_verify, commitment):
+        simulated.append(get_unit_limit(transaction))
+        return make_simulate_transaction_resp(50000)
+
+    def compile_sell():
+        builder = SwapTransactionBuilder(
+            client, pool, payer, compute_unit_estimator=estimator
+        )
+        builder.append_sell(1000000, 1000)
+        return builder.compile_versioned_transaction()
+
+    with patch(
+        "soldexpy.solana.client_wrapper.simulate_transaction", simulate_transaction
+    ):
+        transactions = [compile_sell() for _ in range(4)]
+
+    # simulated once with the default budget, then served from the cache
+    assert simulated == [600000]
+    assert [get_unit_limit(transaction) for transaction in transactions] == [55000] * 4
+    assert estimator.hit_count == 3 and estimator.miss_count == 1
+    assert estimator.get_hit_rate() == 0.75
+    assert len(estimator) == 1
+
+
+def test_failed_simulation_falls_back_to_unit_budget(client: Client, pool: RaydiumPool):
+    estimator = ComputeUnitEstimator(client)
+    payer = Keypair()
+    simulated = []
+
+    def simulate_transaction(*args):
+        simulated.append(True)
+        return make_simulate_transaction_resp(
+            3000, {"InstructionError": [2, {"Custom": 1}]}
+        )
+
+    def compile_sell():
+        builder = SwapTransactionBuilder(
+            client, pool, payer, compute_unit_estimator=estimator
+        )
+        builder.append_sell(1000000, 1000)
+        return builder.compile_versioned_transaction()
+
+    with patch(
+        "soldexpy.solana.client_wrapper.simulate_transaction", simulate_transaction
+    ):
+        transactions = [compile_sell() for _ in range(3)]
+        # the failure is cached for failure_retry_seconds only
+        assert len(simulated) == 1
+        estimator.failure_retry_seconds = -1
+        compile_sell()
+        assert len(simulated) == 2
+    assert [get_unit_limit(transaction) for transaction in transactions] == [600000] * 3
+
+    # refreshed once old
+    estimator = ComputeUnitEstimator(client)
+    estimator.set_units(("key",), 40000)
+    assert estimator.get_cached_units(("key",)) == 40000
+    estimator.refresh_seconds = -1
+    assert estimator.get_cached_units(("key",)) is None
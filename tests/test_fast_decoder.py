@@ -0,0 +1,33 @@
+import os
+
+from pytest import raises
+
+from soldexpy.layout.raydium_layout import (
+    LIQUIDITY_STATE_LAYOUT_V4,
+    LIQUIDITY_STATE_V4_DECODER,
+)
+from soldexpy.layout.serum_layout import MARKET_STATE_LAYOUT_V2, MARKET_STATE_V2_DECODER
+from soldexpy.layout.utils import container_to_dict
+
+
+def test_same_as_construct():
+    for layout, decoder in [
+        (LIQUIDITY_STATE_LAYOUT_V4, LIQUIDITY_STATE_V4_DECODER),
+        (MARKET_STATE_LAYOUT_V2, MARKET_STATE_V2_DECODER),
+    ]:
+        for _ in range(20):
+            data = os.urandom(layout.sizeof() + 8)
+            expected = layout.parse(data[8:])
+            container = decoder.parse(memoryview(data), 8)
+            assert container_to_dict(container) == container_to_dict(expected)
+            # same field order
+            assert list(container_to_dict(container)) == list(
+                container_to_dict(expected)
+            )
+            decoded = decoder.decode(data, 8)
+            for key, value in container.items():
+                if key in decoded._fields:
+                    assert getattr(decoded, key) == value
+
+    with raises(Exception):
+        LIQUIDITY_STATE_V4_DECODER.parse(bytes(LIQUIDITY_STATE_LAYOUT_V4.sizeof() - 1))
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import base58
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from soldexpy.common.reference_address import (
+    RAYDIUM_LIQUIDITY_POOL_V4,
+    SOL_MINT_ADDRESS,
+)
+from soldexpy.layout.raydium_layout import LIQUIDITY_STATE_LAYOUT_V4
+from soldexpy.pool_discovery import PoolDiscoveryIndex
+
+
+def make_pool_data(base_mint: str, quote_mint: str):
+    pool_info = LIQUIDITY_STATE_LAYOUT_V4.parse(
+        bytes(LIQUIDITY_STATE_LAYOUT_V4.sizeof())
+    )
+    pool_info.base_mint = base58.b58decode(base_mint)
+    pool_info.quote_mint = base58.b58decode(quote_mint)
+    return LIQUIDITY_STATE_LAYOUT_V4.build(pool_info)
+
+
+class MockProgramAccounts:
+    def __init__(self):
+        self.accounts = {}
+        self.requests = []
+
+    def add_pool(self, base_mint: str, quote_mint: str):
+        pool_address = Keypair().pubkey()
+        self.accounts[pool_address] = make_pool_data(base_mint, quote_mint)
+        return str(pool_address)
+
+    def get_program_accounts(
+        self, client, program_id, filters, data_slice=None, commitment=None
+    ):
+        assert program_id == RAYDIUM_LIQUIDITY_POOL_V4
+        self.requests.append(filters)
+        value = []
+        for pubkey, data in self.accounts.items():
+            if not all(self.matches(data, f) for f in filters):
+                continue
+            data = data[data_slice.offset : data_slice.offset + data_slice.length]
+            value.append(
+                SimpleNamespace(pubkey=pubkey, account=SimpleNamespace(data=data))
+            )
+        return SimpleNamespace(value=value)
+
+    @staticmethod
+    def matches(data: bytes, f):
+        if isinstance(f, int):
+            return len(data) == f
+        expected = base58.b58decode(f.bytes)
+        return data[f.offset : f.offset + len(expected)] == expected
+
+
+def test_discover(client: Client, tmp_path):
+    sol = str(SOL_MINT_ADDRESS)
+    token_a, token_b = str(Keypair().pubkey()), str(Keypair().pubkey())
+    program_accounts = MockProgramAccounts()
+    pool_a = program_accounts.add_pool(token_a, sol)
+    # SOL as the base token
+    pool_a2 = program_accounts.add_pool(sol, token_a)
+    pool_ab = program_accounts.add_pool(token_a, token_b)
+    program_accounts.add_pool(token_b, sol)
+
+    path = str(tmp_path / "pool_index.json")
+    index = PoolDiscoveryIndex(path)
+    with patch(
+        "soldexpy.solana.client_wrapper.get_program_accounts",
+        program_accounts.get_program_accounts,
+    ):
+        pool_addresses = index.lookup(client, token_a)
+        assert sorted(pool_addresses) == sorted([pool_a, pool_a2, pool_ab])
+        # one scan with the mint as base and one as quote
+        assert len(program_accounts.requests) == 2
+        assert index.get_mints(pool_a2) == (sol, token_a)
+        assert sorted(index.get_pair_pool_addresses(sol, token_a)) == sorted(
+            [pool_a, pool_a2]
+        )
+        assert index.get_pair_pool_addresses(token_b, token_a) == [pool_ab]
+
+        # restored from the disk without any scan
+        index = PoolDiscoveryIndex(path)
+        assert sorted(index.lookup(client, token_a, max_age_seconds=60)) == sorted(
+            pool_addresses
+        )
+        assert len(program_accounts.requests) == 2
+
+        # only the stale mints are scanned again, closed pools are removed
+        del program_accounts.accounts[Pubkey.from_string(pool_a2)]
+        assert index.refresh(client, max_age_seconds=60) == []
+        assert index.refresh(client, max_age_seconds=0) == [token_a]
+        assert len(program_accounts.requests) == 4
+        assert pool_a2 not in index
+        assert index.get_pair_pool_addresses(sol, token_a) == [pool_a]
+        assert pool_a2 not in PoolDiscoveryIndex(path)
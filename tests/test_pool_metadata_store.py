@@ -0,0 +1,53 @@
+import json
+
+from solana.rpc.api import Client
+
+from soldexpy.pool_metadata_store import PoolMetadataStore
+from soldexpy.raydium_pool import RaydiumPool
+from tests.solana.mock_client_cache import MockClientCache
+
+
+def assert_same_pool(pool: RaydiumPool, expected: RaydiumPool):
+    pool_dict = pool.to_dict()
+    for key, value in expected.to_dict().items():
+        assert pool_dict[key] == value, key
+    assert pool.base_vault_balance == expected.base_vault_balance
+    assert pool.quote_vault_balance == expected.quote_vault_balance
+    assert pool.get_reserves() == expected.get_reserves()
+
+
+def test_from_snapshot(client: Client, pool: RaydiumPool):
+    snapshot = json.loads(json.dumps(pool.to_snapshot()))
+    restored = RaydiumPool.from_snapshot(client, snapshot)
+    assert_same_pool(restored, pool)
+    assert restored.market_info.account_flags.market == True
+
+
+def test_load_pools(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache, tmp_path
+):
+    path = str(tmp_path / "pools.json")
+    store = PoolMetadataStore(path)
+    pools = store.load_pools(client, [pool.pool_address])
+    assert_same_pool(pools[0], pool)
+
+    # the static accounts are not needed anymore (the AMM account is still read for its pnl)
+    del mock_client_cache["get_account_info"][str(pool.serum_market)]
+    store = PoolMetadataStore(path)
+    assert pool.pool_address in store
+    pools = store.load_pools(client)
+    assert len(pools) == 1
+    assert_same_pool(pools[0], pool)
+
+
+def test_version_mismatch(pool: RaydiumPool, tmp_path):
+    path = str(tmp_path / "pools.json")
+    store = PoolMetadataStore(path)
+    store.put(pool)
+    store.save()
+    with open(path, "r") as f:
+        data = json.load(f)
+    data["version"] = PoolMetadataStore.VERSION + 1
+    with open(path, "w") as f:
+        json.dump(data, f)
+    assert pool.pool_address not in PoolMetadataStore(path)
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+from solana.rpc.api import Client
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID
+from solders.keypair import Keypair
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.priority_fee_estimator import (
+    AsyncPriorityFeeEstimator,
+    PriorityFeeEstimator,
+    PriorityFeeWindow,
+    get_pool_writable_accounts,
+)
+
+
+def get_unit_price(builder: SwapTransactionBuilder):
+    for instruction in builder.instructions:
+        if (
+            instruction.program_id == COMPUTE_BUDGET_PROGRAM_ID
+            and instruction.data[0] == 3
+        ):
+            return int.from_bytes(bytes(instruction.data[1:9]), "little")
+
+
+def test_fee_window_percentiles():
+    window = PriorityFeeWindow([], window_slots=100)
+    assert window.get_fee(50) is None
+    window.add_fees([(slot, slot * 10) for slot in range(1, 101)])
+    assert window.get_fee(0) == 10
+    assert window.get_fee(50) == 510
+    assert window.get_fee(100) == 1000
+    # overlapping slots are not counted twice, the oldest slots leave the window
+    window.add_fees([(slot, 0) for slot in range(51, 151)])
+    assert len(window) == 100
+    assert min(window.fees) == 51
+    assert window.get_fee(100) == 0
+
+
+def test_swap_uses_estimated_unit_price(client: Client, pool: RaydiumPool):
+    polled = []
+
+    def feed(accounts):
+        polled.append(accounts)
+        return [(slot, 1000 * (slot % 10)) for slot in range(100)]
+
+    estimator = PriorityFeeEstimator(
+        client, percentile=50, max_unit_price=8000, feed=feed
+    )
+
+    def make_builder(fee_percentile: int = None):
+        builder = SwapTransactionBuilder(
+            client,
+            pool,
+            Keypair(),
+            priority_fee_estimator=estimator,
+            fee_percentile=fee_percentile,
+        )
+        builder.append_sell(1000000, 1000)
+        return builder
+
+    # no fees for the pool yet
+    assert get_unit_price(make_builder()) == 25000
+
+    estimator.add_pool(pool)
+    estimator.refresh()
+    assert polled == [get_pool_writable_accounts(pool)]
+    assert get_unit_price(make_builder()) == 5000
+    assert get_unit_price(make_builder(10)) == 1000
+    # capped
+    assert get_unit_price(make_builder(100)) == 8000
+
+
+def test_get_recent_prioritization_fees(client: Client):
+    requests = []
+
+    def make_request_unparsed(body):
+        requests.append(json.loads(body.to_json()))
+        return json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": [
+                    {"slot": 10, "prioritizationFee": 0},
+                    {"slot": 11, "prioritizationFee": 1500},
+                ],
+                "id": 0,
+            }
+        )
+
+    client._provider.make_request_unparsed = make_request_unparsed
+    address = Keypair().pubkey()
+    assert client_wrapper.get_recent_prioritization_fees(client, [address]) == [
+        (10, 0),
+        (11, 1500),
+    ]
+    assert requests[0]["method"] == "getRecentPrioritizationFees"
+    assert requests[0]["params"] == [[str(address)]]
+
+
+def test_async_estimator_keeps_sync_get_unit_price(pool: RaydiumPool):
+    async def feed(accounts):
+        return [(slot, 1000 * (slot % 10)) for slot in range(100)]
+
+    async def run():
+        estimator = AsyncPriorityFeeEstimator(None, percentile=50, feed=feed)
+        estimator.add_pool(pool)
+        await estimator.start_async()
+        # read from memory, usable by the synchronous builder
+        assert estimator.get_unit_price(pool) == 5000
+        await estimator.stop_async()
+
+    asyncio.run(run())
@@ -1,11 +1,20 @@
+from unittest.mock import patch
+
+import pytest
 from solana.rpc.api import Client
+from solana.rpc.core import RPCException
 from solders.pubkey import Pubkey
 
+import soldexpy.solana.client_wrapper as client_wrapper
 from soldexpy.common.direction import Direction
 from soldexpy.common.unit import Unit
 from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.raydium_pool_info import get_pool_vaults_balance
 from tests.solana.mock_client_cache import MockClientCache
 
+# get_price is deprecated, it is still the reference of the float model
+pytestmark = pytest.mark.filterwarnings("ignore:get_price is deprecated")
+
 
 def test_constructor_basics(
     client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
@@ -84,6 +93,62 @@ def test_update_pool_vaults_balance(
     pool.update_pool_vaults_balance()
     assert pool.base_vault_balance == 4757782.728947
     assert pool.quote_vault_balance == 41868.877422974
+    assert pool.base_vault_amount == 4757782728947
+    assert pool.quote_vault_amount == 41868877422974
+    assert pool.vault_balance_slot == 249946825
+
+
+def test_get_pool_vaults_balance(client: Client, pool: RaydiumPool):
+    balances = get_pool_vaults_balance(
+        client, pool.get_base_vault(), pool.get_quote_vault()
+    )
+    assert balances == (pool.base_vault_balance, pool.quote_vault_balance)
+    # the decimals are read once
+    with patch.object(
+        client_wrapper,
+        "get_token_account_balance",
+        side_effect=Exception("decimals are cached"),
+    ):
+        assert (
+            get_pool_vaults_balance(
+                client, pool.get_base_vault(), pool.get_quote_vault()
+            )
+            == balances
+        )
+
+
+def test_update_pool_vaults_balance_refreshes_pnl(client: Client, pool: RaydiumPool):
+    pool.set_need_take_pnl(0, 0)
+    pool.update_pool_vaults_balance()
+    assert pool.pool_info.base_need_take_pnl == 628249
+    assert pool.pool_info.quote_need_take_pnl == 5531365
+
+    # the pnl is not restored from a snapshot, only refreshed
+    restored = RaydiumPool.from_snapshot(client, pool.to_snapshot(), False)
+    with pytest.raises(Exception):
+        restored.get_reserves()
+    RaydiumPool.update_many_pool_vaults_balance(client, [restored])
+    assert restored.get_reserves() == pool.get_reserves()
+
+
+def test_update_pool_vaults_balance_min_context_slot(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    assert pool.update_pool_vaults_balance(min_context_slot=pool.vault_balance_slot)
+    with pytest.raises(RPCException):
+        pool.update_pool_vaults_balance(min_context_slot=pool.vault_balance_slot + 1)
+    assert pool.base_vault_amount == 4757782728947
+
+
+def test_set_pool_vaults_amount_ignores_older_slot(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    assert pool.set_pool_vaults_amount(1000000, 2000000000, 249946826)
+    assert pool.base_vault_balance == 1
+    assert pool.quote_vault_balance == 2
+    assert not pool.set_pool_vaults_amount(3000000, 4000000000, 249946825)
+    assert pool.base_vault_balance == 1
+    assert pool.vault_balance_slot == 249946826
 
 
 def test_get_price(
@@ -140,6 +205,23 @@ def test_get_price(
     )
 
 
+def test_get_price_uses_pool_swap_fee(pool: RaydiumPool):
+    with pytest.deprecated_call():
+        pool.get_price(1, Direction.SPEND_QUOTE_TOKEN)
+    _, base_price, _, amount_in = pool.get_price(1, Direction.SPEND_QUOTE_TOKEN)
+    assert amount_in == 0.9975
+    assert pool.get_base_price() == base_price
+    assert (
+        pool.get_base_price(Unit.BASE_TOKEN)
+        == pool.get_price(1, Direction.SPEND_QUOTE_TOKEN, Unit.BASE_TOKEN)[1]
+    )
+    # e.g. a pool with a 0.3% swap fee
+    pool.pool_info.swap_fee_numerator = 30
+    assert pool.get_price(1, Direction.SPEND_QUOTE_TOKEN)[3] == 0.997
+    prices = pool.get_prices([1], Direction.SPEND_QUOTE_TOKEN)
+    assert prices[3][0] == 0.997
+
+
 def test_convert_base_token_amount_to_tx_format(
     client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
 ):
@@ -327,3 +409,47 @@ def test_constructor_pool_info_parse(
         == b"\xe5\xb6+e\xcb;\xbd\xa6\xf5h\x88\xe6o\xee\x8ed\xdcU`\x19\x9c\x0f\x88\xb1\x1f\xe2s\xbd\x05\x9e\x8a\xa1"
     )
     assert pool.pool_info.lp_reserve == 1119806588206
+
+
+def test_load_many(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    pools = RaydiumPool.load_many(
+        client,
+        [
+            mock_client_cache.get_pool_address_for_tests(),
+            mock_client_cache.get_pool_address_for_tests(),
+        ],
+    )
+    assert len(pools) == 2
+    for loaded_pool in pools:
+        loaded = loaded_pool.to_dict()
+        expected = pool.to_dict()
+        for key in expected:
+            assert loaded[key] == expected[key], key
+        assert loaded_pool.base_vault_balance == pool.base_vault_balance
+        assert loaded_pool.quote_vault_balance == pool.quote_vault_balance
+        assert loaded_pool.quote_token == "SOL"
+
+
+def test_update_vault_balance_from_account_data(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    data = bytearray(
+        client_wrapper.get_account_info(client, pool.get_base_vault()).value.data
+    )
+    data[64:72] = (1000000).to_bytes(8, "little")
+    assert pool.update_vault_balance_from_account_data(
+        pool.get_base_vault(), bytes(data), 249946830
+    )
+    assert pool.base_vault_balance == 1
+    assert pool.base_vault_slot == 249946830
+    # the other side is untouched
+    assert pool.quote_vault_balance == 41868.877422974
+    assert pool.vault_balance_slot == 249946825
+    # older notification is ignored
+    assert not pool.update_vault_balance_from_account_data(
+        pool.get_base_vault(), bytes(data), 249946829
+    )
+    with pytest.raises(Exception):
+        pool.update_vault_balance_from_account_data(pool.amm_id, bytes(data), 249946830)
@@ -0,0 +1,55 @@
+import pytest
+
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.raydium_swap_math import ceil_div, get_amount_in, get_amount_out
+
+# get_price is deprecated, it is still the reference of the float model
+pytestmark = pytest.mark.filterwarnings("ignore:get_price is deprecated")
+
+
+def test_ceil_div():
+    assert ceil_div(10, 5) == 2
+    assert ceil_div(11, 5) == 3
+    # the program rounds a quotient of 0 half up
+    assert ceil_div(3, 5) == 1
+    assert ceil_div(2, 5) == 0
+
+
+def test_get_amount_out():
+    # fee = ceil(1000000 * 25 / 10000) = 2500
+    assert get_amount_out(1000000, 10**9, 10**12, 25, 10000) == (
+        10**12 * 997500 // (10**9 + 997500)
+    )
+
+
+def test_get_amount_in_is_the_minimum_amount_in():
+    reserve_in, reserve_out = 41868877422974, 4757782728947
+    for amount_out in [1, 1000, 123456789, 10**12]:
+        amount_in = get_amount_in(amount_out, reserve_in, reserve_out, 25, 10000)
+        assert get_amount_out(amount_in, reserve_in, reserve_out, 25, 10000) >= (
+            amount_out
+        )
+        assert get_amount_out(amount_in - 2, reserve_in, reserve_out, 25, 10000) < (
+            amount_out
+        )
+
+
+def test_pool_get_amount_out(pool: RaydiumPool):
+    base_reserve, quote_reserve = pool.get_reserves()
+    assert base_reserve == pool.base_vault_amount - pool.pool_info.base_need_take_pnl
+    assert quote_reserve == pool.quote_vault_amount - pool.pool_info.quote_need_take_pnl
+
+    amount_in = pool.convert_quote_token_amount_to_tx_format(1)
+    amount_out = pool.get_amount_out(amount_in, Direction.SPEND_QUOTE_TOKEN)
+    _, _, expect_amount_out, _ = pool.get_price(1, Direction.SPEND_QUOTE_TOKEN)
+    # the float path ignores the pnl, so it is only close
+    assert (
+        abs(
+            pool.convert_base_token_amount_from_tx_format(amount_out)
+            - (expect_amount_out)
+        )
+        / expect_amount_out
+        < 1e-3
+    )
+    assert pool.get_amount_in(amount_out, Direction.SPEND_QUOTE_TOKEN) <= amount_in
@@ -0,0 +1,121 @@
+from solana.rpc.api import Client
+from solders.address_lookup_table_account import AddressLookupTableAccount
+from solders.hash import Hash
+from solders.keypair import Keypair
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.router import Router
+from soldexpy.solana_tx_util.address_lookup_table import (
+    get_pool_lookup_table_addresses,
+)
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+
+SOL = "So11111111111111111111111111111111111111112"
+
+
+def make_pool(
+    client: Client, pool: RaydiumPool, mint: str, base_amount: int, quote_amount: int
+):
+    # the same accounts as the pool, but another token
+    snapshot = pool.to_snapshot()
+    snapshot["pool_address"] = str(Keypair().pubkey())
+    if snapshot["base_mint_address"] == SOL:
+        snapshot["quote_mint_address"] = mint
+    else:
+        snapshot["base_mint_address"] = mint
+    new_pool = RaydiumPool.from_snapshot(client, snapshot, False)
+    new_pool.set_pool_vaults_amount(base_amount, quote_amount)
+    new_pool.set_need_take_pnl(0, 0)
+    return new_pool
+
+
+def test_route_through_sol(client: Client, pool: RaydiumPool):
+    token_a, token_b = str(Keypair().pubkey()), str(Keypair().pubkey())
+    pool_a = make_pool(client, pool, token_a, 10**12, 10**12)
+    pool_b = make_pool(client, pool, token_b, 10**12, 10**12)
+    # a better pool for token B
+    pool_b2 = make_pool(client, pool, token_b, 2 * 10**12, 10**12)
+    router = Router([pool, pool_a, pool_b, pool_b2])
+    assert len(router) == 4
+    sol = pool.quote_mint_address
+
+    amount_in = 10**9
+    route = router.find_route(
+        pool_a.base_mint_address, pool_b.base_mint_address, amount_in
+    )
+    assert route.get_tokens() == [
+        pool_a.base_mint_address,
+        sol,
+        pool_b.base_mint_address,
+    ]
+    assert [edge.pool for edge in route.edges] == [pool_a, pool_b2]
+    sol_out = pool_a.get_amount_out(amount_in, Direction.SPEND_BASE_TOKEN)
+    assert route.amounts == [
+        amount_in,
+        sol_out,
+        pool_b2.get_amount_out(sol_out, Direction.SPEND_QUOTE_TOKEN),
+    ]
+    # not reachable in one swap
+    assert (
+        router.find_route(
+            pool_a.base_mint_address, pool_b.base_mint_address, amount_in, max_hops=1
+        )
+        is None
+    )
+
+    # only the edges of the changed pool are updated
+    pool_b.set_pool_vaults_amount(4 * 10**12, 10**12)
+    router.update_pool(pool_b)
+    route = router.find_route(
+        pool_a.base_mint_address, pool_b.base_mint_address, amount_in
+    )
+    assert [edge.pool for edge in route.edges] == [pool_a, pool_b]
+
+    router.remove_pool(pool_a)
+    assert (
+        router.find_route(pool_a.base_mint_address, pool_b.base_mint_address, amount_in)
+        is None
+    )
+
+
+def test_append_route(client: Client, pool: RaydiumPool):
+    token_a, token_b = str(Keypair().pubkey()), str(Keypair().pubkey())
+    pool_a = make_pool(client, pool, token_a, 10**12, 10**12)
+    pool_b = make_pool(client, pool, token_b, 10**12, 10**12)
+    router = Router([pool_a, pool_b])
+    route = router.find_route(pool_a.base_mint_address, pool_b.base_mint_address, 10**9)
+    builder = SwapTransactionBuilder(
+        client, pool_a, Keypair(), use_idempotent_create=True
+    )
+    address_lookup_tables = {
+        pool.amm_id: [
+            AddressLookupTableAccount(
+                Keypair().pubkey(), get_pool_lookup_table_addresses(pool)
+            )
+        ]
+        for pool in [pool_a, pool_b]
+    }
+    router.append_route(
+        builder,
+        route,
+        0.01,
+        rent_lamports=2039280,
+        address_lookup_tables=address_lookup_tables,
+    )
+    assert builder.legs == [
+        (pool_a.amm_id, Direction.SPEND_BASE_TOKEN),
+        (pool_b.amm_id, Direction.SPEND_QUOTE_TOKEN),
+    ]
+    swaps = [
+        instruction
+        for instruction in builder.instructions
+        if instruction.program_id == RAYDIUM_LIQUIDITY_POOL_V4
+    ]
+    # the buy spends the minimum amount out of the sell
+    min_amounts_out = route.get_min_amounts_out(0.01)
+    assert swaps[1].data[1:9] == min_amounts_out[0].to_bytes(8, "little")
+    assert swaps[1].data[9:17] == min_amounts_out[1].to_bytes(8, "little")
+    # fits with the lookup tables
+    builder.compile_versioned_transaction(Hash.default())
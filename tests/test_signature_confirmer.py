@@ -0,0 +1,121 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+from solders.rpc.responses import GetSignatureStatusesResp
+from solders.signature import Signature
+
+from soldexpy.solana_util.signature_confirmer import SignatureConfirmer
+from tests.solana.mock_websocket import MockConnect
+
+
+def make_signature_statuses_resp(statuses: list):
+    return GetSignatureStatusesResp.from_json(
+        json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": {"context": {"slot": 300}, "value": statuses},
+                "id": 0,
+            }
+        )
+    )
+
+
+def make_status(slot: int, confirmation_status: str, err=None):
+    return {
+        "slot": slot,
+        "confirmations": 0,
+        "err": err,
+        "status": {"Ok": None} if err is None else {"Err": err},
+        "confirmationStatus": confirmation_status,
+    }
+
+
+def test_confirm_by_signature_notification():
+    mock_connect = MockConnect()
+
+    async def run():
+        confirmer = SignatureConfirmer(
+            None, "wss://localhost", poll_interval_seconds=10, connect=mock_connect
+        )
+        signatures = [Signature.new_unique() for _ in range(3)]
+        pendings = [
+            confirmer.watch(signature, send_slot=100) for signature in signatures
+        ]
+        await asyncio.sleep(0.01)
+        # one shared connection
+        assert len(mock_connect.websockets) == 1
+        websocket = mock_connect.websockets[0]
+        websocket.push_signature_notification(str(signatures[1]), 102)
+        websocket.push_signature_notification(
+            str(signatures[0]), 103, {"InstructionError": [0, {"Custom": 30}]}
+        )
+        websocket.push_signature_notification(str(signatures[2]), 101)
+        results = await asyncio.wait_for(asyncio.gather(*pendings), 1)
+        assert [pending.slot for pending in results] == [103, 102, 101]
+        assert [pending.get_latency_slots() for pending in results] == [3, 2, 1]
+        assert results[0].err is not None and results[1].err is None
+        assert results[0].get_latency_seconds() < 1
+        assert len(confirmer) == 0
+        assert len(confirmer.connection) == 0
+        assert confirmer.last_slot == 103
+        await confirmer.close()
+
+    asyncio.run(run())
+
+
+def test_confirm_by_batched_polling():
+    signatures = [Signature.new_unique() for _ in range(3)]
+    requests = []
+
+    async def get_signature_statuses(client, batch):
+        requests.append(batch)
+        statuses = {
+            signatures[0]: make_status(200, "confirmed"),
+            signatures[1]: make_status(201, "processed"),
+        }
+        return make_signature_statuses_resp(
+            [statuses.get(signature) for signature in batch]
+        )
+
+    async def run():
+        # no websocket, polling only
+        confirmer = SignatureConfirmer(None, poll_interval_seconds=0.01)
+        pendings = [confirmer.watch(signature) for signature in signatures]
+        result = await asyncio.wait_for(pendings[0], 1)
+        assert result.slot == 200 and result.err is None
+        # processed is not confirmed yet
+        assert not pendings[1].done() and not pendings[2].done()
+        assert requests[0] == signatures
+        await confirmer.close()
+
+    with patch(
+        "soldexpy.solana.async_client_wrapper.get_signature_statuses",
+        get_signature_statuses,
+    ):
+        asyncio.run(run())
+
+
+def test_timeout_while_status_rpc_fails():
+    async def get_signature_statuses(client, batch):
+        raise Exception("rpc down")
+
+    async def run():
+        confirmer = SignatureConfirmer(
+            None, poll_interval_seconds=0.01, timeout_seconds=0.05
+        )
+        pending = confirmer.watch(Signature.new_unique())
+        try:
+            await asyncio.wait_for(pending, 1)
+        except Exception as e:
+            assert "Unable to confirm" in str(e)
+        else:
+            assert False, "should time out"
+        assert len(confirmer) == 0
+        await confirmer.close()
+
+    with patch(
+        "soldexpy.solana.async_client_wrapper.get_signature_statuses",
+        get_signature_statuses,
+    ):
+        asyncio.run(run())
@@ -0,0 +1,123 @@
+import asyncio
+from unittest.mock import patch
+
+from solders.pubkey import Pubkey
+
+from soldexpy.solana_util.solana_websocket_subscription import (
+    SubscriptionStatus,
+    subscribe_to_accounts_using_queue,
+)
+from tests.solana.mock_websocket import MockConnect
+
+
+def test_subscribe_to_accounts_using_queue_reconnects():
+    mock_connect = MockConnect()
+    pub_keys = [Pubkey.new_unique(), Pubkey.new_unique()]
+    reconnects = []
+
+    async def run():
+        queue = asyncio.Queue(10)
+        task = asyncio.create_task(
+            subscribe_to_accounts_using_queue(
+                queue,
+                "wss://localhost",
+                pub_keys,
+                "confirmed",
+                on_reconnect=lambda: reconnects.append(True),
+            )
+        )
+        await asyncio.sleep(0.01)
+        first = mock_connect.websockets[0]
+        first.push_account_notification(str(pub_keys[0]), b"", 1)
+        first.push_error(Exception("connection closed"))
+        await asyncio.sleep(0.05)
+        assert len(mock_connect.websockets) == 2
+        assert reconnects == [True]
+        second = mock_connect.websockets[1]
+        second.push_account_notification(str(pub_keys[1]), b"", 2)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+        assert [queue.get_nowait()[0] for _ in range(queue.qsize())] == pub_keys
+        assert second.closed
+
+    with patch.multiple(
+        "soldexpy.solana_util.solana_websocket_subscription",
+        connect=mock_connect,
+        get_backoff_seconds=lambda *args: 0,
+    ):
+        asyncio.run(run())
+
+
+def test_subscribe_to_accounts_notification_before_ack():
+    pub_keys = [Pubkey.new_unique(), Pubkey.new_unique()]
+
+    def before_ack(websocket, request):
+        # the first account changes before the second subscription is acknowledged
+        if request.account == pub_keys[1]:
+            websocket.push_account_notification(str(pub_keys[0]), b"", 1)
+
+    mock_connect = MockConnect(before_ack)
+
+    async def run():
+        queue = asyncio.Queue(10)
+        task = asyncio.create_task(
+            subscribe_to_accounts_using_queue(
+                queue, "wss://localhost", pub_keys, "confirmed"
+            )
+        )
+        await asyncio.sleep(0.01)
+        websocket = mock_connect.websockets[0]
+        # both subscriptions are sent before any acknowledgement is read
+        assert [request.account for request in websocket.sent] == pub_keys
+        websocket.push_account_notification(str(pub_keys[1]), b"", 2)
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+        assert [queue.get_nowait()[0] for _ in range(queue.qsize())] == pub_keys
+        assert sorted(websocket.unsubscribed) == sorted(
+            websocket.subscription_ids[str(pub_key)] for pub_key in pub_keys
+        )
+
+    with patch(
+        "soldexpy.solana_util.solana_websocket_subscription.connect", mock_connect
+    ):
+        asyncio.run(run())
+
+
+def test_backoff_grows_when_connection_drops_after_subscribe():
+    def before_ack(websocket, request):
+        # acknowledged, then dropped before any notification
+        websocket.ack(request)
+        websocket.push_error(Exception("connection closed"))
+
+    mock_connect = MockConnect(respond=before_ack)
+    attempts = []
+    status = SubscriptionStatus()
+
+    def get_backoff_seconds(attempt, *args):
+        attempts.append(attempt)
+        return 0
+
+    async def run():
+        await asyncio.wait_for(
+            subscribe_to_accounts_using_queue(
+                asyncio.Queue(10),
+                "wss://localhost",
+                [Pubkey.new_unique()],
+                "confirmed",
+                max_reconnect_attempts=3,
+                status=status,
+            ),
+            1,
+        )
+
+    with patch.multiple(
+        "soldexpy.solana_util.solana_websocket_subscription",
+        connect=mock_connect,
+        get_backoff_seconds=get_backoff_seconds,
+    ):
+        asyncio.run(run())
+    assert attempts == [0, 1, 2]
+    assert status.reconnect_count == 3
+    assert status.is_stale(60)
@@ -0,0 +1,270 @@
+import asyncio
+
+from pytest import raises
+from solana.rpc.api import Client
+from solana.rpc.websocket_api import SubscriptionError
+from solders.pubkey import Pubkey
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.layout.raydium_layout import LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.subscription_manager import SubscriptionManager
+from tests.solana.mock_websocket import MockConnect
+
+
+def make_vault_data(client: Client, vault: Pubkey, amount: int):
+    data = bytearray(client_wrapper.get_account_info(client, vault).value.data)
+    data[64:72] = amount.to_bytes(8, "little")
+    return bytes(data)
+
+
+def make_amm_data(
+    client: Client, pool: RaydiumPool, base_need_take_pnl: int, quote_need_take_pnl: int
+):
+    data = bytearray(client_wrapper.get_account_info(client, pool.amm_id).value.data)
+    offset = LIQUIDITY_STATE_V4_NEED_TAKE_PNL_OFFSET
+    data[offset : offset + 8] = base_need_take_pnl.to_bytes(8, "little")
+    data[offset + 8 : offset + 16] = quote_need_take_pnl.to_bytes(8, "little")
+    return bytes(data)
+
+
+def test_shares_connections(client: Client):
+    mock_connect = MockConnect()
+    notifications = []
+
+    async def run():
+        manager = SubscriptionManager(
+            "wss://localhost", max_subscriptions_per_connection=2, connect=mock_connect
+        )
+        pub_keys = [Pubkey.new_unique() for _ in range(5)]
+        for pub_key in pub_keys:
+            await manager.subscribe_account(
+                pub_key, lambda pub_key, notification: notifications.append(pub_key)
+            )
+        assert len(manager) == 5
+        assert len(manager.connections) == 3
+        assert len(mock_connect.websockets) == 3
+
+        websocket = mock_connect.websockets[1]
+        websocket.push_account_notification(str(pub_keys[3]), b"", 1)
+        await asyncio.sleep(0.01)
+        assert notifications == [pub_keys[3]]
+
+        # the connection is closed once it has no subscription
+        await manager.unsubscribe_account(pub_keys[4])
+        assert len(manager.connections) == 2
+        assert mock_connect.websockets[2].closed
+        assert pub_keys[4] not in manager
+
+        await manager.close()
+
+    asyncio.run(run())
+
+
+def test_add_pool(client: Client, pool: RaydiumPool):
+    mock_connect = MockConnect()
+    updated_pools = []
+
+    async def run():
+        manager = SubscriptionManager("wss://localhost", connect=mock_connect)
+        await manager.add_pool(pool, updated_pools.append)
+        assert len(mock_connect.websockets) == 1
+        websocket = mock_connect.websockets[0]
+        websocket.push_account_notification(
+            str(pool.get_base_vault()),
+            make_vault_data(client, pool.get_base_vault(), 3000000),
+            249946830,
+        )
+        websocket.push_account_notification(
+            str(pool.get_quote_vault()),
+            make_vault_data(client, pool.get_quote_vault(), 2000000000),
+            249946831,
+        )
+        websocket.push_account_notification(
+            str(pool.amm_id), make_amm_data(client, pool, 1000, 2000), 249946832
+        )
+        await asyncio.sleep(0.01)
+        assert pool.base_vault_balance == 3
+        assert pool.quote_vault_balance == 2
+        assert (
+            pool.pool_info.base_need_take_pnl,
+            pool.pool_info.quote_need_take_pnl,
+        ) == (1000, 2000)
+        assert updated_pools == [pool, pool, pool]
+
+        await manager.remove_pool(pool)
+        assert len(manager) == 0
+        assert websocket.closed
+
+    asyncio.run(run())
+
+
+def test_reconnect_and_resync(client: Client, pool: RaydiumPool):
+    mock_connect = MockConnect()
+    updated_pools = []
+
+    async def run():
+        manager = SubscriptionManager(
+            "wss://localhost", connect=mock_connect, reconnect_base_seconds=0.001
+        )
+        await manager.add_pool(pool, updated_pools.append)
+        base_vault = pool.get_base_vault()
+        first = mock_connect.websockets[0]
+        first.push_account_notification(
+            str(base_vault), make_vault_data(client, base_vault, 3000000), 249946800
+        )
+        await asyncio.sleep(0.01)
+        assert not manager.is_stale(base_vault, 60)
+        assert manager.get_last_update_time(base_vault) is not None
+        assert manager.is_stale(pool.get_quote_vault(), 60)
+
+        # the connection drops and the accounts are subscribed again on a new connection
+        first.push_error(Exception("connection closed"))
+        await asyncio.sleep(0.05)
+        assert len(mock_connect.websockets) == 2
+        second = mock_connect.websockets[1]
+        assert len(second.sent) == 3
+        assert manager.connections[0].reconnect_count == 1
+
+        # a slot gap after the reconnect resyncs the vault balances by RPC
+        second.push_account_notification(
+            str(base_vault), make_vault_data(client, base_vault, 4000000), 249946810
+        )
+        await asyncio.sleep(0.05)
+        # the resync snapshot (slot 249946825) is newer than the notification
+        assert pool.base_vault_balance == 4757782.728947
+        assert pool.base_vault_slot == 249946825
+        assert updated_pools.count(pool) == 3
+
+        await manager.close()
+
+    asyncio.run(run())
+
+
+def test_reconnect_without_gap(client: Client, pool: RaydiumPool):
+    mock_connect = MockConnect()
+    updated_pools = []
+
+    async def run():
+        manager = SubscriptionManager(
+            "wss://localhost", connect=mock_connect, reconnect_base_seconds=0.001
+        )
+        await manager.add_pool(pool, updated_pools.append)
+        base_vault = pool.get_base_vault()
+        quote_vault = pool.get_quote_vault()
+        first = mock_connect.websockets[0]
+        first.push_account_notification(
+            str(base_vault), make_vault_data(client, base_vault, 3000000), 249946900
+        )
+        first.push_error(Exception("connection closed"))
+        await asyncio.sleep(0.05)
+        second = mock_connect.websockets[1]
+
+        # the first slot after the reconnect follows the last slot before the drop,
+        # even though it is another account
+        second.push_account_notification(
+            str(quote_vault),
+            make_vault_data(client, quote_vault, 2000000000),
+            249946901,
+        )
+        await asyncio.sleep(0.05)
+        assert pool.base_vault_balance == 3
+        assert pool.quote_vault_balance == 2
+        assert updated_pools == [pool, pool]
+
+        await manager.close()
+
+    asyncio.run(run())
+
+
+def test_unsubscribe_before_ack():
+    held = []
+    mock_connect = MockConnect(respond=lambda websocket, request: held.append(request))
+
+    async def run():
+        manager = SubscriptionManager("wss://localhost", connect=mock_connect)
+        pub_keys = [Pubkey.new_unique(), Pubkey.new_unique()]
+        await manager.get_connection().open()
+        tasks = [
+            asyncio.create_task(manager.subscribe_account(pub_key, lambda *args: None))
+            for pub_key in pub_keys
+        ]
+        await asyncio.sleep(0.01)
+        await manager.unsubscribe_account(pub_keys[0])
+        with raises(Exception, match="unsubscribed"):
+            await tasks[0]
+        connection = manager.connections[0]
+        assert len(connection.pending_requests) == 1
+
+        # the late acknowledgement of the removed subscription is unsubscribed
+        websocket = mock_connect.websockets[0]
+        for request in held:
+            websocket.ack(request)
+        await tasks[1]
+        await asyncio.sleep(0.01)
+        assert websocket.unsubscribed == [websocket.subscription_ids[str(pub_keys[0])]]
+        assert len(connection.pending_requests) == 0
+        assert len(connection.abandoned_requests) == 0
+
+        await manager.close()
+
+    asyncio.run(run())
+
+
+def test_subscription_error():
+    rejected = Pubkey.new_unique()
+
+    def respond(websocket, request):
+        if request.account == rejected:
+            websocket.reject(request)
+        else:
+            websocket.ack(request)
+
+    mock_connect = MockConnect(respond=respond)
+    notifications = []
+
+    async def run():
+        manager = SubscriptionManager("wss://localhost", connect=mock_connect)
+        pub_key = Pubkey.new_unique()
+        await manager.subscribe_account(
+            pub_key, lambda pub_key, notification: notifications.append(pub_key)
+        )
+        with raises(SubscriptionError):
+            await manager.subscribe_account(rejected, lambda *args: None)
+        assert rejected not in manager
+
+        # the other subscriptions of the connection are not affected
+        websocket = mock_connect.websockets[0]
+        websocket.push_account_notification(str(pub_key), b"", 1)
+        await asyncio.sleep(0.01)
+        assert notifications == [pub_key]
+        assert len(mock_connect.websockets) == 1
+        assert manager.connections[0].reconnect_count == 0
+
+        await manager.close()
+
+    asyncio.run(run())
+
+
+def test_reconnect_attempts_exhausted():
+    mock_connect = MockConnect(respond=lambda websocket, request: None)
+
+    async def run():
+        manager = SubscriptionManager(
+            "wss://localhost",
+            connect=mock_connect,
+            reconnect_base_seconds=0.001,
+            max_reconnect_attempts=2,
+        )
+        task = asyncio.create_task(
+            manager.subscribe_account(Pubkey.new_unique(), lambda *args: None)
+        )
+        await asyncio.sleep(0.01)
+        mock_connect.error = Exception("connection refused")
+        mock_connect.websockets[0].push_error(Exception("connection closed"))
+        # the subscription fails instead of waiting forever
+        with raises(Exception, match="failed to reconnect"):
+            await asyncio.wait_for(task, 1)
+        assert len(manager) == 0
+
+    asyncio.run(run())
@@ -0,0 +1,170 @@
+import asyncio
+import base64
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.rpc.responses import SendTransactionResp, parse_websocket_message
+from solders.signature import Signature
+from solders.token.associated import get_associated_token_address
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.signature_confirmer import ThreadedSignatureConfirmer
+from soldexpy.swap import Swap
+from soldexpy.token_account_registry import TokenAccountRegistry
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+from tests.test_signature_confirmer import (
+    make_signature_statuses_resp,
+    make_status,
+)
+
+
+def make_account_notification(data: bytes, slot: int):
+    return parse_websocket_message(
+        json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "accountNotification",
+                "params": {
+                    "result": {
+                        "context": {"slot": slot},
+                        "value": {
+                            "data": [base64.b64encode(data).decode(), "base64"],
+                            "executable": False,
+                            "lamports": 2039280,
+                            "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                            "rentEpoch": 0,
+                            "space": len(data),
+                        },
+                    },
+                    "subscription": 0,
+                },
+            }
+        )
+    )[0]
+
+
+def test_update_local_price_on_changes_using_vault_notifications(
+    client: Client, pool: RaydiumPool
+):
+    swap = Swap(client, pool)
+    base_data = bytearray(
+        client_wrapper.get_account_info(client, pool.get_base_vault()).value.data
+    )
+    quote_data = bytearray(
+        client_wrapper.get_account_info(client, pool.get_quote_vault()).value.data
+    )
+    base_data[64:72] = (2000000).to_bytes(8, "little")
+    quote_data[64:72] = (1000000000).to_bytes(8, "little")
+
+    async def subscribe(queue, websocket_rpc_url, pub_keys, commitment, **kwargs):
+        assert pub_keys == [pool.get_base_vault(), pool.get_quote_vault()]
+        await queue.put(
+            (pub_keys[0], make_account_notification(bytes(base_data), 249946830))
+        )
+        await queue.put(
+            (pub_keys[1], make_account_notification(bytes(quote_data), 249946831))
+        )
+
+    with patch("soldexpy.swap.subscribe_to_accounts_using_queue", subscribe):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(
+                asyncio.wait_for(
+                    swap.update_local_price_on_changes("wss://localhost", True), 0.1
+                )
+            )
+    assert pool.base_vault_balance == 2
+    assert pool.quote_vault_balance == 1
+    assert pool.vault_balance_slot == 249946830
+    assert swap.price == 2
+
+
+def test_buy_returns_confirmation_handle(client: Client, pool: RaydiumPool):
+    payer = Keypair()
+    signatures = [Signature.new_unique() for _ in range(2)]
+    statuses = {}
+
+    async def get_signature_statuses(client, batch):
+        return make_signature_statuses_resp(
+            [statuses.get(signature) for signature in batch]
+        )
+
+    confirmer = ThreadedSignatureConfirmer(None, poll_interval_seconds=0.01)
+    registry = TokenAccountRegistry(client, payer.pubkey())
+    wrapped_sol_account = WrappedSolAccount(client, payer.pubkey())
+    swap = Swap(
+        client,
+        pool,
+        token_account_registry=registry,
+        wrapped_sol_account=wrapped_sol_account,
+        signature_confirmer=confirmer,
+    )
+    sent = iter(signatures)
+    with patch.object(swap, "make_buy_transaction"), patch.object(
+        swap,
+        "send_transaction",
+        lambda transaction: SendTransactionResp(next(sent)),
+    ), patch(
+        "soldexpy.solana.async_client_wrapper.get_signature_statuses",
+        get_signature_statuses,
+    ):
+        # the handle is returned before the confirmation
+        wrapped_sol_account.amount = 1000
+        handle = swap.buy(0.001, 0.01, payer, False, wait_for_confirmation=False)
+        assert not handle.done()
+        statuses[signatures[0]] = make_status(249946830, "confirmed")
+        pending = handle.result(1)
+        assert pending.signature == signatures[0] and pending.slot == 249946830
+        # the bookkeeping runs in the done callback on the confirmer thread
+        account = get_associated_token_address(payer.pubkey(), pool.base_mint_address)
+        for _ in range(100):
+            if account in registry:
+                break
+            time.sleep(0.01)
+        assert account in registry
+        assert wrapped_sol_account.amount == 1000
+
+        # a failed buy invalidates the tracked WSOL amount
+        statuses[signatures[1]] = make_status(
+            249946831, "confirmed", {"InstructionError": [0, {"Custom": 30}]}
+        )
+        pending = swap.buy(0.001, 0.01, payer, False)
+        assert pending.err is not None
+        assert wrapped_sol_account.amount is None
+    confirmer.close()
+
+
+def test_resync_vaults_only_on_slot_gap_after_reconnect(
+    client: Client, pool: RaydiumPool
+):
+    swap = Swap(client, pool)
+    data = client_wrapper.get_account_info(client, pool.get_base_vault()).value.data
+    events = []
+
+    async def update_local_price_from_pool():
+        events.append("resync")
+
+    async def subscribe(queue, websocket_rpc_url, pub_keys, commitment, **kwargs):
+        for slot in (249946830, None, 249946831, None, 249946840):
+            if slot is None:
+                kwargs["on_reconnect"]()
+            else:
+                await queue.put((pub_keys[0], make_account_notification(data, slot)))
+            events.append(slot)
+            await asyncio.sleep(0.01)
+
+    with patch(
+        "soldexpy.swap.subscribe_to_accounts_using_queue", subscribe
+    ), patch.object(swap, "update_local_price_from_pool", update_local_price_from_pool):
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(
+                asyncio.wait_for(
+                    swap.update_local_price_on_changes("wss://localhost", True), 0.1
+                )
+            )
+    # no gap after the first reconnect, a gap after the second one
+    assert events == [249946830, None, 249946831, None, 249946840, "resync"]
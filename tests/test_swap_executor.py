@@ -0,0 +1,181 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.signature import Signature
+
+from soldexpy.async_raydium_pool import AsyncRaydiumPool
+from soldexpy.async_swap_executor import AsyncSwapExecutor
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_util.blockhash_prefetcher import (
+    SECONDS_PER_BLOCK,
+    BlockhashPrefetcher,
+)
+from soldexpy.solana_util.signature_confirmer import ThreadedSignatureConfirmer
+from soldexpy.swap_executor import SwapExecutor, SwapOrder, get_percentile
+from tests.solana.mock_client_cache import MockClientCache
+from tests.test_signature_confirmer import (
+    make_signature_statuses_resp,
+    make_status,
+)
+
+
+def make_confirmed_resp(err=None):
+    return SimpleNamespace(value=[SimpleNamespace(err=err)])
+
+
+def test_get_percentile():
+    assert get_percentile([], 50) is None
+    values = list(range(100, 0, -1))
+    assert get_percentile(values, 50) == 50
+    assert get_percentile(values, 99) == 99
+    assert get_percentile(values, 100) == 100
+    assert get_percentile([3], 99) == 3
+
+
+def test_execute_batch(client: Client, mock_client_cache: MockClientCache):
+    pool_address = mock_client_cache.get_pool_address_for_tests()
+    pools = RaydiumPool.load_many(client, [pool_address, pool_address])
+    orders = [
+        SwapOrder(pools[0], Direction.SPEND_QUOTE_TOKEN, 10, 0.01),
+        SwapOrder(pools[0], Direction.SPEND_QUOTE_TOKEN, 10, 0.01),
+        SwapOrder(pools[1], Direction.SPEND_QUOTE_TOKEN, 10, 0.01),
+        SwapOrder(pools[1], Direction.SPEND_BASE_TOKEN, 1000, 0.01),
+    ]
+    transactions = []
+    events = []
+    in_flight = [0, 0]
+    lock = threading.Lock()
+
+    def send_transaction(client, transaction):
+        transactions.append(transaction)
+        events.append(("send", transaction.signatures[0]))
+        if transaction is built[3]:
+            raise Exception("rejected")
+        return SimpleNamespace(value=transaction.signatures[0])
+
+    def confirm_transaction(client, signature, commitment, sleep_seconds):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        events.append(("confirm", signature))
+        return make_confirmed_resp()
+
+    executor = SwapExecutor(client, Keypair(), max_concurrency=2)
+    executor.rent_lamports = 2039280
+    build = executor.build
+    built = []
+
+    def build_and_keep(results):
+        built.extend(build(results))
+        return built
+
+    executor.build = build_and_keep
+    with patch.multiple(
+        "soldexpy.solana.client_wrapper",
+        send_transaction=send_transaction,
+        confirm_transaction=confirm_transaction,
+    ):
+        results = list(executor.execute(orders))
+
+    assert len(results) == 4
+    assert sorted(result.index for result in results) == [0, 1, 2, 3]
+    assert in_flight[1] <= 2
+    # one blockhash for the whole batch
+    assert len({tx.message.recent_blockhash for tx in transactions}) == 1
+    # the second buy of the pool is quoted after the first one
+    first, second, other_pool, _ = executor.results
+    assert second.amount_out < first.amount_out
+    assert other_pool.amount_out == first.amount_out
+    # and sent once the first one is confirmed
+    assert events.index(("confirm", first.signature)) < events.index(
+        ("send", second.signature)
+    )
+    report = executor.get_report()
+    assert report["order_count"] == 4
+    assert report["succeeded_count"] == 3
+    assert report["failed_count"] == 1
+    assert report["p50_latency_seconds"] >= 0.02
+    assert report["throughput"] > 0
+    assert [result.succeeded for result in executor.results].count(False) == 1
+
+
+def test_rebuild_expired_transaction(client: Client, pool: RaydiumPool):
+    prefetcher = BlockhashPrefetcher(client, min_remaining_blocks=20).attach()
+    old, fresh = Hash.new_unique(), Hash.new_unique()
+    # the current block height is ~1060
+    prefetcher.add_blockhash(old, 1200, time.time() - 10 * SECONDS_PER_BLOCK)
+    sent = []
+    confirmed = []
+
+    def send_transaction(client, transaction):
+        sent.append(transaction)
+        return SimpleNamespace(value=transaction.signatures[0])
+
+    async def get_signature_statuses(client, signatures):
+        if len(confirmed) == 0:
+            # the first order of the pool confirms 200 blocks later
+            prefetcher.add_blockhash(fresh, 1400, time.time())
+        confirmed.extend(signatures)
+        return make_signature_statuses_resp(
+            [make_status(249946830, "confirmed") for _ in signatures]
+        )
+
+    confirmer = ThreadedSignatureConfirmer(None, poll_interval_seconds=0.01)
+    executor = SwapExecutor(client, Keypair(), signature_confirmer=confirmer)
+    orders = [SwapOrder(pool, Direction.SPEND_BASE_TOKEN, 1000, 0.01)] * 2
+    with patch(
+        "soldexpy.solana.client_wrapper.send_transaction", send_transaction
+    ), patch(
+        "soldexpy.solana.async_client_wrapper.get_signature_statuses",
+        get_signature_statuses,
+    ):
+        results = executor.execute_all(orders)
+    confirmer.close()
+
+    assert all(result.succeeded for result in results)
+    assert [result.status.slot for result in results] == [249946830] * 2
+    # the second one was rebuilt with a fresh blockhash before it was sent
+    assert [tx.message.recent_blockhash for tx in sent] == [old, fresh]
+    assert results[1].last_valid_block_height == 1400
+    assert confirmed == [result.signature for result in results]
+
+
+def test_async_execute_batch(async_client: AsyncClient, async_pool: AsyncRaydiumPool):
+    async def send_transaction(client, transaction):
+        return SimpleNamespace(value=transaction.signatures[0])
+
+    async def confirm_transaction(client, signature, commitment, sleep_seconds):
+        return make_confirmed_resp({"InstructionError": [3, {"Custom": 30}]})
+
+    async def run():
+        executor = AsyncSwapExecutor(async_client, Keypair())
+        executor.rent_lamports = 2039280
+        orders = [
+            SwapOrder(async_pool, Direction.SPEND_QUOTE_TOKEN, 1, 0.01),
+            SwapOrder(async_pool, Direction.SPEND_BASE_TOKEN, 1000, 0.01),
+        ]
+        results = [result async for result in executor.execute(orders)]
+        return executor, results
+
+    with patch.multiple(
+        "soldexpy.solana.async_client_wrapper",
+        send_transaction=send_transaction,
+        confirm_transaction=confirm_transaction,
+    ):
+        executor, results = asyncio.run(run())
+
+    assert len(results) == 2
+    assert all(isinstance(result.signature, Signature) for result in results)
+    assert not any(result.succeeded for result in results)
+    assert executor.get_report()["failed_count"] == 2
@@ -0,0 +1,37 @@
+from unittest.mock import MagicMock
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+
+from soldexpy.layout.raydium_layout import ROUTE_DATA_LAYOUT
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.make_swap_instruction import make_swap_instruction
+
+
+def test_make_swap_instruction_without_rpc(pool: RaydiumPool):
+    owner = Keypair()
+    source, dest = Pubkey.new_unique(), Pubkey.new_unique()
+    # any RPC would fail on this client
+    ctx = MagicMock(side_effect=Exception("no RPC"))
+    ctx.get_account_info_json_parsed.side_effect = Exception("no RPC")
+
+    instruction = make_swap_instruction(
+        1000, source, dest, pool, pool.base_mint_address, ctx, owner, 900
+    )
+    assert instruction.data == ROUTE_DATA_LAYOUT.build(
+        dict(instruction=9, amount_in=1000, amount_out=900)
+    )
+    assert len(instruction.accounts) == 18
+    assert instruction.accounts[0].pubkey == pool.token_program_id
+    assert instruction.accounts[5].pubkey == pool.pool_coin_token_account
+    assert [meta.pubkey for meta in instruction.accounts[-3:]] == [
+        source,
+        dest,
+        owner.pubkey(),
+    ]
+    assert instruction.accounts[-1].is_signer
+
+    # the template is built once per pool
+    template = pool.get_swap_instruction_template()
+    make_swap_instruction(1, source, dest, pool, pool.base_mint_address, ctx, owner, 1)
+    assert pool.get_swap_instruction_template() is template
@@ -0,0 +1,147 @@
+from unittest.mock import patch
+
+import pytest
+from solana.rpc.api import Client
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.token.associated import get_associated_token_address
+
+import soldexpy.solana.client_wrapper as client_wrapper
+from soldexpy.common.direction import Direction
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.compute_unit_estimator import ComputeUnitEstimator
+from soldexpy.solana_tx_util.swap_message_template import (
+    SwapMessageTemplate,
+    SwapMessageTemplateCache,
+)
+from soldexpy.solana_tx_util.swap_transaction_builder import (
+    SwapTransactionBuilder,
+    create_idempotent_associated_token_account,
+)
+from soldexpy.swap import Swap
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+from tests.test_compute_unit_estimator import (
+    get_unit_limit,
+    make_simulate_transaction_resp,
+)
+
+
+def decompile(message: MessageV0):
+    keys = message.account_keys
+    return [
+        (
+            keys[instruction.program_id_index],
+            bytes(instruction.data),
+            [keys[index] for index in instruction.accounts],
+        )
+        for instruction in message.instructions
+    ]
+
+
+def to_tuples(instructions: list):
+    return [
+        (
+            instruction.program_id,
+            bytes(instruction.data),
+            [meta.pubkey for meta in instruction.accounts],
+        )
+        for instruction in instructions
+    ]
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_template_matches_builder(client: Client, pool: RaydiumPool, direction):
+    payer = Keypair()
+    blockhash = Hash.new_unique()
+    seed = "0123456789abcdef0123456789abcdef"
+    template = SwapMessageTemplate(pool, payer, direction, rent_lamports=2039280)
+    transaction = template.build(1000000, 900000, blockhash, 30000, seed)
+    assert transaction.message.recent_blockhash == blockhash
+    assert transaction.verify_with_results() == [True]
+
+    builder = SwapTransactionBuilder(client, pool, payer)
+    builder.append_set_compute_budget(30000, 600000)
+    if direction == Direction.SPEND_QUOTE_TOKEN:
+        source = builder.append_create_account_with_seed(2039280 + 1000000, seed)
+        builder.append_initialize_account(source)
+        builder.instructions.append(
+            create_idempotent_associated_token_account(
+                payer.pubkey(), payer.pubkey(), pool.base_mint_address
+            )
+        )
+        dest = get_associated_token_address(payer.pubkey(), pool.base_mint_address)
+        builder.append_swap(1000000, source, dest, 900000)
+        builder.append_close_account(source)
+    else:
+        source = get_associated_token_address(payer.pubkey(), pool.base_mint_address)
+        dest = get_associated_token_address(payer.pubkey(), pool.quote_mint_address)
+        builder.append_create_associated_token_account(pool.quote_mint_address)
+        builder.append_swap(1000000, source, dest, 900000)
+        builder.append_close_account(dest)
+    assert decompile(transaction.message) == to_tuples(builder.instructions)
+
+
+def test_new_seed_for_every_buy(pool: RaydiumPool):
+    cache = SwapMessageTemplateCache()
+    payer = Keypair()
+    template = cache.get(pool, payer, Direction.SPEND_QUOTE_TOKEN)
+    assert cache.get(pool, payer, Direction.SPEND_QUOTE_TOKEN) is template
+    assert len(cache) == 1
+    first = template.build(1, 1, Hash.new_unique())
+    second = template.build(1, 1, Hash.new_unique())
+    assert set(first.message.account_keys) != set(second.message.account_keys)
+
+
+def test_swap_uses_message_template(client: Client, pool: RaydiumPool):
+    swap = Swap(client, pool, message_template_cache=SwapMessageTemplateCache())
+    swap.rent_lamports = 2039280
+    payer = Keypair()
+    blockhash = client_wrapper.get_latest_blockhash(client)
+    buy = swap.make_buy_transaction(payer, 1000000, 900000)
+    sell = swap.make_sell_transaction(payer, 900000, 1000)
+    assert len(swap.message_template_cache) == 2
+    for transaction in [buy, sell]:
+        assert transaction.message.recent_blockhash == blockhash
+        assert transaction.verify_with_results() == [True]
+
+
+def test_template_unit_limit_from_compute_unit_estimator(
+    client: Client, pool: RaydiumPool
+):
+    estimator = ComputeUnitEstimator(client, margin_ratio=0.1, min_margin_units=2000)
+    swap = Swap(
+        client,
+        pool,
+        message_template_cache=SwapMessageTemplateCache(),
+        compute_unit_estimator=estimator,
+    )
+    payer = Keypair()
+    simulated = []
+
+    def simulate_transaction(client, transaction, sig_verify, commitment):
+        simulated.append(get_unit_limit(transaction))
+        return make_simulate_transaction_resp(50000)
+
+    with patch(
+        "soldexpy.solana.client_wrapper.simulate_transaction", simulate_transaction
+    ):
+        transactions = [
+            swap.make_sell_transaction(payer, 900000, 1000) for _ in range(2)
+        ]
+
+    # simulated once with the unit budget of the template, then patched from the cache
+    assert simulated == [600000]
+    assert [get_unit_limit(transaction) for transaction in transactions] == [55000] * 2
+    assert transactions[0].verify_with_results() == [True]
+
+
+def test_template_rejects_wrapped_sol_account(client: Client, pool: RaydiumPool):
+    payer = Keypair()
+    with pytest.raises(Exception, match="wrapped_sol_account"):
+        Swap(
+            client,
+            pool,
+            message_template_cache=SwapMessageTemplateCache(),
+            wrapped_sol_account=WrappedSolAccount(client, payer.pubkey()),
+        )
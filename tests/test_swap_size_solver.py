@@ -0,0 +1,74 @@
+import pytest
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.raydium_swap_math import get_amount_out
+from soldexpy.swap_size_solver import (
+    get_max_raw_amount_in_for_price,
+    get_max_raw_amount_in_for_price_impact,
+)
+
+# get_price is deprecated, it is still the reference of the float model
+pytestmark = pytest.mark.filterwarnings("ignore:get_price is deprecated")
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_get_amount_in_for_amount_out(pool: RaydiumPool, direction):
+    amount_in, raw_amount_in = pool.get_amount_in_for_amount_out(10, direction)
+    _, _, amount_out, _ = pool.get_price(amount_in, direction)
+    assert amount_out == pytest.approx(10, rel=1e-9)
+    _, _, decimals = pool.get_reserves_for_direction(direction)
+    assert raw_amount_in == pool.get_amount_in(10 * 10 ** decimals[1], direction)
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_get_max_amount_in_for_price_impact(pool: RaydiumPool, direction):
+    amount_in, raw_amount_in = pool.get_max_amount_in_for_price_impact(0.02, direction)
+    price, base_price, _, _ = pool.get_price(amount_in, direction, Unit.BASE_TOKEN)
+    if direction == Direction.SPEND_QUOTE_TOKEN:
+        assert 1 - price / base_price == pytest.approx(0.02)
+    else:
+        assert 1 - base_price / price == pytest.approx(0.02)
+    _, _, decimals = pool.get_reserves_for_direction(direction)
+    assert raw_amount_in / 10 ** decimals[0] == pytest.approx(amount_in, rel=1e-3)
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+def test_get_max_amount_in_for_price(pool: RaydiumPool, direction):
+    _, base_price, _, _ = pool.get_price(1, direction)
+    # 1% worse than the current pool price
+    limit_price = base_price * (
+        1.01 if direction == Direction.SPEND_QUOTE_TOKEN else 0.99
+    )
+    amount_in, raw_amount_in = pool.get_max_amount_in_for_price(limit_price, direction)
+    assert amount_in > 0
+    _, _, decimals = pool.get_reserves_for_direction(direction)
+    assert raw_amount_in / 10 ** decimals[0] == pytest.approx(amount_in, rel=1e-3)
+    # already over the limit
+    limit_price = base_price * (
+        0.99 if direction == Direction.SPEND_QUOTE_TOKEN else 1.01
+    )
+    assert pool.get_max_amount_in_for_price(limit_price, direction) == (0, 0)
+
+
+def test_raw_solvers_are_exact():
+    reserve_in, reserve_out = 41868877422974, 4757782728947
+    amount_in = get_max_raw_amount_in_for_price_impact(0.02, reserve_in, 25, 10000)
+    assert (amount_in - (amount_in * 25 + 9999) // 10000) <= 0.02 * reserve_in / 0.98
+    assert (amount_in + 1 - ((amount_in + 1) * 25 + 9999) // 10000) > (
+        0.02 * reserve_in / 0.98
+    )
+
+    max_price = reserve_in / reserve_out * 1.05
+
+    def pool_price(amount_in):
+        amount_in_after_fee = amount_in - (amount_in * 25 + 9999) // 10000
+        amount_out = get_amount_out(amount_in, reserve_in, reserve_out, 25, 10000)
+        return (reserve_in + amount_in_after_fee) / (reserve_out - amount_out)
+
+    amount_in = get_max_raw_amount_in_for_price(
+        max_price, reserve_in, reserve_out, 25, 10000
+    )
+    assert pool_price(amount_in) <= max_price
+    assert pool_price(amount_in + 1) > max_price
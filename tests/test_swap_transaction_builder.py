@@ -0,0 +1,66 @@
+import pytest
+from solana.rpc.api import Client
+from solders.compute_budget import ID as COMPUTE_BUDGET_PROGRAM_ID
+from solders.hash import Hash
+from solders.keypair import Keypair
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_transaction_builder import (
+    PACKET_DATA_SIZE,
+    SwapTransactionBuilder,
+)
+from tests.solana.mock_client_cache import MockClientCache
+
+RENT_LAMPORTS = 2039280
+
+
+def get_compute_budget(builder: SwapTransactionBuilder):
+    # {instruction index: value} of the compute budget instructions
+    return {
+        instruction.data[0]: int.from_bytes(bytes(instruction.data[1:]), "little")
+        for instruction in builder.instructions
+        if instruction.program_id == COMPUTE_BUDGET_PROGRAM_ID
+    }
+
+
+def count_program(builder: SwapTransactionBuilder, program_id):
+    return [instruction.program_id for instruction in builder.instructions].count(
+        program_id
+    )
+
+
+def test_swaps_share_one_compute_budget_header(
+    client: Client, mock_client_cache: MockClientCache
+):
+    pool_address = mock_client_cache.get_pool_address_for_tests()
+    pool, other_pool = RaydiumPool.load_many(client, [pool_address, pool_address])
+    builder = SwapTransactionBuilder(
+        client, pool, Keypair(), unit_price=1000, use_idempotent_create=True
+    )
+    builder.append_sell(1000000, 1)
+    builder.unit_price = 3000
+    builder.append_buy(1000000, 1, rent_lamports=RENT_LAMPORTS)
+    assert count_program(builder, COMPUTE_BUDGET_PROGRAM_ID) == 2
+    # summed limit, highest price
+    assert get_compute_budget(builder) == {2: 1200000, 3: 3000}
+
+    transaction = builder.compile_versioned_transaction(Hash.default())
+    assert len(bytes(transaction)) <= PACKET_DATA_SIZE
+
+    builder.set_pool(other_pool)
+    builder.append_buy(1000000, 1, rent_lamports=RENT_LAMPORTS)
+    assert get_compute_budget(builder) == {2: 1400000, 3: 3000}
+    assert builder.legs == [
+        (pool.amm_id, Direction.SPEND_BASE_TOKEN),
+        (pool.amm_id, Direction.SPEND_QUOTE_TOKEN),
+        (other_pool.amm_id, Direction.SPEND_QUOTE_TOKEN),
+    ]
+    assert count_program(builder, RAYDIUM_LIQUIDITY_POOL_V4) == 3
+    # the destination account of the buys is created once (the WSOL one once per sell)
+    assert count_program(builder, ASSOCIATED_TOKEN_PROGRAM_ID) == 2
+    # a temporary WSOL account per buy doesn't fit without lookup tables
+    with pytest.raises(Exception, match="Transaction too large"):
+        builder.compile_versioned_transaction(Hash.default())
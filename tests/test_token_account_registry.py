@@ -0,0 +1,134 @@
+import asyncio
+import base64
+import json
+from unittest.mock import patch
+
+from solana.rpc.api import Client
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.rpc.responses import GetTokenAccountsByOwnerResp
+from solders.token.associated import get_associated_token_address
+
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.associated_token_account import (
+    CREATE_IDEMPOTENT_ASSOCIATED_TOKEN_ACCOUNT,
+)
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.solana_util.subscription_manager import SubscriptionManager
+from soldexpy.token_account_registry import TokenAccountRegistry
+from tests.conftest import make_token_account_data
+from tests.solana.mock_websocket import MockConnect
+
+
+def make_token_accounts_resp(accounts: dict):
+    return GetTokenAccountsByOwnerResp.from_json(
+        json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "result": {
+                    "context": {"slot": 1},
+                    "value": [
+                        {
+                            "pubkey": str(account),
+                            "account": {
+                                "data": [base64.b64encode(data).decode(), "base64"],
+                                "executable": False,
+                                "lamports": 2039280,
+                                "owner": "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
+                                "rentEpoch": 0,
+                                "space": len(data),
+                            },
+                        }
+                        for account, data in accounts.items()
+                    ],
+                },
+                "id": 1,
+            }
+        )
+    )
+
+
+def test_registry_decides_create_ata_without_rpc(client: Client, pool: RaydiumPool):
+    payer = Keypair()
+    mint = pool.base_mint_address
+    account = get_associated_token_address(payer.pubkey(), mint)
+    queries = []
+
+    def get_token_accounts_by_owner(client, address, opts, commitment=None):
+        queries.append(address)
+        return make_token_accounts_resp(
+            {account: make_token_account_data(mint, payer.pubkey(), 1000)}
+        )
+
+    with patch(
+        "soldexpy.solana.client_wrapper.get_token_accounts_by_owner",
+        get_token_accounts_by_owner,
+    ):
+        registry = TokenAccountRegistry(client, payer.pubkey())
+        registry.load()
+        assert registry.has_associated_token_account(mint)
+        assert registry.get_token_accounts(mint) == [account]
+        assert registry.get_amount(account) == 1000
+
+        builder = SwapTransactionBuilder(
+            client, pool, payer, token_account_registry=registry
+        )
+        builder.append_if_not_exists_create_associated_token_account(mint)
+        assert builder.instructions == []
+
+        # unknown account: created with the idempotent instruction
+        other_mint = Pubkey.new_unique()
+        builder.append_if_not_exists_create_associated_token_account(other_mint)
+        assert builder.instructions[0].data == bytes(
+            [CREATE_IDEMPOTENT_ASSOCIATED_TOKEN_ACCOUNT]
+        )
+        assert queries == [payer.pubkey()]
+
+    # closed accounts are removed by the notifications
+    registry.update_from_account_data(account, b"")
+    assert not registry.has_associated_token_account(mint)
+
+
+def test_idempotent_create_without_registry(client: Client, pool: RaydiumPool):
+    payer = Keypair()
+    builder = SwapTransactionBuilder(client, pool, payer, use_idempotent_create=True)
+    builder.append_if_not_exists_create_associated_token_account(pool.base_mint_address)
+    instruction = builder.instructions[0]
+    assert instruction.data == bytes([CREATE_IDEMPOTENT_ASSOCIATED_TOKEN_ACCOUNT])
+    assert instruction.accounts[1].pubkey == get_associated_token_address(
+        payer.pubkey(), pool.base_mint_address
+    )
+
+
+def test_subscribe_accounts_added_later(client: Client):
+    payer = Keypair()
+    mint = Pubkey.new_unique()
+    mock_connect = MockConnect()
+
+    async def run():
+        manager = SubscriptionManager("wss://localhost", connect=mock_connect)
+        registry = TokenAccountRegistry(client, payer.pubkey())
+        await registry.subscribe(manager)
+        assert len(manager) == 0
+
+        # e.g. the account created by a confirmed buy
+        account = registry.get_associated_token_address(mint)
+        registry.add_token_account(account, mint)
+        await asyncio.sleep(0.01)
+        assert account in manager
+        websocket = mock_connect.websockets[0]
+        websocket.push_account_notification(
+            str(account), make_token_account_data(mint, payer.pubkey(), 1000), 1
+        )
+        await asyncio.sleep(0.01)
+        assert registry.get_amount(account) == 1000
+
+        # closed accounts are unsubscribed
+        websocket.push_account_notification(str(account), b"", 2)
+        await asyncio.sleep(0.01)
+        assert account not in registry
+        assert account not in manager
+
+        await manager.close()
+
+    asyncio.run(run())
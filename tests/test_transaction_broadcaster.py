@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.message import MessageV0
+from solders.system_program import TransferParams, transfer
+from solders.transaction import VersionedTransaction
+
+from soldexpy.solana_util.async_transaction_broadcaster import (
+    AsyncTransactionBroadcaster,
+)
+from soldexpy.solana_util.transaction_broadcaster import TransactionBroadcaster
+
+
+class StubRpcServer:
+    """
+    Local JSON-RPC endpoint answering sendTransaction after delay_seconds, or with an error.
+    """
+
+    def __init__(self, delay_seconds: float = 0, error: bool = False):
+        self.delay_seconds = delay_seconds
+        self.error = error
+        self.request_count = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.request_count += 1
+                time.sleep(stub.delay_seconds)
+                if stub.error:
+                    resp = {"code": -32603, "message": "Internal error"}
+                    resp = {"jsonrpc": "2.0", "error": resp, "id": body["id"]}
+                else:
+                    signature = str(
+                        VersionedTransaction.from_bytes(
+                            base64.b64decode(body["params"][0])
+                        ).signatures[0]
+                    )
+                    resp = {"jsonrpc": "2.0", "result": signature, "id": body["id"]}
+                data = json.dumps(resp).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def servers():
+    servers = [
+        StubRpcServer(delay_seconds=0.3),
+        StubRpcServer(error=True),
+        StubRpcServer(),
+    ]
+    yield servers
+    for server in servers:
+        server.close()
+
+
+def make_transaction():
+    payer = Keypair()
+    instruction = transfer(
+        TransferParams(from_pubkey=payer.pubkey(), to_pubkey=payer.pubkey(), lamports=1)
+    )
+    message = MessageV0.try_compile(
+        payer.pubkey(), [instruction], [], Hash.new_unique()
+    )
+    return VersionedTransaction(message, [payer])
+
+
+def test_broadcast_returns_first_accepted(servers):
+    broadcaster = TransactionBroadcaster([Client(server.url) for server in servers])
+    transaction = make_transaction()
+    start = time.perf_counter()
+    resp = broadcaster.send_transaction(transaction)
+    assert time.perf_counter() - start < 0.2
+    assert resp.value == transaction.signatures[0]
+    broadcaster.close()
+    slow, error, fast = broadcaster.stats
+    assert [stats.sent_count for stats in broadcaster.stats] == [1, 1, 1]
+    assert slow.accepted_count == 1 and slow.latency_seconds >= 0.3
+    assert error.error_count == 1 and error.get_error_rate() == 1
+    assert fast.accepted_count == 1 and fast.latency_seconds < 0.2
+    assert broadcaster.get_stats()[0] is fast
+
+
+def test_demote_slow_and_failing_endpoints():
+    broadcaster = TransactionBroadcaster(
+        [Client(f"http://127.0.0.1:{port}") for port in [1, 2, 3]],
+        min_samples=2,
+        max_latency_ratio=3,
+        probe_every=4,
+    )
+    slow, error, fast = broadcaster.stats
+    # not enough samples yet
+    assert broadcaster.get_endpoint_indexes() == [0, 1, 2]
+    for _ in range(2):
+        slow.record_accepted(0.3)
+        error.record_error(Exception("Internal error"))
+        fast.record_accepted(0.05)
+    assert broadcaster.get_endpoint_indexes() == [2]
+    # within max_latency_ratio of the best endpoint
+    slow.latency_seconds = 0.15
+    assert broadcaster.get_endpoint_indexes() == [0, 2]
+    # every 4th broadcast probes all endpoints
+    assert broadcaster.get_endpoint_indexes() == [0, 1, 2]
+
+
+def test_async_broadcast_returns_first_accepted(servers):
+    async def run():
+        broadcaster = AsyncTransactionBroadcaster(
+            [AsyncClient(server.url) for server in servers]
+        )
+        transaction = make_transaction()
+        start = time.perf_counter()
+        resp = await broadcaster.send_transaction_async(transaction)
+        assert time.perf_counter() - start < 0.2
+        assert resp.value == transaction.signatures[0]
+        await broadcaster.close_async()
+        assert [stats.sent_count for stats in broadcaster.stats] == [1, 1, 1]
+        assert broadcaster.stats[0].accepted_count == 1
+        assert broadcaster.stats[1].error_count == 1
+
+    asyncio.run(run())
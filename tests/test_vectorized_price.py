@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from soldexpy.common.direction import Direction
+from soldexpy.common.unit import Unit
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.vectorized_price import get_pools_prices, get_prices
+
+# get_price is deprecated, it is still the reference of the float model
+pytestmark = pytest.mark.filterwarnings("ignore:get_price is deprecated")
+
+
+@pytest.mark.parametrize("direction", list(Direction))
+@pytest.mark.parametrize("unit", list(Unit))
+def test_get_prices_matches_get_price(pool: RaydiumPool, direction, unit):
+    in_amounts = np.geomspace(1e-6, 1e6, 200)
+    prices = pool.get_prices(in_amounts, direction, unit)
+    for i, in_amount in enumerate(in_amounts):
+        expected = pool.get_price(float(in_amount), direction, unit)
+        assert tuple(result[i] for result in prices) == expected
+
+
+def test_get_pools_prices(pool: RaydiumPool):
+    in_amounts = [0.1, 1, 10]
+    prices, base_prices, amounts_out, amounts_in = get_pools_prices(
+        [pool, pool], in_amounts, Direction.SPEND_QUOTE_TOKEN
+    )
+    assert prices.shape == (2, 3)
+    assert base_prices.shape == (2, 3)
+    for i, in_amount in enumerate(in_amounts):
+        expected = pool.get_price(in_amount, Direction.SPEND_QUOTE_TOKEN)
+        assert (
+            prices[1, i],
+            base_prices[1, i],
+            amounts_out[1, i],
+            amounts_in[1, i],
+        ) == expected
+
+
+def test_get_prices_for_many_reserves():
+    base_vault_balances = np.array([[1000.0], [2000.0]])
+    quote_vault_balances = np.array([[10.0], [5.0]])
+    _, base_prices, amounts_out, _ = get_prices(
+        base_vault_balances, quote_vault_balances, [1.0], Direction.SPEND_QUOTE_TOKEN
+    )
+    assert base_prices[:, 0].tolist() == [0.01, 0.0025]
+    assert amounts_out[0, 0] < amounts_out[1, 0]
@@ -0,0 +1,178 @@
+from solana.rpc.api import Client
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.signature import Signature
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from solders.token.associated import get_associated_token_address
+from spl.token.constants import (
+    ASSOCIATED_TOKEN_PROGRAM_ID,
+    TOKEN_PROGRAM_ID,
+    WRAPPED_SOL_MINT,
+)
+
+from soldexpy.common.reference_address import RAYDIUM_LIQUIDITY_POOL_V4
+from soldexpy.raydium_pool import RaydiumPool
+from soldexpy.solana_tx_util.swap_transaction_builder import SwapTransactionBuilder
+from soldexpy.wrapped_sol_account import WrappedSolAccount
+from tests.conftest import make_token_account_data
+from tests.solana.mock_client_cache import MockClientCache
+
+
+def get_program_ids(builder: SwapTransactionBuilder):
+    return [instruction.program_id for instruction in builder.instructions[2:]]
+
+
+def confirm(builder: SwapTransactionBuilder, wrapped_sol_account: WrappedSolAccount):
+    transaction = builder.compile_versioned_transaction(Hash.default())
+    wrapped_sol_account.confirm(transaction.signatures[0])
+
+
+def test_buy_and_sell_reuse_wrapped_sol_account(
+    client: Client, pool: RaydiumPool, mock_client_cache: MockClientCache
+):
+    payer = Keypair()
+    wrapped_sol_account = WrappedSolAccount(client, payer.pubkey())
+    assert wrapped_sol_account.address == get_associated_token_address(
+        payer.pubkey(), WRAPPED_SOL_MINT
+    )
+    mock_client_cache.amend_cache_for_account_info(
+        wrapped_sol_account.address,
+        make_token_account_data(WRAPPED_SOL_MINT, payer.pubkey(), 5000000),
+        TOKEN_PROGRAM_ID,
+    )
+
+    def make_builder():
+        return SwapTransactionBuilder(
+            client,
+            pool,
+            payer,
+            use_idempotent_create=True,
+            wrapped_sol_account=wrapped_sol_account,
+        )
+
+    # covered by the wrapped amount: compute budget, destination account and swap only
+    builder = make_builder()
+    builder.append_buy(1000000, 1)
+    assert get_program_ids(builder) == [
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        RAYDIUM_LIQUIDITY_POOL_V4,
+    ]
+    assert builder.instructions[-1].accounts[-3].pubkey == wrapped_sol_account.address
+    # reserved while pending, applied once confirmed
+    assert wrapped_sol_account.get_available_amount() == 4000000
+    assert wrapped_sol_account.amount == 5000000
+    confirm(builder, wrapped_sol_account)
+    assert wrapped_sol_account.amount == 4000000
+
+    # topped up by the shortfall only
+    builder = make_builder()
+    builder.append_buy(6000000, 1)
+    assert get_program_ids(builder) == [
+        SYSTEM_PROGRAM_ID,
+        TOKEN_PROGRAM_ID,
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        RAYDIUM_LIQUIDITY_POOL_V4,
+    ]
+    assert builder.instructions[2].data[4:12] == (2000000).to_bytes(8, "little")
+    confirm(builder, wrapped_sol_account)
+    assert wrapped_sol_account.amount == 0
+
+    # the sell pays into the account and doesn't close it
+    builder = make_builder()
+    builder.append_sell(1000000, 3000)
+    assert get_program_ids(builder) == [RAYDIUM_LIQUIDITY_POOL_V4]
+    assert builder.instructions[-1].accounts[-2].pubkey == wrapped_sol_account.address
+    # what a sell adds is not available before it is confirmed
+    assert wrapped_sol_account.get_available_amount() == 0
+    confirm(builder, wrapped_sol_account)
+    assert wrapped_sol_account.amount == 3000
+
+
+def test_create_wrapped_sol_account_once(client: Client, pool: RaydiumPool):
+    payer = Keypair()
+    wrapped_sol_account = WrappedSolAccount(
+        client, payer.pubkey(), top_up_lamports=10000000
+    )
+    # no account yet
+    wrapped_sol_account.update_from_account_data(b"")
+    builder = SwapTransactionBuilder(
+        client, pool, payer, wrapped_sol_account=wrapped_sol_account
+    )
+    builder.append_buy(1000000, 1, False)
+    assert get_program_ids(builder) == [
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        SYSTEM_PROGRAM_ID,
+        TOKEN_PROGRAM_ID,
+        RAYDIUM_LIQUIDITY_POOL_V4,
+    ]
+    # at least top_up_lamports are wrapped, so the next buys need no top up
+    assert builder.instructions[3].data[4:12] == (10000000).to_bytes(8, "little")
+    # created once confirmed
+    assert not wrapped_sol_account.exists
+    confirm(builder, wrapped_sol_account)
+    assert wrapped_sol_account.exists
+    assert wrapped_sol_account.amount == 9000000
+
+    builder = SwapTransactionBuilder(
+        client, pool, payer, wrapped_sol_account=wrapped_sol_account
+    )
+    builder.append_buy(1000000, 1, False)
+    assert get_program_ids(builder) == [RAYDIUM_LIQUIDITY_POOL_V4]
+
+
+def test_failed_or_unsent_transaction_does_not_change_amount(
+    client: Client, pool: RaydiumPool
+):
+    payer = Keypair()
+    wrapped_sol_account = WrappedSolAccount(client, payer.pubkey())
+    wrapped_sol_account.update_from_account_data(
+        make_token_account_data(WRAPPED_SOL_MINT, payer.pubkey(), 5000000), 100
+    )
+
+    def compile_buy(amount_in: int):
+        builder = SwapTransactionBuilder(
+            client, pool, payer, wrapped_sol_account=wrapped_sol_account
+        )
+        builder.append_buy(amount_in, 1, False)
+        return builder.compile_versioned_transaction(Hash.default())
+
+    failed = compile_buy(1000000)
+    landed = compile_buy(2000000)
+    assert wrapped_sol_account.get_available_amount() == 2000000
+    wrapped_sol_account.discard(failed.signatures[0])
+    assert wrapped_sol_account.get_available_amount() == 3000000
+    # not applied again if the account data was read after it landed
+    wrapped_sol_account.update_from_account_data(
+        make_token_account_data(WRAPPED_SOL_MINT, payer.pubkey(), 3000000), 102
+    )
+    wrapped_sol_account.confirm(landed.signatures[0], 101)
+    assert wrapped_sol_account.amount == 3000000
+
+    # a transaction never sent stops reserving its spend after pending_timeout_seconds
+    compile_buy(1000000)
+    assert wrapped_sol_account.get_available_amount() == 2000000
+    wrapped_sol_account.pending_timeout_seconds = -1
+    assert wrapped_sol_account.get_available_amount() == 3000000
+    assert wrapped_sol_account.amount == 3000000
+
+
+def test_unwrap_applies_on_confirmation(client: Client):
+    payer = Keypair()
+    wrapped_sol_account = WrappedSolAccount(client, payer.pubkey())
+    wrapped_sol_account.update_from_account_data(
+        make_token_account_data(WRAPPED_SOL_MINT, payer.pubkey(), 5000000)
+    )
+    key = object()
+    assert len(wrapped_sol_account.make_unwrap_instructions(key)) == 1
+    # built but not sent (or failed): nothing changes
+    assert wrapped_sol_account.exists
+    assert wrapped_sol_account.amount == 5000000
+    wrapped_sol_account.discard(key)
+    assert wrapped_sol_account.amount == 5000000
+
+    signature = Signature.new_unique()
+    wrapped_sol_account.make_unwrap_instructions(key)
+    wrapped_sol_account.set_pending_signature(key, signature)
+    wrapped_sol_account.confirm(signature)
+    assert not wrapped_sol_account.exists
+    assert wrapped_sol_account.amount == 0